@@ -0,0 +1,89 @@
+#!/usr/bin/python2.5
+
+# Copyright 2009 DeWitt Clinton All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''Compares encoding with jsonply.dump/dumps against parsing the same text.
+
+Usage: python bench/bench_dump.py [records]
+
+Builds a document of the given number of records (default 20000), then
+times dumps() in both modes, dump() to a temporary file, and parsing the
+resulting text with the LALR and fast JsonParser engines.
+'''
+
+__author__ = 'dewitt@unto.net'
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import jsonply
+
+
+def best_time(function, repeat=5):
+  '''Return the best time in seconds of a call to function.'''
+  best = None
+  for i in range(repeat):
+    started = time.time()
+    function()
+    elapsed = time.time() - started
+    if best is None or elapsed < best:
+      best = elapsed
+  return best
+
+
+def make_value(records):
+  return [{u'id': i, u'name': u'item %d \xe9' % i, u'score': i / 3.0,
+           u'tags': [1, 2.5, True, None]} for i in range(records)]
+
+
+def main(argv):
+  records = 20000
+  if len(argv) > 1:
+    records = int(argv[1])
+  value = make_value(records)
+  text = jsonply.dumps(value)
+  assert jsonply.parse(text) == value
+
+  fd, path = tempfile.mkstemp()
+  os.close(fd)
+  def dump():
+    f = open(path, 'wb')
+    try:
+      jsonply.dump(value, f)
+    finally:
+      f.close()
+  lalr = jsonply.JsonParser()
+  fast = jsonply.JsonParser(engine='fast')
+  try:
+    print '%d records, %d bytes' % (records, len(text))
+    for name, function in (
+        ('dumps', lambda: jsonply.dumps(value)),
+        ('dumps iter', lambda: jsonply.dumps(value, iterative=True)),
+        ('dump file', dump),
+        ('parse lalr', lambda: lalr.parse(text)),
+        ('parse fast', lambda: fast.parse(text))):
+      elapsed = best_time(function)
+      print '%-12s %10.1f ms %10.1f MB/s' % (
+          name, elapsed * 1000, len(text) / elapsed / 1e6)
+  finally:
+    os.remove(path)
+
+
+if __name__ == '__main__':
+  main(sys.argv)
@@ -0,0 +1,92 @@
+#!/usr/bin/python2.5
+
+# Copyright 2009 DeWitt Clinton All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''Compares the LRParser interpreter with a generated parser module.
+
+Usage: python bench/bench_generated.py [records]
+
+Parses a document of the given number of records (default 20000) with
+the JsonParser grammar, from a pre-tokenized list so that only the parser
+is timed, using LRParser.parse() and a module written by write_module().
+'''
+
+__author__ = 'dewitt@unto.net'
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import jsonply
+
+
+def best_time(function, repeat=5):
+  '''Return the best time in seconds of a call to function.'''
+  best = None
+  for i in range(repeat):
+    started = time.time()
+    function()
+    elapsed = time.time() - started
+    if best is None or elapsed < best:
+      best = elapsed
+  return best
+
+
+def make_document(records):
+  return '[%s]' % ', '.join(
+      ['{"id": %d, "name": "item %d", "tags": [1, 2.5, true, null]}' % (i, i)
+       for i in range(records)])
+
+
+def main(argv):
+  records = 20000
+  if len(argv) > 1:
+    records = int(argv[1])
+  tmpdir = tempfile.mkdtemp()
+  sys.path.insert(0, tmpdir)
+  try:
+    parser = jsonply.JsonParser()
+    parser.parser.write_module('benchjsonparser', tmpdir)
+    import benchjsonparser
+    generated = benchjsonparser.Parser(parser)
+
+    tokens = parser.json_lexer.tokenize(make_document(records))
+    def run(parse):
+      def call():
+        it = iter(tokens)
+        return parse(lexer=parser.lexer,
+                     tokenfunc=lambda: next(it, None))
+      return call
+    assert run(parser.parser.parse)() == run(generated.parse)()
+
+    interpreted = best_time(run(parser.parser.parse))
+    compiled = best_time(run(generated.parse))
+    print '%d tokens' % len(tokens)
+    print '%-12s %10.1f ms %12.0f tokens/s' % (
+        'LRParser', interpreted * 1000, len(tokens) / interpreted)
+    print '%-12s %10.1f ms %12.0f tokens/s' % (
+        'generated', compiled * 1000, len(tokens) / compiled)
+    print 'speedup %.2fx' % (interpreted / compiled)
+  finally:
+    sys.path.remove(tmpdir)
+    shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+  main(sys.argv)
@@ -0,0 +1,375 @@
+#!/usr/bin/python2.5
+
+# Copyright 2009 DeWitt Clinton All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''Benchmarks jsonply and ply on generated corpora, against a baseline.
+
+Usage: python bench/bench_suite.py [options] [corpus ...]
+
+The corpora are generated from a fixed random seed, so every run measures
+the same texts:
+
+  deep      arrays and objects nested thousands of levels deep
+  wide      one object with tens of thousands of members
+  strings   an array of long plain strings
+  numbers   an array of ints, floats and exponents
+  escapes   an array of strings full of escapes and UTF-8
+  ndjson    many small records, one per line, read with parse_lines
+
+For each corpus the lexer phase (ply.lex.Lexer alone) and the parser
+phase (LRParser on a pre-lexed token list) are timed separately, then the
+whole parse is timed repeatedly for latency percentiles.  Peak memory is
+measured in a child process that only reads and parses the corpus, and
+cold start is the time for a fresh interpreter to import jsonply and
+build a JsonParser.
+
+Options:
+  --scale N        multiply the size of every corpus by N (default 1)
+  --repeat N       the number of timed whole parses per corpus (default 20)
+  --engine NAME    the JsonParser engine, 'lalr' or 'fast' (default lalr)
+  --save FILE      write the results to FILE as a baseline
+  --compare FILE   compare the results with the baseline in FILE, and exit
+                   with status 1 if any metric regressed
+  --threshold F    the relative change counted as a regression (default 0.1)
+'''
+
+__author__ = 'dewitt@unto.net'
+
+import functools
+import optparse
+import os
+import random
+import resource
+import shutil
+import StringIO
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.insert(0, ROOT)
+
+import jsonply
+
+# The random seed of every corpus
+SEED = 20090101
+
+# The metrics for which a larger value is better; for all others a smaller
+# value is better
+HIGHER_IS_BETTER = set(['lex_tokens_per_s', 'parse_tokens_per_s',
+                        'mb_per_s'])
+
+
+def make_deep(rand, scale):
+  depth = 2000 * scale
+  return '[{"k": ' * depth + '1' + '}]' * depth
+
+
+def make_wide(rand, scale):
+  members = ['"key%d": %s' % (i, rand.choice(['1', '2.5', 'true', 'null',
+                                              '"value"', '[]', '{}']))
+             for i in range(20000 * scale)]
+  return '{%s}' % ', '.join(members)
+
+
+def make_strings(rand, scale):
+  words = ['alpha', 'bravo', 'charlie', 'delta', 'echo', 'foxtrot', 'golf']
+  strings = ['"%s"' % ' '.join([rand.choice(words)
+                                for j in range(rand.randint(2, 16))])
+             for i in range(20000 * scale)]
+  return '[%s]' % ', '.join(strings)
+
+
+def make_numbers(rand, scale):
+  numbers = list()
+  for i in range(50000 * scale):
+    kind = rand.randint(0, 3)
+    if kind == 0:
+      numbers.append(str(rand.randint(-10 ** 6, 10 ** 6)))
+    elif kind == 1:
+      numbers.append(repr(rand.uniform(-1000, 1000)))
+    elif kind == 2:
+      numbers.append('%de%d' % (rand.randint(1, 9), rand.randint(-20, 20)))
+    else:
+      numbers.append(str(rand.randint(0, 9)))
+  return '[%s]' % ', '.join(numbers)
+
+
+def make_escapes(rand, scale):
+  pieces = ['\\n', '\\t', '\\"', '\\\\', '\\/', '\\u00e9', '\\ud83d\\ude00',
+            '\xc3\xa9', '\xe3\x82\xa4', 'plain']
+  strings = ['"%s"' % ''.join([rand.choice(pieces)
+                               for j in range(rand.randint(4, 24))])
+             for i in range(5000 * scale)]
+  return '[%s]' % ', '.join(strings)
+
+
+def make_ndjson(rand, scale):
+  lines = ['{"id": %d, "name": "user%d", "score": %s, "tags": ["a", "b"],'
+           ' "active": %s}' % (i, rand.randint(0, 10 ** 6),
+                              repr(rand.random()),
+                              rand.choice(['true', 'false']))
+           for i in range(5000 * scale)]
+  return '\n'.join(lines) + '\n'
+
+
+CORPORA = [
+  ('deep', make_deep),
+  ('wide', make_wide),
+  ('strings', make_strings),
+  ('numbers', make_numbers),
+  ('escapes', make_escapes),
+  ('ndjson', make_ndjson),
+]
+
+
+def make_corpus(name, scale):
+  '''Return the text of a corpus, which is the same on every run.'''
+  return dict(CORPORA)[name](random.Random(SEED), scale)
+
+
+def best_time(function, repeat=5):
+  '''Return the best time in seconds of a call to function.'''
+  best = None
+  for i in range(repeat):
+    started = time.time()
+    function()
+    elapsed = time.time() - started
+    if best is None or elapsed < best:
+      best = elapsed
+  return best
+
+
+def percentile(values, fraction):
+  '''Return the nearest-rank percentile of a list of values.'''
+  values = sorted(values)
+  index = int(round(fraction * len(values) + 0.5)) - 1
+  return values[max(0, min(index, len(values) - 1))]
+
+
+def count_tokens(lexer, text):
+  '''Lex a text with tokenbatch() and return the number of tokens.'''
+  lexer.input(text)
+  count = 0
+  while True:
+    batch = lexer.tokenbatch(1024)
+    if not batch:
+      return count
+    count += len(batch)
+
+
+def parse_ndjson(text):
+  for lineno, value, error in jsonply.parse_lines(StringIO.StringIO(text)):
+    if error is not None:
+      raise SyntaxError(error)
+
+
+def measure(name, text, path, options):
+  '''Return the metrics of one corpus.'''
+  parser = jsonply.JsonParser(engine=options.engine)
+  lexer = parser.lexer
+  results = dict()
+
+  tokens = count_tokens(lexer, text)
+  lex_time = best_time(lambda: count_tokens(lexer, text))
+  results['lex_tokens_per_s'] = tokens / lex_time
+
+  if name == 'ndjson':
+    parse = lambda: parse_ndjson(text)
+  else:
+    token_list = parser.json_lexer.tokenize(text)
+    def parse_tokens():
+      parser.parser.parse(lexer=lexer, tokenfunc=functools.partial(
+          next, iter(token_list), None))
+    results['parse_tokens_per_s'] = tokens / best_time(parse_tokens)
+    parse = lambda: parser.parse(text)
+
+  latencies = list()
+  for i in range(options.repeat):
+    started = time.time()
+    parse()
+    latencies.append(time.time() - started)
+  results['mb_per_s'] = len(text) / percentile(latencies, 0.5) / 1e6
+  results['p50_ms'] = percentile(latencies, 0.5) * 1000
+  results['p90_ms'] = percentile(latencies, 0.9) * 1000
+  results['p99_ms'] = percentile(latencies, 0.99) * 1000
+  results['peak_kb'] = peak_memory(name, path, options.engine)
+  results['bytes'] = len(text)
+  results['tokens'] = tokens
+  return results
+
+
+def peak_memory(name, path, engine):
+  '''Return the peak memory in KB of parsing a corpus in a child process.'''
+  output = subprocess.Popen(
+      [sys.executable, os.path.abspath(__file__), '--child-memory',
+       name, path, engine], stdout=subprocess.PIPE).communicate()[0]
+  return int(output.split()[-1])
+
+
+def child_memory(name, path, engine):
+  '''Print the growth in peak RSS of parsing a corpus file.'''
+  f = open(path, 'rb')
+  try:
+    text = f.read()
+  finally:
+    f.close()
+  parser = jsonply.JsonParser(engine=engine)
+  # Building the parse tables can push the peak above anything the parse
+  # itself reaches, so reset the peak where Linux allows it
+  try:
+    f = open('/proc/self/clear_refs', 'w')
+    try:
+      f.write('5')
+    finally:
+      f.close()
+  except (IOError, OSError):
+    pass
+  before = current_rss()
+  if name == 'ndjson':
+    parse_ndjson(text)
+  else:
+    parser.parse(text)
+  print max(0, peak_rss() - before)
+
+
+def current_rss():
+  '''Return the resident set size of this process in KB.'''
+  try:
+    f = open('/proc/self/statm')
+    try:
+      return int(f.read().split()[1]) * resource.getpagesize() // 1024
+    finally:
+      f.close()
+  except (IOError, OSError):
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def peak_rss():
+  '''Return the peak resident set size of this process in KB.'''
+  try:
+    f = open('/proc/self/status')
+    try:
+      for line in f:
+        if line.startswith('VmHWM:'):
+          return int(line.split()[1])
+    finally:
+      f.close()
+  except (IOError, OSError):
+    pass
+  return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def cold_start(repeat=5):
+  '''Return the median time in ms to import jsonply and build a JsonParser.'''
+  code = ('import sys, time; sys.path.insert(0, %r); started = time.time();'
+          ' import jsonply; jsonply.JsonParser();'
+          ' print time.time() - started' % ROOT)
+  times = list()
+  for i in range(repeat):
+    output = subprocess.Popen([sys.executable, '-c', code],
+                              stdout=subprocess.PIPE).communicate()[0]
+    times.append(float(output.split()[-1]) * 1000)
+  return percentile(times, 0.5)
+
+
+def compare(results, baseline, threshold):
+  '''Print the change in every metric and return the list of regressions.'''
+  regressions = list()
+  print
+  print '%-10s %-20s %14s %14s %8s' % ('corpus', 'metric', 'baseline',
+                                       'current', 'change')
+  for corpus in sorted(results):
+    if corpus not in baseline:
+      continue
+    for metric in sorted(results[corpus]):
+      if metric in ('bytes', 'tokens') or metric not in baseline[corpus]:
+        continue
+      old = baseline[corpus][metric]
+      new = results[corpus][metric]
+      if not old:
+        continue
+      change = (new - old) / float(old)
+      if metric in HIGHER_IS_BETTER:
+        regressed = change < -threshold
+      else:
+        regressed = change > threshold
+      flag = ''
+      if regressed:
+        flag = '  REGRESSION'
+        regressions.append((corpus, metric))
+      print '%-10s %-20s %14.1f %14.1f %+7.1f%%%s' % (
+          corpus, metric, old, new, change * 100, flag)
+  return regressions
+
+
+def main(argv):
+  if len(argv) > 1 and argv[1] == '--child-memory':
+    child_memory(*argv[2:5])
+    return 0
+  option_parser = optparse.OptionParser(usage=__doc__)
+  option_parser.add_option('--scale', type='int', default=1)
+  option_parser.add_option('--repeat', type='int', default=20)
+  option_parser.add_option('--engine', default='lalr')
+  option_parser.add_option('--save')
+  option_parser.add_option('--compare')
+  option_parser.add_option('--threshold', type='float', default=0.1)
+  options, names = option_parser.parse_args(argv[1:])
+  if not names:
+    names = [name for name, make in CORPORA]
+
+  results = dict()
+  tmpdir = tempfile.mkdtemp()
+  try:
+    print '%-10s %9s %9s %12s %12s %8s %9s %9s %9s %9s' % (
+        'corpus', 'KB', 'tokens', 'lex tok/s', 'parse tok/s', 'MB/s',
+        'p50 ms', 'p90 ms', 'p99 ms', 'peak KB')
+    for name in names:
+      text = make_corpus(name, options.scale)
+      path = os.path.join(tmpdir, name + '.json')
+      f = open(path, 'wb')
+      try:
+        f.write(text)
+      finally:
+        f.close()
+      metrics = results[name] = measure(name, text, path, options)
+      print '%-10s %9d %9d %12.0f %12s %8.2f %9.1f %9.1f %9.1f %9d' % (
+          name, metrics['bytes'] / 1024, metrics['tokens'],
+          metrics['lex_tokens_per_s'],
+          '%.0f' % metrics['parse_tokens_per_s']
+          if 'parse_tokens_per_s' in metrics else '-',
+          metrics['mb_per_s'], metrics['p50_ms'], metrics['p90_ms'],
+          metrics['p99_ms'], metrics['peak_kb'])
+  finally:
+    shutil.rmtree(tmpdir)
+  results['startup'] = {'cold_start_ms': cold_start()}
+  print 'cold start %.1f ms' % results['startup']['cold_start_ms']
+
+  if options.save:
+    f = open(options.save, 'wb')
+    try:
+      jsonply.dump(results, f)
+    finally:
+      f.close()
+  if options.compare:
+    baseline = jsonply.parse_file(options.compare)
+    if compare(results, baseline, options.threshold):
+      return 1
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main(sys.argv))
@@ -0,0 +1,136 @@
+#!/usr/bin/python2.5
+
+# Copyright 2009 DeWitt Clinton All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''Compares the load time of ply table modules and binary table files.
+
+Usage: python bench/bench_tables.py [levels]
+
+Times loading the JsonLexer and JsonParser tables, and the parse tables of
+a generated expression grammar with the given number of precedence levels
+(default 60), from both the .py table modules and the binary table files.
+'''
+
+__author__ = 'dewitt@unto.net'
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import jsonply
+import ply.lex
+import ply.yacc
+
+
+def best_time(function, repeat=5, number=20):
+  '''Return the best average time in seconds of number calls to function.'''
+  best = None
+  for i in range(repeat):
+    started = time.time()
+    for j in range(number):
+      function()
+    elapsed = (time.time() - started) / number
+    if best is None or elapsed < best:
+      best = elapsed
+  return best
+
+
+def import_fresh(name):
+  '''Import a table module, discarding any copy already imported.'''
+  sys.modules.pop(name, None)
+  return __import__(name)
+
+
+def write_grammar(dirname, levels):
+  '''Write a module with an expression grammar of the given depth.'''
+  tokens = ['OP%d' % i for i in range(levels)] + ['NUMBER', 'LPAREN', 'RPAREN']
+  lines = ['tokens = %r' % (tokens,)]
+  for i in range(levels):
+    lines.append('def p_expr%d(p):' % i)
+    lines.append('  """expr%d : expr%d OP%d expr%d' % (i, i, i, i + 1))
+    lines.append('           | expr%d"""' % (i + 1))
+  lines.append('def p_expr%d(p):' % levels)
+  lines.append('  """expr%d : NUMBER' % levels)
+  lines.append('           | LPAREN expr0 RPAREN"""')
+  lines.append('def p_error(p):')
+  lines.append('  pass')
+  f = open(os.path.join(dirname, 'benchgrammar.py'), 'w')
+  f.write('\n'.join(lines) + '\n')
+  f.close()
+
+
+def report(name, py_seconds, pickle_seconds):
+  print '%-28s %10.3f ms %10.3f ms %8.1fx' % (
+      name, py_seconds * 1000, pickle_seconds * 1000,
+      py_seconds / pickle_seconds)
+
+
+def main(argv):
+  levels = 60
+  if len(argv) > 1:
+    levels = int(argv[1])
+  tmpdir = tempfile.mkdtemp()
+  sys.path.insert(0, tmpdir)
+  try:
+    print '%-28s %13s %13s %9s' % ('tables', '.py module', 'binary', 'speedup')
+
+    # The JsonLexer tables
+    lexer = jsonply.JsonLexer(optimize=0, lextab=None)
+    lexer.lexer.writetab('benchlextab', tmpdir)
+    lexfile = os.path.join(tmpdir, 'lextab.pickle')
+    lexer.lexer.writepickle(lexfile, 0)
+    ldict = dict([(name, getattr(lexer, name)) for name in dir(lexer)])
+    import_fresh('benchlextab')
+    report('JsonLexer',
+           best_time(lambda: ply.lex.Lexer().readtab(
+               import_fresh('benchlextab'), ldict)),
+           best_time(lambda: ply.lex.Lexer().readpickle(lexfile, ldict)))
+
+    # The JsonParser tables
+    parsefile = os.path.join(tmpdir, 'parsetab.pickle')
+    jsonply.JsonParser(optimize=0, tabmodule='benchparsetab',
+                       write_tables=1, outputdir=tmpdir)
+    jsonply.JsonParser(optimize=0, tabmodule=None, picklefile=parsefile)
+    import_fresh('benchparsetab')
+    report('JsonParser',
+           best_time(lambda: ply.yacc.LRTable().read_table(
+               import_fresh('benchparsetab'))),
+           best_time(lambda: ply.yacc.LRTable().read_pickle(parsefile)))
+
+    # A larger generated grammar
+    write_grammar(tmpdir, levels)
+    import benchgrammar
+    bigfile = os.path.join(tmpdir, 'bigtab.pickle')
+    ply.yacc.yacc(module=benchgrammar, tabmodule='benchbigtab', debug=0,
+                  outputdir=tmpdir)
+    ply.yacc.yacc(module=benchgrammar, tabmodule=None, debug=0,
+                  picklefile=bigfile)
+    import_fresh('benchbigtab')
+    report('%d-level grammar' % levels,
+           best_time(lambda: ply.yacc.LRTable().read_table(
+               import_fresh('benchbigtab')), number=5),
+           best_time(lambda: ply.yacc.LRTable().read_pickle(bigfile),
+                     number=5))
+  finally:
+    sys.path.remove(tmpdir)
+    shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+  main(sys.argv)
@@ -28,10 +28,33 @@ __author__ = 'dewitt@unto.net'
 __version__ = '0.1-devel'
 
 
+import array
+import collections
+import copy
+import decimal
+import itertools
+import mmap
+import multiprocessing
+import os
 import ply
 import ply.lex
 import ply.yacc
+import re
 import sys
+import threading
+import time
+
+# The prebuilt lexer and parser tables.  These are generated by
+# write_tables() and must be regenerated whenever the JsonLexer or
+# JsonParser rules change.
+try:
+  import jsonply_lextab
+except ImportError:
+  jsonply_lextab = None
+try:
+  import jsonply_parsetab
+except ImportError:
+  jsonply_parsetab = None
 
 
 # The list of tokens to be extracted by the JsonLexer and parsed by
@@ -47,15 +70,11 @@ JSON_TOKENS = [
   'NAME_SEPARATOR',
   'VALUE_SEPARATOR',
   'QUOTATION_MARK',
+  'STRING',
   'FALSE',
   'TRUE',
   'NULL',
-  'DECIMAL_POINT',
-  'DIGITS',
-  'E',
-  'MINUS',
-  'PLUS',
-  'ZERO',
+  'NUMBER',
   # String state tokens
   'UNESCAPED',
   'ESCAPE',
@@ -70,6 +89,116 @@ JSON_TOKENS = [
   'UNICODE_HEX'
 ]
 
+# The number of bytes parse_file reads from a file per chunk.
+CHUNK_SIZE = 64 * 1024
+
+# A token or lexer error this close to the end of a partial chunk may be
+# the start of a token that the next chunk completes (e.g. '\u00' or '1e').
+MAX_INCOMPLETE = 6
+
+
+# Matches a complete JSON string, including the quotation marks.  The
+# loop is unrolled so that unterminated strings fail in linear time.
+STRING_PATTERN = (r'\x22[^\x00-\x1F\x22\x5C]*'
+                  r'(?:\x5C(?:[\x22\x5C\x2F\x62\x66\x6E\x72\x74]|'
+                  r'\x75[\x30-\x39\x41-\x46\x61-\x66]{4})'
+                  r'[^\x00-\x1F\x22\x5C]*)*\x22')
+
+# Matches a single escape sequence within a STRING token
+_ESCAPE_RE = re.compile(
+    r'\x5C(?:([\x22\x5C\x2F\x62\x66\x6E\x72\x74])|'
+    r'\x75([\x30-\x39\x41-\x46\x61-\x66]{4}))')
+
+# The characters that the single character escapes stand for
+_ESCAPES = {
+  u'"': u'"',
+  u'\\': u'\\',
+  u'/': u'/',
+  u'b': unichr(0x0008),
+  u'f': unichr(0x000c),
+  u'n': unichr(0x000a),
+  u'r': unichr(0x000d),
+  u't': unichr(0x0009),
+}
+
+
+def _unescape(match):
+  '''Return the character for an _ESCAPE_RE match.'''
+  char, hex_digits = match.groups()
+  if char is not None:
+    return _ESCAPES[char]
+  return unichr(int(hex_digits, 16))
+
+
+def _string_value(text, decode_strings=True):
+  '''Return the value of the text between a string's quotation marks.
+
+  Args:
+    text: the raw text of the string, which may contain escapes
+    decode_strings: if False, a byte string is returned as UTF-8 encoded
+      bytes rather than decoded to unicode
+  '''
+  if '\\' in text:
+    if isinstance(text, str):
+      value = _ESCAPE_RE.sub(_unescape, unicode(text, encoding='utf8'))
+      if not decode_strings:
+        return value.encode('utf8')
+      return value
+    return _ESCAPE_RE.sub(_unescape, text)
+  if decode_strings and isinstance(text, str):
+    return unicode(text, encoding='utf8')
+  return text
+
+
+# Matches a JSON number.  Leading zeroes are matched here so that they
+# can be reported by the parser rather than split into two numbers.
+NUMBER_PATTERN = (r'\x2D?[\x30-\x39]+(?:\x2E[\x30-\x39]+)?'
+                  r'(?:[\x45\x65][\x2B\x2D]?[\x30-\x39]+)?')
+
+# Matches the NUMBER tokens that have a leading zero
+_LEADING_ZERO_RE = re.compile(r'\x2D?\x30[\x30-\x39]')
+
+
+def _to_number(text, parse_float=float, parse_int=int):
+  '''Convert the text of a NUMBER token to a python number.
+
+  Args:
+    text: the text of the NUMBER token
+    parse_float: called with the text of numbers with a fraction or exponent
+    parse_int: called with the text of all other numbers
+  Raises:
+    SyntaxError: if the number has leading zeroes
+  '''
+  if _LEADING_ZERO_RE.match(text):
+    raise SyntaxError('Leading zeroes are not allowed.')
+  if '.' in text or 'e' in text or 'E' in text:
+    return parse_float(text)
+  return parse_int(text)
+
+
+def _numeric_array(values):
+  '''Return a list of numbers as an array.array, or any other list as is.
+
+  A list of ints becomes an array.array('l') and a list of ints and
+  floats an array.array('d').  Lists holding anything else, including
+  bools, longs and parse_float results such as decimal.Decimal, and empty
+  lists are returned unchanged.
+  '''
+  if values:
+    types = set(map(type, values))
+    if types == _INT_TYPES:
+      return array.array('l', values)
+    if types <= _NUMBER_TYPES:
+      return array.array('d', values)
+  return values
+
+_INT_TYPES = set([int])
+_NUMBER_TYPES = set([int, float])
+
+
+class _IncompleteToken(Exception):
+  '''Raised when the input ends in the middle of a token.'''
+
 
 class JsonLexer(object):
   '''A class-based wrapper around the ply.lex instance.
@@ -78,24 +207,38 @@ class JsonLexer(object):
   corresponding to the JSON_TOKENS values.
   '''
 
-  def __init__(self, **kwargs):
+  def __init__(self, decode_strings=True, **kwargs):
     '''Constructs the JsonLexer based on the tokenization rules herein.
 
     Successful construction builds the ply.lex instance and sets
-    self.lexer.
+    self.lexer.  By default the lexer is loaded from the prebuilt
+    jsonply_lextab module without validating the rules.
+
+    Args:
+      decode_strings: If False, the STRING tokens of byte string input
+        keep their UTF-8 encoded bytes instead of being decoded to unicode.
+      kwargs: Passed to ply.lex.lex, overriding the defaults.
     '''
+    self.decode_strings = decode_strings
+    kwargs.setdefault('optimize', 1)
+    kwargs.setdefault('lextab', jsonply_lextab)
     self.lexer = ply.lex.lex(module=self, **kwargs)
+    self.reset()
 
   # The JsonLexer uses the JSON_TOKENS values as a contact between
   # the lexer and the parser.
   tokens = JSON_TOKENS
 
+  # Whether lexing errors are printed as well as collected in self.errors
+  verbose = True
+
   # The JsonLexer has three exclusive states:
   #
   #   default:
   #     The default context, tokenizing objects, arrays, numbers, etc.
+  #     Well-formed strings are matched here as a single STRING token.
   #   string:
-  #     Within quote-delimited strings.
+  #     Within quote-delimited strings that the STRING rule rejected.
   #   escaped:
   #     A single-use state that treats the next character literally.
   states = (
@@ -104,12 +247,18 @@ class JsonLexer(object):
   )
 
   def t_ANY_error(self, t): 
-    last_cr = self.lexer.lexdata.rfind('\n', 0, t.lexpos)
+    if self.partial and len(t.value) < MAX_INCOMPLETE:
+      # The tail of a chunk may be the start of a valid token
+      raise _IncompleteToken()
+    last_cr = t.lexer.lexdata.rfind('\n', 0, t.lexpos)
     if last_cr < 0:
       last_cr = 0
     column = (t.lexpos - last_cr) + 1
-    print "Illegal character '%s' at line %d pos %d" % (
+    message = "Illegal character '%s' at line %d pos %d" % (
       t.value[0], t.lineno, column)
+    self.errors.append(message)
+    if self.verbose:
+      print message
     t.lexer.skip(1) 
 
   # Skips over '\s', '\t', '\n', and '\r' characters in the default state
@@ -125,16 +274,22 @@ class JsonLexer(object):
   t_FALSE                = r'\x66\x61\x6c\x73\x65'  # 'false'
   t_TRUE                 = r'\x74\x72\x75\x65'      # 'true'
   t_NULL                 = r'\x6e\x75\x6c\x6c'      # 'null'
-  t_DECIMAL_POINT        = r'\x2E'                  # '.'
-  t_DIGITS               = r'[\x30-\x39]+'          # '0'..'9'
-  t_E                    = r'[\x45\x65]'            # 'e' or 'E'
-  t_MINUS                = r'\x2D'                  # '-'
-  t_PLUS                 = r'\x2B'                  # '+'
-  t_ZERO                 = r'\x30'                  # '0'
+  t_NUMBER               = NUMBER_PATTERN
+
+  # Matches a whole well-formed string and decodes it in one pass.  This
+  # rule must come before t_QUOTATION_MARK, which handles the remaining
+  # (malformed) strings one fragment at a time for error reporting.
+  @ply.lex.TOKEN(STRING_PATTERN)
+  def t_STRING(self, t):
+    t.value = _string_value(t.value[1:-1], self.decode_strings)
+    return t
 
   # Enters the string state on an opening quotation mark 
   def t_QUOTATION_MARK(self, t):
     r'\x22'   # '"'
+    if self.partial and t.lexer.lexdata.find('"', t.lexpos + 1) < 0:
+      # The closing quotation mark may be in the next chunk
+      raise _IncompleteToken()
     t.lexer.push_state('string') 
     return t
 
@@ -143,9 +298,11 @@ class JsonLexer(object):
 
   # TODO(dewitt): Verify that this matches the correct range, the spec
   # says '%x5D-10FFFF' but most pythons by default will not handle that
+  #
+  # The fragments of a string are left undecoded, so that the whole string
+  # is decoded once its closing quotation mark has been reached.
   def t_string_UNESCAPED(self, t):
     r'[\x20-\x21,\x23-\x5B,\x5D-\xFF]+'
-    t.value = unicode(t.value, encoding='utf8')
     return t
 
   # Exits the string state on an unescaped closing quotation mark
@@ -181,31 +338,31 @@ class JsonLexer(object):
   def t_escaped_BACKSPACE_CHAR(self, t):
     r'\x62'  # 'b'
     t.lexer.pop_state()
-    t.value = unichr(0x0008)
+    t.value = '\x08'
     return t
 
   def t_escaped_FORM_FEED_CHAR(self, t):
     r'\x66'  # 'f'
     t.lexer.pop_state()
-    t.value = unichr(0x000c)
+    t.value = '\x0c'
     return t
 
   def t_escaped_CARRIAGE_RETURN_CHAR(self, t):
     r'\x72'  # 'r'
     t.lexer.pop_state()
-    t.value = unichr(0x000d)
+    t.value = '\x0d'
     return t
 
   def t_escaped_LINE_FEED_CHAR(self, t):
     r'\x6E'  # 'n'
     t.lexer.pop_state()
-    t.value = unichr(0x000a)
+    t.value = '\x0a'
     return t
 
   def t_escaped_TAB_CHAR(self, t):
     r'\x74'  # 't'
     t.lexer.pop_state()
-    t.value = unichr(0x0009)
+    t.value = '\x09'
     return t
 
   def t_escaped_UNICODE_HEX(self, t):
@@ -233,6 +390,316 @@ class JsonLexer(object):
       tokens.append(token)
     return tokens
 
+  def clone(self):
+    '''Return a JsonLexer with the same rules but its own lexer state.'''
+    other = copy.copy(self)
+    other.lexer = self.lexer.clone(other)
+    other.reset()
+    return other
+
+  def reset(self):
+    '''Discard any buffered input and return to the initial lexer state.'''
+    self.lexer.begin('INITIAL')
+    del self.lexer.lexstatestack[:]
+    self.lexer.lineno = 1
+    self.errors = list()
+    self.buffer = ''
+    self.offset = 0
+    self.partial = False
+
+  def feed(self, data):
+    '''Tokenize the next chunk of an input string.
+
+    Tokens that may continue into the next chunk are held back, along with
+    the lexer state in effect before them, and are tokenized again once
+    more data (or the end of input) arrives.
+
+    Args:
+      data: The next chunk of input.
+    Returns:
+      A list of the LexTokens that were completed by this chunk.
+    '''
+    return self._lex_buffer(self.buffer + data, True)
+
+  def close(self):
+    '''Signal the end of the input started with feed().
+
+    Returns:
+      A list of the remaining LexTokens.
+    '''
+    tokens = self._lex_buffer(self.buffer, False)
+    self.reset()
+    return tokens
+
+  def _lex_buffer(self, data, partial):
+    lexer = self.lexer
+    lexer.input(data)
+    self.partial = partial
+    tokens = list()
+    try:
+      while True:
+        start = lexer.lexpos
+        state = lexer.lexstate
+        stack = list(lexer.lexstatestack)
+        try:
+          token = lexer.token()
+        except _IncompleteToken:
+          token = None
+          lexer.lexpos = lexer.lexlen
+        if partial and lexer.lexpos + MAX_INCOMPLETE > lexer.lexlen:
+          # The token (if any) is close enough to the end of the chunk
+          # that more input could extend it (e.g. '1' + '.5' or 'fal' +
+          # 'se'), so wait for more input before deciding where it ends.
+          lexer.begin(state)
+          lexer.lexstatestack[:] = stack
+          self.buffer = data[start:]
+          self.offset += start
+          break
+        if not token:
+          self.buffer = ''
+          break
+        token.lexpos += self.offset
+        tokens.append(token)
+    finally:
+      self.partial = False
+    return tokens
+
+
+class KeyCache(object):
+  '''A bounded table of object member names, shared between parses.
+
+  Records that repeat the same member names then share one string for
+  each name, rather than each holding its own copy.  When the table is
+  full it is emptied, so the names in current use are soon cached again.
+  '''
+
+  def __init__(self, size=1024):
+    '''Constructs an empty KeyCache.
+
+    Args:
+      size: The most names held at once.
+    '''
+    self.size = size
+    self.keys = dict()
+
+  def intern(self, key):
+    '''Return the cached string equal to key, caching key if there is none.'''
+    keys = self.keys
+    cached = keys.get(key)
+    # A str and a unicode can be equal, but must not be swapped
+    if cached is not None and type(cached) is type(key):
+      return cached
+    if len(keys) >= self.size:
+      keys.clear()
+    keys[key] = key
+    return key
+
+
+# Skips the whitespace that the JsonLexer ignores
+_WHITESPACE_RE = re.compile(r'[\x20\x09\x0A\x0D]*')
+
+_STRING_RE = re.compile(STRING_PATTERN)
+_NUMBER_RE = re.compile(NUMBER_PATTERN)
+
+# Matches a run of up to 4096 comma separated numbers.  The runs are kept
+# short because the regex engine holds state for every repetition.
+_NUMBER_RUN_RE = re.compile(
+    r'%s(?:[\x20\x09\x0A\x0D]*\x2C[\x20\x09\x0A\x0D]*%s){0,4095}' %
+    (NUMBER_PATTERN, NUMBER_PATTERN))
+
+# Finds a number after the first with a leading zero in a _NUMBER_RUN_RE match
+_LEADING_ZERO_RUN_RE = re.compile(r'[\x20\x09\x0A\x0D\x2C]\x2D?\x30[\x30-\x39]')
+
+# Finds a number with a fraction or exponent in a _NUMBER_RUN_RE match
+_FLOAT_CHAR_RE = re.compile(r'[\x2E\x45\x65]')
+
+# Finds an int -0, which float() would make -0.0 rather than 0.0
+_NEGATIVE_ZERO_RE = re.compile(r'\x2D\x30(?![\x2E\x45\x65])')
+
+# Finds a run of digits long enough to be a long rather than an int
+_LONG_DIGITS_RE = re.compile(r'[\x30-\x39]{%d}' % len(str(sys.maxint)))
+
+
+class _Fallback(Exception):
+  '''Raised when the fast engine cannot parse its input.'''
+
+
+def _make_fast_parser(parse_float=float, parse_int=int, decode_strings=True,
+                      key_cache=None, numeric_arrays=False):
+  '''Return a function that parses a strict JSON text without ply.
+
+  The returned function scans the input directly with regular expressions
+  and builds the values by recursive descent.  It only accepts JSON texts
+  for which the JsonParser grammar produces the same value, and raises
+  _Fallback for anything else (including leading zeroes), so that the
+  caller can parse the text again with the LALR engine to get its errors
+  or its value under the more lenient grammar.  Member names are passed
+  through key_cache, if one is given, and arrays through _numeric_array
+  if numeric_arrays is True.
+  '''
+  skip = _WHITESPACE_RE.match
+  match_string = _STRING_RE.match
+  match_number = _NUMBER_RE.match
+  leading_zero = _LEADING_ZERO_RE.match
+  leading_zero_run = _LEADING_ZERO_RUN_RE.search
+  float_char = _FLOAT_CHAR_RE.search
+  long_digits = _LONG_DIGITS_RE.search
+  negative_zero = _NEGATIVE_ZERO_RE.search
+  whitespace = '\x20\x09\x0A\x0D'
+  intern = None
+  if key_cache is not None:
+    intern = key_cache.intern
+  # Arrays of numbers can be converted in one step when the numbers are
+  # plain ints and floats
+  number_run = None
+  if numeric_arrays and parse_float is float and parse_int is int:
+    number_run = _NUMBER_RUN_RE.match
+
+  def scan_numbers(s, pos):
+    result = array.array('l')
+    convert = int
+    if leading_zero(s, pos):
+      return None
+    while True:
+      m = number_run(s, pos)
+      if m is None:
+        return None
+      end = m.end()
+      if leading_zero_run(s, pos, end):
+        return None
+      if convert is int and float_char(s, pos, end):
+        result = array.array('d', result)
+        convert = float
+      if convert is float and negative_zero(s, pos, end):
+        # As in _numeric_array, the int -0 becomes 0.0
+        return None
+      if convert is float and long_digits(s, pos, end):
+        # As in _numeric_array, a long among the ints keeps the list a list
+        for text in s[pos:end].split(','):
+          if not float_char(text) and type(int(text)) is not int:
+            return None
+      try:
+        result.fromlist(map(convert, s[pos:end].split(',')))
+      except OverflowError:
+        # Some of the ints are longs
+        return None
+      pos = skip(s, end).end()
+      c = s[pos]
+      if c == ']':
+        return result, pos + 1
+      if c != ',':
+        return None
+      pos = skip(s, pos + 1).end()
+      if s[pos] not in '-0123456789':
+        return None
+
+  def scan_string(s, pos):
+    m = match_string(s, pos)
+    if m is None:
+      raise _Fallback()
+    return _string_value(m.group()[1:-1], decode_strings), m.end()
+
+  def scan_value(s, pos):
+    c = s[pos]
+    if c == '"':
+      return scan_string(s, pos)
+    if c == '{':
+      return scan_object(s, pos + 1)
+    if c == '[':
+      return scan_array(s, pos + 1)
+    if c == 't' and s[pos:pos + 4] == 'true':
+      return True, pos + 4
+    if c == 'f' and s[pos:pos + 5] == 'false':
+      return False, pos + 5
+    if c == 'n' and s[pos:pos + 4] == 'null':
+      return None, pos + 4
+    m = match_number(s, pos)
+    if m is None:
+      raise _Fallback()
+    text = m.group()
+    if leading_zero(text):
+      raise _Fallback()
+    if '.' in text or 'e' in text or 'E' in text:
+      return parse_float(text), m.end()
+    return parse_int(text), m.end()
+
+  def scan_object(s, pos):
+    result = dict()
+    if s[pos] in whitespace:
+      pos = skip(s, pos).end()
+    if s[pos] == '}':
+      return result, pos + 1
+    while True:
+      if s[pos] != '"':
+        raise _Fallback()
+      key, pos = scan_string(s, pos)
+      if intern is not None:
+        key = intern(key)
+      if s[pos] in whitespace:
+        pos = skip(s, pos).end()
+      if s[pos] != ':':
+        raise _Fallback()
+      pos += 1
+      if s[pos] in whitespace:
+        pos = skip(s, pos).end()
+      result[key], pos = scan_value(s, pos)
+      if s[pos] in whitespace:
+        pos = skip(s, pos).end()
+      c = s[pos]
+      if c == '}':
+        return result, pos + 1
+      if c != ',':
+        raise _Fallback()
+      pos += 1
+      if s[pos] in whitespace:
+        pos = skip(s, pos).end()
+
+  def scan_array(s, pos):
+    result = list()
+    append = result.append
+    if s[pos] in whitespace:
+      pos = skip(s, pos).end()
+    if s[pos] == ']':
+      return result, pos + 1
+    if number_run is not None and s[pos] in '-0123456789':
+      scanned = scan_numbers(s, pos)
+      if scanned is not None:
+        return scanned
+    while True:
+      value, pos = scan_value(s, pos)
+      append(value)
+      if s[pos] in whitespace:
+        pos = skip(s, pos).end()
+      c = s[pos]
+      if c == ']':
+        if numeric_arrays:
+          return _numeric_array(result), pos + 1
+        return result, pos + 1
+      if c != ',':
+        raise _Fallback()
+      pos += 1
+      if s[pos] in whitespace:
+        pos = skip(s, pos).end()
+
+  def parse(s):
+    try:
+      pos = skip(s, 0).end()
+      c = s[pos]
+      if c == '{':
+        value, pos = scan_object(s, pos + 1)
+      elif c == '[':
+        value, pos = scan_array(s, pos + 1)
+      else:
+        raise _Fallback()
+    except IndexError:
+      # The text ended early
+      raise _Fallback()
+    if skip(s, pos).end() != len(s):
+      raise _Fallback()
+    return value
+
+  return parse
+
 
 class JsonParser(object):
   '''A class-based wrapper around the ply.yacc instance.
@@ -242,29 +709,96 @@ class JsonParser(object):
   python data structure that represents the input data.
   '''
 
-  def __init__(self, lexer=None, **kwargs):
+  def __init__(self, lexer=None, parse_float=float, parse_int=int,
+               engine='lalr', decode_strings=None, key_cache=None,
+               numeric_arrays=False, **kwargs):
     '''Constructs the JsonParser based on the grammar contained herein.
 
     Successful construction builds the ply.yacc instance and sets
-    self.parser.
+    self.parser.  By default the parse tables are loaded from the prebuilt
+    jsonply_parsetab module, and nothing is written to disk.
 
     Args:
       lexer: A ply.lex or JsonLexer instance that will produce JSON_TOKENS.
+      parse_float: Called with the text of every number that has a fraction
+        or exponent.  Pass decimal.Decimal for exact values, or str to keep
+        the raw text.
+      parse_int: Called with the text of every other number.
+      engine: 'lalr' to parse with ply only, or 'fast' to parse strict JSON
+        texts with a hand-written scanner first.  The fast engine hands any
+        text it does not accept, including every erroneous one, to the
+        LALR parser, so both engines produce the same values and errors.
+      decode_strings: If False, strings in byte string input are returned
+        as UTF-8 encoded str values instead of being decoded to unicode.
+        If given, this is also applied to the JsonLexer; otherwise it is
+        taken from a JsonLexer that is passed in, and defaults to True.
+      key_cache: A KeyCache, or the size of a new one, through which object
+        member names are passed so that repeated names share one string.
+        Clones of the parser share its KeyCache.
+      numeric_arrays: If True, non-empty arrays whose elements are all ints
+        are returned as array.array('l'), and those whose elements are all
+        ints and floats as array.array('d'), instead of lists.
+      kwargs: Passed to ply.yacc.yacc, overriding the defaults.  With
+        dense=1 the parser uses array-backed tables and its lexer is
+        switched to integer token types (a lexer that is passed in is
+        cloned first, and left unchanged); feed() is then unavailable.
     '''
+    if engine not in ('lalr', 'fast'):
+      raise ValueError('Unknown engine %r' % engine)
+    self.parse_float = parse_float
+    self.parse_int = parse_int
+    if decode_strings is None:
+      decode_strings = getattr(lexer, 'decode_strings', True)
+    elif isinstance(lexer, JsonLexer):
+      lexer.decode_strings = decode_strings
+    self.decode_strings = decode_strings
+    if key_cache and not isinstance(key_cache, KeyCache):
+      key_cache = KeyCache(key_cache)
+    self.key_cache = key_cache or None
+    self.numeric_arrays = numeric_arrays
+    self.fast_parse = None
+    if engine == 'fast':
+      self.fast_parse = _make_fast_parser(parse_float, parse_int,
+                                          decode_strings, self.key_cache,
+                                          numeric_arrays)
+    self.json_lexer = None
     if lexer is not None:
       if isinstance(lexer, JsonLexer):
+        self.json_lexer = lexer
         self.lexer = lexer.lexer
       else:
         # Assume that the lexer is a ply.lex instance or similar
         self.lexer = lexer
     else:
-      self.lexer = JsonLexer().lexer
+      self.json_lexer = JsonLexer(decode_strings=decode_strings)
+      self.lexer = self.json_lexer.lexer
+    self.errors = list()
+    kwargs.setdefault('optimize', 1)
+    kwargs.setdefault('tabmodule', jsonply_parsetab)
+    kwargs.setdefault('write_tables', 0)
+    kwargs.setdefault('debug', 0)
     self.parser = ply.yacc.yacc(module=self, **kwargs)
+    if self.parser.dense:
+      if lexer is not None:
+        # Leave the caller's lexer producing token names
+        if self.json_lexer is not None:
+          self.json_lexer = self.json_lexer.clone()
+          self.lexer = self.json_lexer.lexer
+        else:
+          self.lexer = self.lexer.clone()
+      # The lexer must produce the integer token ids of the dense tables
+      self.lexer.settypes(self.parser.tokenids)
 
   # The JsonParser uses the JSON_TOKENS values as a contact between
   # the lexer and the parser.
   tokens = JSON_TOKENS
 
+  # True while a push-mode parse started by feed() is in progress.
+  feeding = False
+
+  # Whether syntax errors are printed as well as collected in self.errors
+  verbose = True
+
   # Define the parser
   def p_text(self, p):
     '''text : object
@@ -306,7 +840,10 @@ class JsonParser(object):
 
   def p_member(self, p):
     '''member : string NAME_SEPARATOR value'''
-    p[0] = (p[1], p[3])
+    if self.key_cache is not None:
+      p[0] = (self.key_cache.intern(p[1]), p[3])
+    else:
+      p[0] = (p[1], p[3])
 
 
   def p_values(self, p):
@@ -321,71 +858,38 @@ class JsonParser(object):
 
   def p_array(self, p):
     '''array :  BEGIN_ARRAY values END_ARRAY'''
-    p[0] = p[2]
-
-  def p_number_positive(self, p):
-    '''number : integer
-              | float'''
-    p[0] = p[1]
-
-  def p_number_negative(self, p):
-    '''number : MINUS integer
-              | MINUS float'''
-    p[0] = -p[2]
-
-  def p_integer(self, p):
-    '''integer : int'''
-    p[0] = p[1]
-
-  def p_integer_exp(self, p):
-    '''integer : int exp'''
-    p[0] = p[1] * (10**p[2])
-
-  def p_number_float(self, p):
-    '''float : int frac'''
-    p[0] = p[1] + p[2]
-
-  def p_number_float_exp(self, p):
-    '''float : int frac exp'''
-    p[0] = (p[1] + p[2]) * (10**p[3])
-
-  def p_exp_negative(self, p):
-    '''exp : E MINUS DIGITS'''
-    p[0] = -int(p[3])
-
-  def p_exp(self, p):
-    '''exp : E DIGITS'''
-    p[0] = int(p[2])
-
-  def p_exp_positive(self, p):
-    '''exp : E PLUS DIGITS'''
-    p[0] = int(p[3])
-
-  def p_frac(self, p):
-    '''frac : DECIMAL_POINT DIGITS'''
-    p[0] = float('.' + p[2])
-
-  def p_int_zero(self, p):
-    '''int : ZERO'''
-    p[0] = int(0)
+    if self.numeric_arrays:
+      p[0] = _numeric_array(p[2])
+    else:
+      p[0] = p[2]
 
-  def p_int_non_zero(self, p):
-    '''int : DIGITS'''
-    if p[1].startswith('0'):
-      raise SyntaxError('Leading zeroes are not allowed.')
-    p[0] = int(p[1])
+  def p_number(self, p):
+    '''number : NUMBER'''
+    try:
+      p[0] = _to_number(p[1], self.parse_float, self.parse_int)
+    except SyntaxError, e:
+      self.errors.append(str(e))
+      raise
 
   def p_string(self, p):
     '''string : QUOTATION_MARK chars QUOTATION_MARK'''
-    p[0] = p[2]
+    value = ''.join(p[2])
+    if self.decode_strings and isinstance(value, str):
+      value = unicode(value, encoding='utf8')
+    p[0] = value
+
+  def p_string_token(self, p):
+    '''string : STRING'''
+    p[0] = p[1]
 
   def p_chars(self, p):
     '''chars :
              | chars char'''
     if len(p) == 1:
-      p[0] = unicode()
+      p[0] = list()
     else:
-      p[0] = p[1] + p[2]
+      p[1].append(p[2])
+      p[0] = p[1]
 
   def p_char(self, p):
     '''char : UNESCAPED
@@ -406,11 +910,35 @@ class JsonParser(object):
     # This looks more complicated than it is.  The escaped string is of
     # the form \uXXXX and is assigned to p[2].  We take the trailing
     # XXXX string via p[2][1:], parse it as a radix 16 (hex) integer,
-    # and convert that to the corresponding unicode character.
-    p[0] = unichr(int(p[2][1:], 16))
+    # and convert that to the corresponding unicode character, which is
+    # UTF-8 encoded if the rest of the string is still undecoded bytes.
+    char = unichr(int(p[2][1:], 16))
+    if isinstance(p[2], str):
+      char = char.encode('utf8')
+    p[0] = char
 
   def p_error(self, p): 
-    print "Syntax error at '%s'" % p
+    message = "Syntax error at '%s'" % p
+    self.errors.append(message)
+    if self.verbose:
+      print message
+
+  def clone(self):
+    '''Return a JsonParser that shares this parser's tables but not its state.
+
+    The clone has its own lexer and parse stacks, so the two parsers can be
+    used concurrently from different threads without rebuilding the tables.
+    '''
+    other = copy.copy(self)
+    other.errors = list()
+    other.feeding = False
+    if self.json_lexer is not None:
+      other.json_lexer = self.json_lexer.clone()
+      other.lexer = other.json_lexer.lexer
+    else:
+      other.lexer = self.lexer.clone()
+    other.parser = self.parser.clone(other)
+    return other
 
   # Invoke the parser
   def parse(self, data, lexer=None, *args, **kwargs):
@@ -420,45 +948,1654 @@ class JsonParser(object):
       data: An input data string
       lexer:  An optional ply.lex instance that overrides the default lexer.
     Returns:
-      A python dict or list representing the input JSON data.
+      A python dict or list representing the input JSON data.  Syntax
+      errors are collected in self.errors.
     '''
+    del self.errors[:]
     if lexer is None:
+      if self.fast_parse is not None:
+        try:
+          return self.fast_parse(data)
+        except (_Fallback, ValueError, RuntimeError):
+          # Invalid, lenient or too deeply nested for the fast engine
+          pass
+      if self.json_lexer is not None:
+        # An error inside a string leaves the lexer in the string state
+        self.json_lexer.reset()
       lexer = self.lexer
+    if (not args and 'tokenfunc' not in kwargs and
+        isinstance(lexer, ply.lex.Lexer)):
+      # Lex the tokens in batches rather than one call at a time
+      kwargs['tokenfunc'] = lexer.tokenfunc()
     return self.parser.parse(data, lexer=lexer, *args, **kwargs)
 
-# Maintain a reusable parser instance
-parser = None
+  def feed(self, data):
+    '''Parse the next chunk of a JSON document in push mode.
+
+    Chunks are tokenized and shifted through the parser as they arrive, so
+    only the partially built result and any token spanning the chunk
+    boundary are held in memory.  Call close() once all chunks have been
+    fed to obtain the result.
+
+    Args:
+      data: The next chunk of the input data string.
+    '''
+    if self.json_lexer is None:
+      raise ValueError('feed() requires a JsonLexer')
+    if not self.feeding:
+      self.json_lexer.reset()
+      del self.errors[:]
+      self.parser.push_begin(self.lexer)
+      self.feeding = True
+    try:
+      for token in self.json_lexer.feed(data):
+        self.parser.push(token)
+    except:
+      # For example, a string that is not valid UTF-8
+      self.reset()
+      raise
+
+  def close(self):
+    '''Finish a parse started with feed().
+
+    Returns:
+      A python dict or list representing the input JSON data.
+    '''
+    if not self.feeding:
+      self.feed('')
+    self.feeding = False
+    try:
+      for token in self.json_lexer.close():
+        self.parser.push(token)
+    except:
+      self.reset()
+      raise
+    return self.parser.push_end()
+
+  def reset(self):
+    '''Abandon any parse started with feed() and discard its input.'''
+    self.feeding = False
+    if self.json_lexer is not None:
+      self.json_lexer.reset()
+    self.parser.pushslice = None
+
+class ParserPool(object):
+  '''A thread-safe source of JsonParsers that share one set of parse tables.
+
+  The parse tables are built once, by the first JsonParser the pool
+  constructs.  Every other parser is a clone() of that one, with its own
+  lexer and parse state.  Each thread keeps its own list of idle parsers,
+  so acquiring and releasing a parser takes no lock.  A parser is only
+  reused once it has been released, so nested parses on one thread (for
+  example from a parse_float callback) get separate parsers.
+  '''
+
+  def __init__(self, **kwargs):
+    '''Constructs an empty pool.
+
+    Args:
+      kwargs: Passed to the JsonParser constructor.
+    '''
+    self.kwargs = kwargs
+    self.prototype = None
+    self.lock = threading.Lock()
+    self.local = threading.local()
+
+  def acquire(self):
+    '''Return an idle JsonParser for the calling thread.'''
+    idle = getattr(self.local, 'idle', None)
+    if idle:
+      return idle.pop()
+    if idle is None:
+      self.local.idle = list()
+    if self.prototype is None:
+      self.lock.acquire()
+      try:
+        if self.prototype is None:
+          self.prototype = JsonParser(**self.kwargs)
+      finally:
+        self.lock.release()
+    return self.prototype.clone()
+
+  def release(self, parser):
+    '''Return a parser obtained from acquire() to the calling thread.'''
+    self.local.idle.append(parser)
+
+  def parse(self, s):
+    '''Parse a string with a parser from the pool.'''
+    parser = self.acquire()
+    try:
+      return parser.parse(s)
+    finally:
+      self.release(parser)
+
+  def parse_file(self, f, chunksize=CHUNK_SIZE):
+    '''Parse a file-like object or the file at a path.'''
+    if isinstance(f, basestring):
+      return self.parse_path(f)
+    parser = self.acquire()
+    try:
+      while True:
+        chunk = f.read(chunksize)
+        if not chunk:
+          break
+        parser.feed(chunk)
+      return parser.close()
+    finally:
+      if parser.feeding:
+        # Reading the file failed part way through
+        parser.reset()
+      self.release(parser)
+
+  def parse_path(self, path):
+    '''Parse the file at path directly from a read-only memory map of it.'''
+    f = open(path, 'rb')
+    try:
+      size = os.fstat(f.fileno()).st_size
+      if not size:
+        # Empty files cannot be mapped
+        return self.parse('')
+      data = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+      try:
+        return self.parse(data)
+      finally:
+        data.close()
+    finally:
+      f.close()
+
+
+# The parsers used by the module-level functions
+pool = ParserPool()
 
 def parse(s):
   '''Parse a string-like object and return the corresponding python structure.
+
+  This function is thread-safe.
   
   Args:
     s: a string-like object
   Returns:
     A python dict or array
   '''
-  global parser
-  if parser is None:
-    parser = JsonParser()
-  return parser.parse(s)
+  return pool.parse(s)
 
 
-def parse_file(f):
-  '''Parse a file-like object and return the corresponding python structure.
+def parse_file(f, chunksize=CHUNK_SIZE):
+  '''Parse a file and return the corresponding python structure.
+
+  A file-like object is read and parsed incrementally, chunksize bytes at
+  a time.  A file named by a path is memory-mapped and lexed in place, so
+  its contents are never copied into a string.  This function is
+  thread-safe.
 
   Args:
-    f: a file-like object
+    f: a file-like object, or the path of a file
+    chunksize: the number of bytes to read per chunk from a file-like object
   Returns:
     A Python dict or array
   '''
-  return parse(f.read())
+  return pool.parse_file(f, chunksize)
+
+
+class ParseCache(object):
+  '''A thread-safe LRU cache of parse results, keyed by the input text.
+
+  Repeated parses of the same text become a dict lookup.  The text itself
+  is the key: its hash is computed once per string object and cached by
+  python, and a hit is confirmed by comparing the strings, so colliding
+  hashes can never return the wrong result.  Entries are evicted least
+  recently used first, once there are more than max_entries of them or
+  their texts hold more than max_bytes in total, unicode texts counting
+  as the length of their UTF-8 encoding.  Texts that fail to parse are
+  not cached.
+
+  By default every hit returns a fresh copy of the cached dicts, lists and
+  arrays, so callers can not corrupt the cached value.
+  '''
+
+  def __init__(self, max_entries=1024, max_bytes=None, copy=True,
+               parser_pool=None):
+    '''Constructs an empty ParseCache.
+
+    Args:
+      max_entries: The most results held at once.
+      max_bytes: The most bytes of input text held at once, or None for
+        no limit.  Unicode texts are measured in UTF-8.
+      copy: If False, hits return the cached value itself, which callers
+        must then treat as read-only.
+      parser_pool: The ParserPool that parses misses, by default the pool
+        used by jsonply.parse.
+    '''
+    self.max_entries = max_entries
+    self.max_bytes = max_bytes
+    self.copy = copy
+    self.parser_pool = parser_pool or pool
+    self.lock = threading.Lock()
+    self.entries = collections.OrderedDict()
+    self.bytes = 0      # Number of bytes of text held
+    self.hits = 0       # Number of parses answered from the cache
+    self.misses = 0     # Number of parses that were not
+    self.evictions = 0  # Number of results evicted
+
+  def parse(self, s):
+    '''Parse a string, returning the cached result for a text seen before.'''
+    if not isinstance(s, basestring):
+      # mmaps and other buffers can change, so they are never cached
+      return self.parser_pool.parse(s)
+    self.lock.acquire()
+    try:
+      entry = self.entries.pop(s, None)
+      if entry is not None:
+        # Move the entry to the most recently used end
+        self.entries[s] = entry
+        self.hits += 1
+      else:
+        self.misses += 1
+    finally:
+      self.lock.release()
+    if entry is None:
+      value = self.parser_pool.parse(s)
+      if value is None:
+        return value
+      self._add(s, value)
+    else:
+      value = entry[0]
+    if self.copy:
+      return _copy_value(value)
+    return value
+
+  def _add(self, s, value):
+    '''Cache a result, evicting the least recently used ones to make room.'''
+    if isinstance(s, unicode):
+      size = len(s.encode('utf-8'))
+    else:
+      size = len(s)
+    if self.max_bytes is not None and size > self.max_bytes:
+      return
+    self.lock.acquire()
+    try:
+      if s in self.entries:
+        return
+      self.entries[s] = (value, size)
+      self.bytes += size
+      entries = self.entries
+      while (len(entries) > self.max_entries or
+             self.max_bytes is not None and self.bytes > self.max_bytes):
+        unused, (unused, size) = entries.popitem(last=False)
+        self.bytes -= size
+        self.evictions += 1
+    finally:
+      self.lock.release()
+
+  def clear(self):
+    '''Discard every cached result.'''
+    self.lock.acquire()
+    try:
+      self.entries.clear()
+      self.bytes = 0
+    finally:
+      self.lock.release()
+
+  def hit_rate(self):
+    '''Returns the fraction of parses answered from the cache.'''
+    if not self.hits + self.misses:
+      return 0.0
+    return float(self.hits) / (self.hits + self.misses)
+
+
+def _copy_value(value):
+  '''Return a copy of the containers of a parse result.'''
+  kind = type(value)
+  if kind is dict:
+    return dict([(key, _copy_value(item)) for key, item in value.iteritems()])
+  if kind is list:
+    return [_copy_value(item) for item in value]
+  if kind is array.array:
+    return array.array(value.typecode, value)
+  # Strings, numbers and the literals are immutable
+  return value
+
+
+def parse_lines(f, chunksize=CHUNK_SIZE, stats=None):
+  '''Parse a file-like object holding one JSON text per line (JSON Lines).
+
+  A single lexer/parser pair is reused for every record, and each chunk of
+  whole lines is handed to the lexer once.  Records are delimited by
+  newlines: after a malformed record the lexer is reset and parsing resumes
+  at the start of the next line.  Blank lines are skipped.
+
+  Args:
+    f: a file-like object
+    chunksize: the number of bytes to read per chunk
+    stats: an optional ParseStats instance that is updated as records
+      are parsed
+  Returns:
+    A generator of (lineno, value, error) tuples.  For a malformed record,
+    value is None and error is a message describing the first problem;
+    otherwise error is None.
+  '''
+  if stats is None:
+    stats = ParseStats()
+  json_lexer = JsonLexer()
+  json_lexer.verbose = False
+  json_parser = JsonParser(lexer=json_lexer)
+  json_parser.verbose = False
+  lexer = json_parser.lexer
+  parser = json_parser.parser
+  started = time.time()
+  lineno = 0
+  tail = ''
+  while True:
+    chunk = f.read(chunksize)
+    if chunk:
+      block = tail + chunk
+      end = block.rfind('\n') + 1
+      if not end:
+        tail = block
+        continue
+      tail = block[end:]
+      block = block[:end]
+    elif tail:
+      block, tail = tail, ''
+    else:
+      break
+    stats.bytes += len(block)
+    lexer.input(block)
+    pos = 0
+    size = len(block)
+    while pos < size:
+      eol = block.find('\n', pos)
+      if eol < 0:
+        eol = size
+      lineno += 1
+      if not _BLANK_RE.match(block, pos, eol):
+        # Confine the lexer to this line and start from a clean state
+        json_lexer.reset()
+        lexer.lexpos = pos
+        lexer.lexlen = eol
+        del json_parser.errors[:]
+        try:
+          value = parser.parse(lexer=lexer)
+          errors = json_lexer.errors + json_parser.errors
+        except Exception, e:
+          # For example, a string that is not valid UTF-8
+          value = None
+          errors = [str(e)]
+        if value is None and not errors:
+          errors.append('Syntax error')
+        stats.records += 1
+        if errors:
+          stats.errors += 1
+          yield (lineno, None, errors[0])
+        else:
+          yield (lineno, value, None)
+        stats.seconds = time.time() - started
+      pos = eol + 1
+  stats.seconds = time.time() - started
+
+_BLANK_RE = re.compile(r'[\x20\x09\x0D]*$')
+
+
+class ParseStats(object):
+  '''Throughput counters for parse_lines.'''
+
+  def __init__(self):
+    self.records = 0    # Number of non-blank lines parsed
+    self.errors = 0     # Number of those that were malformed
+    self.bytes = 0      # Number of bytes read
+    self.seconds = 0.0  # Elapsed wall clock time
+
+  def records_per_second(self):
+    if not self.seconds:
+      return 0.0
+    return self.records / self.seconds
+
+  def bytes_per_second(self):
+    if not self.seconds:
+      return 0.0
+    return self.bytes / self.seconds
+
+
+def parse_many(iterable, workers=None, chunksize=64, **kwargs):
+  '''Parse many independent JSON texts on a pool of worker processes.
+
+  Each worker process builds one JsonParser when it starts and reuses it
+  for every text it is sent.  Texts are sent to the workers chunksize at
+  a time, so a larger chunksize amortizes the cost of passing each text
+  and result between processes.
+
+  Args:
+    iterable: an iterable of string-like objects
+    workers: the number of worker processes, defaults to the number of CPUs
+    chunksize: the number of texts sent to a worker at a time
+    kwargs: passed to the JsonParser constructor in each worker; the values
+      must be picklable
+  Returns:
+    A generator of (value, error) tuples in the same order as the input.
+    For a malformed text, value is None and error is a message describing
+    the first problem; otherwise error is None.
+  '''
+  pool = multiprocessing.Pool(workers, _init_worker, (kwargs,))
+  try:
+    for result in pool.imap(_parse_in_worker, iterable, chunksize):
+      yield result
+    pool.close()
+  finally:
+    pool.terminate()
+    pool.join()
+
+
+# The JsonParser of a parse_many worker process
+_worker_parser = None
+
+def _init_worker(kwargs):
+  '''Build the JsonParser used by a parse_many worker process.'''
+  global _worker_parser
+  json_lexer = JsonLexer()
+  json_lexer.verbose = False
+  _worker_parser = JsonParser(lexer=json_lexer, **kwargs)
+  _worker_parser.verbose = False
+
+
+def _parse_in_worker(s):
+  '''Parse one text in a parse_many worker and return (value, error).'''
+  json_lexer = _worker_parser.json_lexer
+  json_lexer.reset()
+  try:
+    value = _worker_parser.parse(s)
+  except Exception, e:
+    # For example, a string that is not valid UTF-8
+    return (None, str(e))
+  errors = json_lexer.errors + _worker_parser.errors
+  if value is None and not errors:
+    errors.append('Syntax error')
+  if errors:
+    return (None, errors[0])
+  return (value, None)
+
+
+def parse_lazy(s):
+  '''Parse a string-like object into proxies that parse subtrees on demand.
+
+  Only the outermost object or array is scanned up front, to find where
+  each of its members starts and ends.  Nested objects and arrays are
+  LazyObject and LazyArray proxies that are scanned the first time they
+  are used, and scalars are decoded the first time they are read; every
+  value is cached once it has been built.  A consumer that reads a few
+  fields of a large document does work in proportion to those fields.
+
+  Containers that are not strict JSON are parsed with the JsonParser
+  grammar instead, so lenient input gives the same values as parse().
+
+  Args:
+    s: a string-like object
+  Returns:
+    A LazyObject or LazyArray
+  Raises:
+    SyntaxError: if the text, or a value when it is read, is malformed.
+  '''
+  start = _WHITESPACE_RE.match(s).end()
+  try:
+    end = _skip_value(s, start)
+    if s[start] not in '{[' or _WHITESPACE_RE.match(s, end).end() != len(s):
+      raise _Fallback()
+  except (_Fallback, IndexError):
+    raise SyntaxError('Malformed JSON text')
+  return _lazy_value(s, start, end)
+
+
+# Matches a string, or an opening or closing bracket
+_STRUCTURE_RE = re.compile(r'\x22[^\x22\x5C]*(?:\x5C.[^\x22\x5C]*)*\x22|[\x5B\x7B]|[\x5D\x7D]',
+                           re.DOTALL)
+
+# Matches a number or a literal name
+_SCALAR_RE = re.compile(r'[^\x20\x09\x0A\x0D\x22\x2C\x3A\x5B\x5D\x7B\x7D]+')
+
+_LITERALS = {'true': True, 'false': False, 'null': None}
+
+
+def _skip_value(s, pos):
+  '''Return the end of the value starting at pos, without decoding it.'''
+  c = s[pos]
+  if c == '{' or c == '[':
+    depth = 0
+    for m in _STRUCTURE_RE.finditer(s, pos):
+      c = s[m.start()]
+      if c == '{' or c == '[':
+        depth += 1
+      elif c != '"':
+        depth -= 1
+        if not depth:
+          return m.end()
+    raise _Fallback()
+  if c == '"':
+    m = _STRING_RE.match(s, pos)
+  else:
+    m = _SCALAR_RE.match(s, pos)
+  if m is None:
+    raise _Fallback()
+  return m.end()
+
+
+def _lazy_value(s, start, end):
+  '''Return the value of s[start:end], a proxy if it is a container.'''
+  c = s[start]
+  if c == '{':
+    return LazyObject(s, start, end)
+  if c == '[':
+    return LazyArray(s, start, end)
+  if c == '"':
+    return _string_value(s[start + 1:end - 1])
+  text = s[start:end]
+  if text in _LITERALS:
+    return _LITERALS[text]
+  m = _NUMBER_RE.match(text)
+  if m is not None and m.end() == len(text):
+    return _to_number(text)
+  raise SyntaxError('Malformed JSON value at offset %d' % start)
+
+
+class _LazyContainer(object):
+  '''The members of an object or array, scanned on first use.'''
+
+  def __init__(self, s, start, end):
+    self.s = s
+    self.start = start
+    self.end = end
+    # The (start, end) offsets of each member's value, or None until the
+    # container has been scanned
+    self.index = None
+    self.cache = dict()
+
+  def _load(self):
+    '''Scan the container, or parse it eagerly if it is not strict JSON.'''
+    try:
+      self.index = self._scan(self.s, self.start + 1)
+    except (_Fallback, IndexError):
+      value = pool.parse(self.s[self.start:self.end])
+      if value is None:
+        raise SyntaxError('Malformed JSON text at offset %d' % self.start)
+      self._load_value(value)
+    return self.index
+
+  def _scan_value(self, s, pos):
+    '''Return the offsets of the value at pos and the position after it.'''
+    pos = _WHITESPACE_RE.match(s, pos).end()
+    end = _skip_value(s, pos)
+    return (pos, end), _WHITESPACE_RE.match(s, end).end()
+
+  def _scan_end(self, s, pos, close):
+    '''Return True at the closing bracket, or False after a separator.'''
+    c = s[pos]
+    if c == close and pos + 1 == self.end:
+      return True
+    if c != ',':
+      raise _Fallback()
+    return False
+
+  def _members(self):
+    index = self.index
+    if index is None:
+      index = self._load()
+    return index
+
+  def _get(self, key, offsets):
+    try:
+      return self.cache[key]
+    except KeyError:
+      value = self.cache[key] = _lazy_value(self.s, *offsets)
+      return value
+
+  def __len__(self):
+    return len(self._members())
+
+
+class LazyObject(_LazyContainer, collections.Mapping):
+  '''A read-only dict whose member values are parsed on first access.'''
+
+  def _scan(self, s, pos):
+    index = dict()
+    pos = _WHITESPACE_RE.match(s, pos).end()
+    if s[pos] == '}' and pos + 1 == self.end:
+      return index
+    while True:
+      m = _STRING_RE.match(s, pos)
+      if m is None:
+        raise _Fallback()
+      key = _string_value(m.group()[1:-1])
+      pos = _WHITESPACE_RE.match(s, m.end()).end()
+      if s[pos] != ':':
+        raise _Fallback()
+      index[key], pos = self._scan_value(s, pos + 1)
+      if self._scan_end(s, pos, '}'):
+        return index
+      pos = _WHITESPACE_RE.match(s, pos + 1).end()
+
+  def _load_value(self, value):
+    self.index = dict.fromkeys(value)
+    self.cache = value
+
+  def __getitem__(self, key):
+    return self._get(key, self._members()[key])
+
+  def __iter__(self):
+    return iter(self._members())
+
+  def __contains__(self, key):
+    return key in self._members()
+
+  def __repr__(self):
+    return 'LazyObject(%r)' % dict(self.items())
+
+
+class LazyArray(_LazyContainer, collections.Sequence):
+  '''A read-only list whose elements are parsed on first access.'''
+
+  def _scan(self, s, pos):
+    index = list()
+    pos = _WHITESPACE_RE.match(s, pos).end()
+    if s[pos] == ']' and pos + 1 == self.end:
+      return index
+    while True:
+      offsets, pos = self._scan_value(s, pos)
+      index.append(offsets)
+      if self._scan_end(s, pos, ']'):
+        return index
+      pos += 1
+
+  def _load_value(self, value):
+    self.index = [None] * len(value)
+    self.cache = dict(enumerate(value))
+
+  def __getitem__(self, i):
+    index = self._members()
+    if isinstance(i, slice):
+      return [self[j] for j in range(*i.indices(len(index)))]
+    if i < 0:
+      i += len(index)
+      if i < 0:
+        raise IndexError('list index out of range')
+    return self._get(i, index[i])
+
+  def __eq__(self, other):
+    if not isinstance(other, collections.Sequence):
+      return NotImplemented
+    return list(self) == list(other)
+
+  def __ne__(self, other):
+    if not isinstance(other, collections.Sequence):
+      return NotImplemented
+    return list(self) != list(other)
+
+  __hash__ = None
+
+  def __repr__(self):
+    return 'LazyArray(%r)' % list(self)
+
+
+def parse_columns(s, fields=None):
+  '''Parse a JSON array of objects into one column per member name.
+
+  The records are scanned in place and each wanted member value is
+  appended straight to its column, so no dict is built per record, and
+  members that are not wanted are checked but not decoded.
+
+  Args:
+    s: a string-like object holding an array of objects
+    fields: the member names to collect.  A sequence of names gives a list
+      per name.  A dict mapping names to array typecodes (or to None for a
+      list) gives an array.array per name with a typecode, such as 'd' for
+      floats or 'l' for ints.  None collects every name into lists.
+  Returns:
+    A dict mapping each member name to its column.  A record without a
+    member has None in that member's list.
+  Raises:
+    SyntaxError: if the text is malformed.
+    ValueError: if the text is not an array of objects, or a record has
+      no value for an array.array column, or one that does not fit in it.
+  '''
+  builder = _ColumnBuilder(fields)
+  try:
+    _scan_columns(s, builder)
+  except (_Fallback, IndexError):
+    # Not strict JSON, so parse it with the lenient grammar instead
+    records = pool.parse(s)
+    if records is None:
+      raise SyntaxError('Malformed JSON text')
+    if not isinstance(records, list):
+      raise ValueError('The JSON text is not an array')
+    builder = _ColumnBuilder(fields)
+    for record in records:
+      if not isinstance(record, dict):
+        raise ValueError('Record %d is not an object' % builder.count)
+      for name, value in record.iteritems():
+        column = builder.column(name)
+        if column is not None:
+          builder.add(name, column, value)
+      builder.end_record()
+  return builder.columns
+
+
+class _ColumnBuilder(object):
+  '''The columns of parse_columns, filled one record at a time.'''
+
+  def __init__(self, fields):
+    self.columns = dict()
+    # The number of completed records
+    self.count = 0
+    self.discover = fields is None
+    if isinstance(fields, dict):
+      for name, typecode in fields.iteritems():
+        if typecode is None:
+          self.columns[name] = list()
+        else:
+          self.columns[name] = array.array(typecode)
+    elif fields is not None:
+      for name in fields:
+        self.columns[name] = list()
+
+  def column(self, name):
+    '''Return the column for a member name, or None if it is not wanted.'''
+    column = self.columns.get(name)
+    if column is None and self.discover:
+      column = self.columns[name] = [None] * self.count
+    return column
+
+  def add(self, name, column, value):
+    '''Append the value of the current record to a column.'''
+    try:
+      if len(column) > self.count:
+        # A repeated member name, of which the last value is kept
+        column[-1] = value
+      else:
+        column.append(value)
+    except (TypeError, OverflowError):
+      raise ValueError('Record %d has a value of %r for %r, which does not'
+                       ' fit in an array of typecode %r' %
+                       (self.count, value, name, column.typecode))
+
+  def end_record(self):
+    '''Fill in the members that the current record did not have.'''
+    count = self.count + 1
+    for name, column in self.columns.iteritems():
+      if len(column) < count:
+        if not isinstance(column, list):
+          raise ValueError('Record %d has no value for %r' % (self.count, name))
+        column.append(None)
+    self.count = count
+
+
+def _scan_columns(s, builder):
+  '''Scan a strict JSON array of objects into a _ColumnBuilder.
+
+  Raises _Fallback at the first thing that is not strict JSON.
+  '''
+  whitespace = _WHITESPACE_RE.match
+  match_string = _STRING_RE.match
+  match_number = _NUMBER_RE.match
+  columns = builder.columns
+  discover = builder.discover
+  # The member names, by their text in the input
+  names = dict()
+  pos = whitespace(s).end()
+  if s[pos] != '[':
+    raise _Fallback()
+  pos = whitespace(s, pos + 1).end()
+  if s[pos] != ']':
+    while True:
+      if s[pos] != '{':
+        raise _Fallback()
+      pos = whitespace(s, pos + 1).end()
+      if s[pos] != '}':
+        while True:
+          m = match_string(s, pos)
+          if m is None:
+            raise _Fallback()
+          text = m.group()
+          name = names.get(text)
+          if name is None:
+            name = names[text] = _string_value(text[1:-1])
+          pos = whitespace(s, m.end()).end()
+          if s[pos] != ':':
+            raise _Fallback()
+          pos = whitespace(s, pos + 1).end()
+          column = columns.get(name)
+          if column is None and discover:
+            column = builder.column(name)
+          if column is None:
+            end = _check_value(s, pos)
+          else:
+            # The common scalars are decoded here rather than by another call
+            c = s[pos]
+            if c == '"':
+              m = match_string(s, pos)
+              if m is None:
+                raise _Fallback()
+              value = _string_value(m.group()[1:-1])
+              end = m.end()
+            elif c == '{' or c == '[':
+              end = _skip_value(s, pos)
+              value = _column_value(s, pos, end)
+            else:
+              m = match_number(s, pos)
+              if m is not None:
+                value = _to_number(m.group())
+                end = m.end()
+              else:
+                end = _skip_value(s, pos)
+                value = _lazy_value(s, pos, end)
+            builder.add(name, column, value)
+          pos = whitespace(s, end).end()
+          c = s[pos]
+          if c == '}':
+            break
+          if c != ',':
+            raise _Fallback()
+          pos = whitespace(s, pos + 1).end()
+      builder.end_record()
+      pos = whitespace(s, pos + 1).end()
+      c = s[pos]
+      if c == ']':
+        break
+      if c != ',':
+        raise _Fallback()
+      pos = whitespace(s, pos + 1).end()
+  if whitespace(s, pos + 1).end() != len(s):
+    raise _Fallback()
+
+
+def _column_value(s, start, end):
+  '''Return the value of s[start:end], fully built.'''
+  if s[start] in '{[':
+    value = pool.parse(s[start:end])
+    if value is None:
+      raise SyntaxError('Malformed JSON text at offset %d' % start)
+    return value
+  return _lazy_value(s, start, end)
+
+
+def _check_value(s, pos):
+  '''Return the end of the strict JSON value starting at pos.
+
+  Like _skip_value, but nothing is decoded and every token is checked
+  against the grammar, raising _Fallback at the first one that is not
+  strict JSON.  Containers are tracked with a stack rather than by
+  recursion, so there is no limit on their depth.
+  '''
+  whitespace = _WHITESPACE_RE.match
+  match_string = _STRING_RE.match
+  # The closing bracket of each open container
+  stack = list()
+  while True:
+    c = s[pos]
+    if c == '{' or c == '[':
+      pos = whitespace(s, pos + 1).end()
+      if c == '{':
+        close = '}'
+      else:
+        close = ']'
+      if s[pos] == close:
+        pos += 1
+      else:
+        stack.append(close)
+        if close == '}':
+          pos = _check_member_name(s, pos)
+        continue
+    elif c == '"':
+      m = match_string(s, pos)
+      if m is None:
+        raise _Fallback()
+      pos = m.end()
+    elif s.startswith('true', pos):
+      pos += 4
+    elif s.startswith('false', pos):
+      pos += 5
+    elif s.startswith('null', pos):
+      pos += 4
+    else:
+      m = _NUMBER_RE.match(s, pos)
+      if m is None or _LEADING_ZERO_RE.match(s, pos):
+        raise _Fallback()
+      pos = m.end()
+    # A whole value has been read, so close the containers it ends
+    while stack:
+      pos = whitespace(s, pos).end()
+      c = s[pos]
+      if c == stack[-1]:
+        stack.pop()
+        pos += 1
+      elif c == ',':
+        pos = whitespace(s, pos + 1).end()
+        if stack[-1] == '}':
+          pos = _check_member_name(s, pos)
+        break
+      else:
+        raise _Fallback()
+    else:
+      return pos
+
+
+def _check_member_name(s, pos):
+  '''Return the start of the value after the member name at pos.'''
+  m = _STRING_RE.match(s, pos)
+  if m is None:
+    raise _Fallback()
+  pos = _WHITESPACE_RE.match(s, m.end()).end()
+  if s[pos] != ':':
+    raise _Fallback()
+  return _WHITESPACE_RE.match(s, pos + 1).end()
+
+
+def iterparse(source, chunksize=CHUNK_SIZE):
+  '''Parse JSON text into a stream of (event, value) pairs.
+
+  Events are generated straight from the JsonLexer token stream without
+  building any dicts or lists, so a consumer can skip over the events of
+  a subtree it is not interested in at no extra cost.  The events are:
+
+    start_map, end_map, start_array, end_array:  value is None
+    map_key:  value is the member name
+    string, number, boolean, null:  value is the scalar
+
+  The text must be one object or array, and is checked against the same
+  grammar as JsonParser.parse(), so the separator after a member or an
+  element may be left out: '[1 2]' and '{"a": 1,}' are accepted, while
+  '[1,,2]' is not.
+
+  Args:
+    source: a string-like object, or a file-like object that is read
+      chunksize bytes at a time
+    chunksize: the number of bytes to read per chunk from a file
+  Returns:
+    A generator of (event, value) tuples.
+  Raises:
+    SyntaxError: if the token stream is not well-formed JSON.
+  '''
+  return _iter_events(_iter_tokens(source, JsonLexer(), chunksize))
+
+
+def _iter_tokens(source, lexer, chunksize=CHUNK_SIZE):
+  '''Yield the LexTokens for a string or file-like object.'''
+  if hasattr(source, 'read'):
+    lexer.reset()
+    while True:
+      chunk = source.read(chunksize)
+      if not chunk:
+        break
+      for token in lexer.feed(chunk):
+        yield token
+    for token in lexer.close():
+      yield token
+  else:
+    lexer.reset()
+    lexer.lexer.input(source)
+    for token in lexer.lexer:
+      yield token
+
+
+def _iter_events(tokens, document=True):
+  '''Yield (event, value) pairs for a stream of JSON_TOKENS.
+
+  The tokens are checked against the JsonParser grammar, which allows the
+  separator after each member or element to be left out.  If document is
+  True the tokens must hold exactly one object or array; otherwise they
+  may start with any value, and the events stop at the end of that value.
+  '''
+  tokens = iter(tokens)
+  # Each entry is True for an object, False for an array
+  containers = list()
+  # What the next token may be: 'text' (an object or array), 'value',
+  # 'item' (a value or the end of an array), 'member' (a member name or
+  # the end of an object), 'colon', 'next' (a separator, the end of the
+  # container or, as the grammar allows, the next item or member) or 'end'
+  # (nothing at all)
+  if document:
+    expect = 'text'
+  else:
+    expect = 'value'
+  for token in tokens:
+    kind = token.type
+    if expect == 'next':
+      if containers[-1]:
+        if kind == 'STRING' or kind == 'QUOTATION_MARK':
+          expect = 'member'
+      elif kind not in ('VALUE_SEPARATOR', 'END_ARRAY'):
+        expect = 'item'
+    if kind == 'BEGIN_OBJECT' or kind == 'BEGIN_ARRAY':
+      if expect not in ('text', 'value', 'item'):
+        raise SyntaxError("Unexpected '%s'" % token)
+      if kind == 'BEGIN_OBJECT':
+        containers.append(True)
+        expect = 'member'
+        yield ('start_map', None)
+      else:
+        containers.append(False)
+        expect = 'item'
+        yield ('start_array', None)
+      continue
+    elif kind == 'VALUE_SEPARATOR':
+      if expect != 'next':
+        raise SyntaxError("Unexpected '%s'" % token)
+      if containers[-1]:
+        expect = 'member'
+      else:
+        expect = 'item'
+      continue
+    elif kind == 'NAME_SEPARATOR':
+      if expect != 'colon':
+        raise SyntaxError("Unexpected '%s'" % token)
+      expect = 'value'
+      continue
+    elif kind == 'END_OBJECT':
+      if expect not in ('member', 'next') or not containers[-1]:
+        raise SyntaxError("Unexpected '%s'" % token)
+      containers.pop()
+      yield ('end_map', None)
+    elif kind == 'END_ARRAY':
+      if expect not in ('item', 'next') or containers[-1]:
+        raise SyntaxError("Unexpected '%s'" % token)
+      containers.pop()
+      yield ('end_array', None)
+    elif kind == 'STRING' or kind == 'QUOTATION_MARK':
+      if expect not in ('member', 'value', 'item'):
+        raise SyntaxError("Unexpected '%s'" % token)
+      if kind == 'STRING':
+        value = token.value
+      else:
+        value = _read_string(tokens)
+      if expect == 'member':
+        expect = 'colon'
+        yield ('map_key', value)
+        continue
+      yield ('string', value)
+    elif expect != 'value' and expect != 'item':
+      raise SyntaxError("Unexpected '%s'" % token)
+    elif kind == 'TRUE':
+      yield ('boolean', True)
+    elif kind == 'FALSE':
+      yield ('boolean', False)
+    elif kind == 'NULL':
+      yield ('null', None)
+    elif kind == 'NUMBER':
+      yield ('number', _to_number(token.value))
+    else:
+      raise SyntaxError("Unexpected '%s'" % token)
+    # A whole value has been read
+    if containers:
+      expect = 'next'
+    elif document:
+      expect = 'end'
+    else:
+      return
+  if expect != 'end':
+    raise SyntaxError('Unexpected end of input')
+
+
+def _read_string(tokens):
+  '''Consume the tokens of a string up to its closing quotation mark.'''
+  chars = list()
+  escaped = False
+  for token in tokens:
+    kind = token.type
+    if escaped:
+      # The character after an ESCAPE, which may be a quotation mark
+      escaped = False
+      if kind == 'QUOTATION_MARK':
+        chars.append(token.value)
+        continue
+    if kind == 'ESCAPE':
+      escaped = True
+    elif kind == 'QUOTATION_MARK':
+      value = ''.join(chars)
+      if isinstance(value, str):
+        value = unicode(value, encoding='utf8')
+      return value
+    elif kind == 'UNICODE_HEX':
+      char = unichr(int(token.value[1:], 16))
+      if isinstance(token.value, str):
+        char = char.encode('utf8')
+      chars.append(char)
+    else:
+      chars.append(token.value)
+  raise SyntaxError('Unterminated string')
+
+
+def query(source, pointer, default=None, chunksize=CHUNK_SIZE):
+  '''Return the value at a JSON Pointer (RFC 6901) without parsing the rest.
+
+  For example, query(s, '/data/items/3/id').  See query_many.
+
+  Args:
+    source: a string-like object, or a file-like object that is read
+      chunksize bytes at a time
+    pointer: a JSON Pointer string
+    default: returned if there is no value at the pointer
+    chunksize: the number of bytes to read per chunk from a file
+  Returns:
+    The value at the pointer, or default.
+  Raises:
+    ValueError: if the pointer is not a valid JSON Pointer.
+    SyntaxError: if the part of the text that was read is malformed.
+  '''
+  return query_many(source, [pointer], default, chunksize)[0]
+
+
+def query_many(source, pointers, default=None, chunksize=CHUNK_SIZE):
+  '''Return the values at several JSON Pointers in one pass over the text.
+
+  The pointers are resolved against the JsonLexer token stream.  Members
+  and elements that no pointer leads into are skipped by counting their
+  brackets, without building their values, and reading stops as soon as
+  every pointer has been resolved.  The containers on the way to a
+  pointer, and the values at the pointers, follow the same grammar as
+  JsonParser.parse(), so the separator after a member or an element may be
+  left out.
+
+  Args:
+    source: a string-like object, or a file-like object that is read
+      chunksize bytes at a time
+    pointers: a sequence of JSON Pointer strings
+    default: the result for a pointer that has no value
+    chunksize: the number of bytes to read per chunk from a file
+  Returns:
+    A list of the values at the pointers, in the same order.
+  Raises:
+    ValueError: if a pointer is not a valid JSON Pointer.
+    SyntaxError: if the part of the text that was read is malformed.
+  '''
+  results = [default] * len(pointers)
+  # A trie of the pointers.  Each node maps the reference tokens of its
+  # children to their nodes, and None to the pointers that end there.
+  root = dict()
+  for i, pointer in enumerate(pointers):
+    node = root
+    for name in _parse_pointer(pointer):
+      node = node.setdefault(name, dict())
+    node.setdefault(None, list()).append(i)
+  if not pointers:
+    return results
+  tokens = _iter_tokens(source, JsonLexer(), chunksize)
+  for token in tokens:
+    try:
+      _query_value(token, tokens, root, results, set())
+    except _QueryDone:
+      pass
+    break
+  return results
+
+
+class _QueryDone(Exception):
+  '''Raised when every pointer of a query has been resolved.'''
+
+
+def _parse_pointer(pointer):
+  '''Return the list of reference tokens in a JSON Pointer.'''
+  if isinstance(pointer, str):
+    pointer = unicode(pointer, encoding='utf8')
+  if not pointer:
+    return list()
+  if not pointer.startswith('/'):
+    raise ValueError('Invalid JSON pointer %r' % pointer)
+  return [name.replace('~1', '/').replace('~0', '~')
+          for name in pointer.split('/')[1:]]
+
+
+def _query_value(token, tokens, node, results, resolved):
+  '''Resolve the pointers in node against the value that starts at token.
+
+  resolved holds the indices of the pointers resolved so far, and
+  _QueryDone is raised once it holds every pointer.  A pointer that is
+  resolved again, through a repeated member name, is only counted once.
+  '''
+  if None in node:
+    _resolve_pointers(_build_value(token, tokens), node, results, resolved)
+    return
+  kind = token.type
+  # As in the grammar, a separator may only follow a member or element
+  separator = False
+  if kind == 'BEGIN_OBJECT':
+    for token in tokens:
+      kind = token.type
+      if kind == 'END_OBJECT':
+        return
+      elif kind == 'VALUE_SEPARATOR' and separator:
+        separator = False
+        continue
+      elif kind == 'STRING':
+        name = token.value
+      elif kind == 'QUOTATION_MARK':
+        name = _read_string(tokens)
+      else:
+        raise SyntaxError("Expected a member name at '%s'" % token)
+      token = _next_token(tokens)
+      if token.type != 'NAME_SEPARATOR':
+        raise SyntaxError("Expected ':' at '%s'" % token)
+      token = _next_token(tokens)
+      child = node.get(name)
+      if child is not None:
+        _query_value(token, tokens, child, results, resolved)
+      else:
+        _skip_value_tokens(token, tokens)
+      separator = True
+  elif kind == 'BEGIN_ARRAY':
+    index = 0
+    for token in tokens:
+      kind = token.type
+      if kind == 'END_ARRAY':
+        return
+      elif kind == 'VALUE_SEPARATOR':
+        if not separator:
+          raise SyntaxError("Unexpected '%s'" % token)
+        separator = False
+        continue
+      child = node.get(str(index))
+      if child is not None:
+        _query_value(token, tokens, child, results, resolved)
+      else:
+        _skip_value_tokens(token, tokens)
+      separator = True
+      index += 1
+  else:
+    # No pointer can lead into a scalar
+    _skip_value_tokens(token, tokens)
+    return
+  raise SyntaxError('Unexpected end of input')
+
+
+def _resolve_pointers(value, node, results, resolved):
+  '''Resolve the pointers in node against an already built value.'''
+  for name, child in node.iteritems():
+    if name is None:
+      for i in child:
+        results[i] = value
+      resolved.update(child)
+      if len(resolved) == len(results):
+        raise _QueryDone()
+    elif isinstance(value, dict):
+      if name in value:
+        _resolve_pointers(value[name], child, results, resolved)
+    elif isinstance(value, list):
+      if name.isdigit() and str(int(name)) == name and int(name) < len(value):
+        _resolve_pointers(value[int(name)], child, results, resolved)
+
+
+def _next_token(tokens):
+  '''Return the next token, which must exist.'''
+  for token in tokens:
+    return token
+  raise SyntaxError('Unexpected end of input')
+
+
+def _skip_value_tokens(token, tokens):
+  '''Consume the rest of the value that starts at token without building it.
+
+  A string can not contain bracket tokens, so a container is skipped by
+  counting its brackets alone.
+  '''
+  kind = token.type
+  if kind == 'BEGIN_OBJECT' or kind == 'BEGIN_ARRAY':
+    depth = 1
+    for token in tokens:
+      kind = token.type
+      if kind == 'BEGIN_OBJECT' or kind == 'BEGIN_ARRAY':
+        depth += 1
+      elif kind == 'END_OBJECT' or kind == 'END_ARRAY':
+        depth -= 1
+        if not depth:
+          return
+    raise SyntaxError('Unexpected end of input')
+  elif kind == 'QUOTATION_MARK':
+    escaped = False
+    for token in tokens:
+      kind = token.type
+      if escaped:
+        # The character after an ESCAPE, which may be a quotation mark
+        escaped = False
+      elif kind == 'ESCAPE':
+        escaped = True
+      elif kind == 'QUOTATION_MARK':
+        return
+    raise SyntaxError('Unterminated string')
+  elif kind not in ('STRING', 'NUMBER', 'TRUE', 'FALSE', 'NULL'):
+    raise SyntaxError("Unexpected '%s'" % token)
+
+
+def _build_value(token, tokens):
+  '''Build the value that starts at token from the events of its tokens.'''
+  containers = list()
+  names = list()
+  for event, value in _iter_events(itertools.chain([token], tokens),
+                                   document=False):
+    if event == 'map_key':
+      names.append(value)
+      continue
+    elif event == 'start_map':
+      containers.append(dict())
+      continue
+    elif event == 'start_array':
+      containers.append(list())
+      continue
+    elif event == 'end_map' or event == 'end_array':
+      value = containers.pop()
+    if not containers:
+      return value
+    container = containers[-1]
+    if isinstance(container, dict):
+      container[names.pop()] = value
+    else:
+      container.append(value)
+  raise SyntaxError('Unexpected end of input')
+
+
+class JsonWriter(object):
+  '''Encodes python values as JSON text.
+
+  The values are those the JsonParser produces: dicts (or any Mapping)
+  with string keys, lists (or any Sequence), array.array, unicode and
+  UTF-8 encoded str strings, ints, longs, floats, decimal.Decimal, True,
+  False and None.
+  The text is pure ASCII, with every other character escaped.
+
+  The encoded text is collected as a list of pieces, which is joined and
+  written out whenever it holds bufsize pieces, so dump() never builds
+  the whole text in memory.  The list is reused from one call to the next.
+  '''
+
+  def __init__(self, bufsize=4096, iterative=False):
+    '''Constructs a JsonWriter.
+
+    Args:
+      bufsize: The number of pieces of encoded text that are buffered
+        before they are joined and written as one chunk.
+      iterative: If True, nested values are encoded with an explicit stack
+        rather than by recursion, so there is no limit on their depth.
+    '''
+    self.bufsize = bufsize
+    self.iterative = iterative
+    self.pieces = list()
+    self.write = None
+
+  def dump(self, obj, fp):
+    '''Write the JSON text of obj to the file-like object fp.'''
+    self.write = fp.write
+    try:
+      self._encode_value(obj)
+      self._flush()
+    finally:
+      self.write = None
+      del self.pieces[:]
+
+  def dumps(self, obj):
+    '''Return the JSON text of obj as a str.'''
+    chunks = list()
+    self.write = chunks.append
+    try:
+      self._encode_value(obj)
+      self._flush()
+    finally:
+      self.write = None
+      del self.pieces[:]
+    return ''.join(chunks)
+
+  def _flush(self):
+    '''Join the buffered pieces and write them out.'''
+    chunk = ''.join(self.pieces)
+    del self.pieces[:]
+    if isinstance(chunk, unicode):
+      # Every character outside ASCII has been escaped
+      chunk = chunk.encode('ascii')
+    self.write(chunk)
+
+  def _encode_value(self, obj):
+    if self.iterative:
+      self._encode_iterative(obj)
+    else:
+      self._encode_recursive(obj, set())
+
+  def _encode_recursive(self, obj, markers):
+    pieces = self.pieces
+    encode = _SCALAR_ENCODERS.get(type(obj))
+    if encode is not None:
+      pieces.append(encode(obj))
+      return
+    bracket = _container_bracket(obj)
+    if bracket is None:
+      pieces.append(_encode_scalar(obj))
+      return
+    marker = id(obj)
+    if marker in markers:
+      raise ValueError('Circular reference detected')
+    markers.add(marker)
+    pieces.append(bracket)
+    if bracket == '{':
+      items = obj.iteritems()
+    else:
+      items = ((None, value) for value in obj)
+    first = True
+    for key, value in items:
+      if first:
+        first = False
+      else:
+        pieces.append(',')
+      if bracket == '{':
+        pieces.append(_encode_key(key))
+        pieces.append(':')
+      # Scalars are encoded here rather than by another call
+      encode = _SCALAR_ENCODERS.get(type(value))
+      if encode is not None:
+        pieces.append(encode(value))
+      else:
+        self._encode_recursive(value, markers)
+      if len(pieces) >= self.bufsize:
+        self._flush()
+    pieces.append(bracket == '{' and '}' or ']')
+    markers.remove(marker)
+
+  def _encode_iterative(self, obj):
+    pieces = self.pieces
+    # Each frame is [iterator, closing bracket, first member, marker] for
+    # an open container
+    stack = list()
+    markers = set()
+    value = obj
+    while True:
+      bracket = None
+      encode = _SCALAR_ENCODERS.get(type(value))
+      if encode is not None:
+        pieces.append(encode(value))
+      else:
+        bracket = _container_bracket(value)
+        if bracket is None:
+          pieces.append(_encode_scalar(value))
+      if bracket is not None:
+        marker = id(value)
+        if marker in markers:
+          raise ValueError('Circular reference detected')
+        markers.add(marker)
+        pieces.append(bracket)
+        if bracket == '{':
+          stack.append([value.iteritems(), '}', True, marker])
+        else:
+          stack.append([iter(value), ']', True, marker])
+      if len(pieces) >= self.bufsize:
+        self._flush()
+      # Find the next value to encode, closing every exhausted container
+      while stack:
+        frame = stack[-1]
+        item = next(frame[0], _END)
+        if item is _END:
+          pieces.append(frame[1])
+          markers.remove(frame[3])
+          stack.pop()
+          continue
+        if frame[2]:
+          frame[2] = False
+        else:
+          pieces.append(',')
+        if frame[1] == '}':
+          key, value = item
+          pieces.append(_encode_key(key))
+          pieces.append(':')
+        else:
+          value = item
+        break
+      else:
+        return
+
+
+# Marks the end of a container's members in JsonWriter._encode_iterative
+_END = object()
+
+# The characters that are escaped in encoded strings.  Everything from
+# \x7f up is matched by a negated class, which compiles much faster than a
+# range up to unichr(sys.maxunicode).
+_ESCAPE_OUT_RE = re.compile(u'[\\x00-\\x1f\\x22\\x5c]|[^\\x00-\\x7e]')
+
+_ESCAPES_OUT = {
+  u'\x22': '\\"',
+  u'\x5c': '\\\\',
+  u'\x08': '\\b',
+  u'\x0c': '\\f',
+  u'\x0a': '\\n',
+  u'\x0d': '\\r',
+  u'\x09': '\\t',
+}
+
+
+def _escape_out(match):
+  '''Return the escape sequence for an _ESCAPE_OUT_RE match.'''
+  char = match.group()
+  try:
+    return _ESCAPES_OUT[char]
+  except KeyError:
+    code = ord(char)
+    if code > 0xFFFF:
+      # Written as a UTF-16 surrogate pair
+      code -= 0x10000
+      return '\\u%04x\\u%04x' % (0xD800 | (code >> 10), 0xDC00 | (code & 0x3FF))
+    return '\\u%04x' % code
+
+
+def _encode_string(s):
+  '''Return the JSON text of a unicode or UTF-8 encoded str string.'''
+  if isinstance(s, str):
+    s = unicode(s, encoding='utf8')
+  return '"' + _ESCAPE_OUT_RE.sub(_escape_out, s) + '"'
+
+
+def _encode_key(key):
+  '''Return the JSON text of an object member name.'''
+  if not isinstance(key, basestring):
+    raise TypeError('Object member names must be strings, not %r' % (key,))
+  return _encode_string(key)
+
+
+def _encode_float(obj):
+  '''Return the JSON text of a float.'''
+  if obj != obj or obj in (float('inf'), float('-inf')):
+    raise ValueError('%r can not be represented in JSON' % obj)
+  return repr(obj)
+
+
+def _encode_decimal(obj):
+  '''Return the JSON text of a decimal.Decimal.'''
+  if not obj.is_finite():
+    raise ValueError('%r can not be represented in JSON' % obj)
+  return str(obj)
+
+
+# The encoders of the scalar types, looked up by exact type
+_SCALAR_ENCODERS = {
+  unicode: _encode_string,
+  str: _encode_string,
+  int: str,
+  long: str,
+  float: _encode_float,
+  bool: lambda obj: obj and 'true' or 'false',
+  type(None): lambda obj: 'null',
+  decimal.Decimal: _encode_decimal,
+}
+
+
+def _container_bracket(obj):
+  '''Return the opening bracket for a container, or None for a scalar.'''
+  if type(obj) is dict or isinstance(obj, collections.Mapping):
+    return '{'
+  if (type(obj) is list or isinstance(obj, array.array) or
+      isinstance(obj, collections.Sequence) and
+      not isinstance(obj, basestring)):
+    return '['
+  return None
+
+
+def _encode_scalar(obj):
+  '''Return the JSON text of a scalar whose type is a subclass.'''
+  if isinstance(obj, basestring):
+    return _encode_string(obj)
+  elif isinstance(obj, bool):
+    return _SCALAR_ENCODERS[bool](obj)
+  elif isinstance(obj, (int, long)):
+    return str(int(obj))
+  elif isinstance(obj, float):
+    return _encode_float(obj)
+  elif isinstance(obj, decimal.Decimal):
+    return _encode_decimal(obj)
+  raise TypeError('%r can not be represented in JSON' % (obj,))
+
+
+def dump(obj, fp, bufsize=4096, iterative=False):
+  '''Write a python structure to a file-like object as JSON text.
+
+  See JsonWriter for the values that can be written.
+
+  Args:
+    obj: the value to write
+    fp: a file-like object with a write method
+    bufsize: the number of pieces of text buffered between writes
+    iterative: if True, encode nested values without recursion
+  Raises:
+    TypeError: if obj contains a value that has no JSON representation.
+    ValueError: if obj contains a circular reference, or a float that is
+      not finite.
+  '''
+  JsonWriter(bufsize, iterative).dump(obj, fp)
+
+
+def dumps(obj, iterative=False):
+  '''Return the JSON text of a python structure as a str.
+
+  Args:
+    obj: the value to encode
+    iterative: if True, encode nested values without recursion
+  Raises:
+    TypeError: if obj contains a value that has no JSON representation.
+    ValueError: if obj contains a circular reference, or a float that is
+      not finite.
+  '''
+  return JsonWriter(iterative=iterative).dumps(obj)
+
+
+def write_tables(outputdir=''):
+  '''Regenerate the jsonply_lextab and jsonply_parsetab modules.
+
+  Run this from the directory containing jsonply.py after changing any of
+  the JsonLexer or JsonParser rules.  The parse tables are only rewritten
+  if the grammar signature has changed.
+
+  Args:
+    outputdir: the directory to write the modules to
+  '''
+  json_lexer = JsonLexer(optimize=0, lextab=None)
+  json_lexer.lexer.writetab('jsonply_lextab', outputdir)
+  JsonParser(lexer=json_lexer, optimize=0, tabmodule='jsonply_parsetab',
+             write_tables=1, outputdir=outputdir)
 
 
 def main(argv):
   '''Parses JSON files or stdin and prints the python data structure.'''
   if len(argv) > 1:
     for filename in argv[1:]:
-      print parse_file(open(filename))
+      print parse_file(filename)
   else:
     print parse_file(sys.stdin)
 
@@ -0,0 +1,9 @@
+# jsonply_lextab.py. This file automatically created by PLY (version 3.0). Don't edit!
+_tabversion   = '3.0'
+_lextokens    = {'SOLIDUS': 1, 'BEGIN_OBJECT': 1, 'BEGIN_ARRAY': 1, 'NAME_SEPARATOR': 1, 'UNESCAPED': 1, 'NUMBER': 1, 'UNICODE_HEX': 1, 'QUOTATION_MARK': 1, 'NULL': 1, 'TAB_CHAR': 1, 'END_ARRAY': 1, 'TRUE': 1, 'FORM_FEED_CHAR': 1, 'VALUE_SEPARATOR': 1, 'BACKSPACE_CHAR': 1, 'STRING': 1, 'LINE_FEED_CHAR': 1, 'CARRIAGE_RETURN_CHAR': 1, 'ESCAPE': 1, 'REVERSE_SOLIDUS': 1, 'FALSE': 1, 'END_OBJECT': 1}
+_lexreflags   = 0
+_lexliterals  = ''
+_lexstateinfo = {'escaped': 'exclusive', 'INITIAL': 'inclusive', 'string': 'exclusive'}
+_lexstatere   = {'escaped': [('(?P<t_escaped_QUOTATION_MARK>\\x22)|(?P<t_escaped_REVERSE_SOLIDUS>\\x5C)|(?P<t_escaped_SOLIDUS>\\x2F)|(?P<t_escaped_BACKSPACE_CHAR>\\x62)|(?P<t_escaped_FORM_FEED_CHAR>\\x66)|(?P<t_escaped_CARRIAGE_RETURN_CHAR>\\x72)|(?P<t_escaped_LINE_FEED_CHAR>\\x6E)|(?P<t_escaped_TAB_CHAR>\\x74)|(?P<t_escaped_UNICODE_HEX>\\x75[\\x30-\\x39,\\x41-\\x46,\\x61-\\x66]{4})', [None, ('t_escaped_QUOTATION_MARK', 'QUOTATION_MARK'), ('t_escaped_REVERSE_SOLIDUS', 'REVERSE_SOLIDUS'), ('t_escaped_SOLIDUS', 'SOLIDUS'), ('t_escaped_BACKSPACE_CHAR', 'BACKSPACE_CHAR'), ('t_escaped_FORM_FEED_CHAR', 'FORM_FEED_CHAR'), ('t_escaped_CARRIAGE_RETURN_CHAR', 'CARRIAGE_RETURN_CHAR'), ('t_escaped_LINE_FEED_CHAR', 'LINE_FEED_CHAR'), ('t_escaped_TAB_CHAR', 'TAB_CHAR'), ('t_escaped_UNICODE_HEX', 'UNICODE_HEX')])], 'INITIAL': [('(?P<t_STRING>\\x22[^\\x00-\\x1F\\x22\\x5C]*(?:\\x5C(?:[\\x22\\x5C\\x2F\\x62\\x66\\x6E\\x72\\x74]|\\x75[\\x30-\\x39\\x41-\\x46\\x61-\\x66]{4})[^\\x00-\\x1F\\x22\\x5C]*)*\\x22)|(?P<t_QUOTATION_MARK>\\x22)|(?P<t_NUMBER>\\x2D?[\\x30-\\x39]+(?:\\x2E[\\x30-\\x39]+)?(?:[\\x45\\x65][\\x2B\\x2D]?[\\x30-\\x39]+)?)|(?P<t_FALSE>\\x66\\x61\\x6c\\x73\\x65)|(?P<t_NULL>\\x6e\\x75\\x6c\\x6c)|(?P<t_TRUE>\\x74\\x72\\x75\\x65)|(?P<t_VALUE_SEPARATOR>\\x2C)|(?P<t_BEGIN_ARRAY>\\x5B)|(?P<t_NAME_SEPARATOR>\\x3A)|(?P<t_BEGIN_OBJECT>\\x7B)|(?P<t_END_ARRAY>\\x5D)|(?P<t_END_OBJECT>\\x7D)', [None, ('t_STRING', 'STRING'), ('t_QUOTATION_MARK', 'QUOTATION_MARK'), (None, 'NUMBER'), (None, 'FALSE'), (None, 'NULL'), (None, 'TRUE'), (None, 'VALUE_SEPARATOR'), (None, 'BEGIN_ARRAY'), (None, 'NAME_SEPARATOR'), (None, 'BEGIN_OBJECT'), (None, 'END_ARRAY'), (None, 'END_OBJECT')])], 'string': [('(?P<t_string_UNESCAPED>[\\x20-\\x21,\\x23-\\x5B,\\x5D-\\xFF]+)|(?P<t_string_QUOTATION_MARK>\\x22)|(?P<t_string_ESCAPE>\\x5C)', [None, ('t_string_UNESCAPED', 'UNESCAPED'), ('t_string_QUOTATION_MARK', 'QUOTATION_MARK'), ('t_string_ESCAPE', 'ESCAPE')])]}
+_lexstateignore = {'escaped': '', 'INITIAL': ' \t\n\r', 'string': ''}
+_lexstateerrorf = {'escaped': 't_ANY_error', 'INITIAL': 't_ANY_error', 'string': 't_ANY_error'}
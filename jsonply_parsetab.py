@@ -0,0 +1,62 @@
+
+# jsonply_parsetab.py
+# This file is automatically generated. Do not edit.
+_tabversion = '3.0'
+
+_lr_method = 'LALR'
+
+_lr_signature = 1493685817
+    
+_lr_action_items = {'SOLIDUS':([29,],[32,]),'BEGIN_OBJECT':([0,2,7,8,11,13,14,15,16,17,18,19,20,21,22,25,26,30,],[1,-15,1,-10,-21,-18,-6,-3,-5,-17,-19,-7,-4,-9,-8,1,-16,-20,]),'BEGIN_ARRAY':([0,2,7,8,11,13,14,15,16,17,18,19,20,21,22,25,26,30,],[2,-15,2,-10,-21,-18,-6,-3,-5,-17,-19,-7,-4,-9,-8,2,-16,-20,]),'NAME_SEPARATOR':([11,12,30,],[-21,25,-20,]),'UNESCAPED':([10,24,27,28,32,33,34,35,36,37,38,39,40,],[-22,27,-24,-23,-27,-26,-30,-28,-31,-33,-29,-25,-32,]),'NUMBER':([2,7,8,11,13,14,15,16,17,18,19,20,21,22,25,26,30,],[-15,18,-10,-21,-18,-6,-3,-5,-17,-19,-7,-4,-9,-8,18,-16,-20,]),'UNICODE_HEX':([29,],[37,]),'QUOTATION_MARK':([1,2,6,7,8,9,10,11,13,14,15,16,17,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,39,40,],[-11,-15,10,10,-10,-13,-22,-21,-18,-6,-3,-5,-17,-19,-7,-4,-9,-8,-12,30,10,-16,-24,-23,39,-20,-14,-27,-26,-30,-28,-31,-33,-29,-25,-32,]),'NULL':([2,7,8,11,13,14,15,16,17,18,19,20,21,22,25,26,30,],[-15,21,-10,-21,-18,-6,-3,-5,-17,-19,-7,-4,-9,-8,21,-16,-20,]),'TRUE':([2,7,8,11,13,14,15,16,17,18,19,20,21,22,25,26,30,],[-15,22,-10,-21,-18,-6,-3,-5,-17,-19,-7,-4,-9,-8,22,-16,-20,]),'END_ARRAY':([2,7,8,11,13,14,15,16,17,18,19,20,21,22,26,30,],[-15,13,-10,-21,-18,-6,-3,-5,-17,-19,-7,-4,-9,-8,-16,-20,]),'TAB_CHAR':([29,],[40,]),'FORM_FEED_CHAR':([29,],[38,]),'$end':([3,4,5,8,13,],[0,-1,-2,-10,-18,]),'VALUE_SEPARATOR':([8,9,11,13,14,15,16,17,18,19,20,21,22,30,31,],[-10,23,-21,-18,-6,-3,-5,26,-19,-7,-4,-9,-8,-20,-14,]),'BACKSPACE_CHAR':([29,],[35,]),'STRING':([1,2,6,7,8,9,11,13,14,15,16,17,18,19,20,21,22,23,25,26,30,31,],[-11,-15,11,11,-10,-13,-21,-18,-6,-3,-5,-17,-19,-7,-4,-9,-8,-12,11,-16,-20,-14,]),'LINE_FEED_CHAR':([29,],[34,]),'CARRIAGE_RETURN_CHAR':([29,],[36,]),'ESCAPE':([10,24,27,28,32,33,34,35,36,37,38,39,40,],[-22,29,-24,-23,-27,-26,-30,-28,-31,-33,-29,-25,-32,]),'REVERSE_SOLIDUS':([29,],[33,]),'FALSE':([2,7,8,11,13,14,15,16,17,18,19,20,21,22,25,26,30,],[-15,19,-10,-21,-18,-6,-3,-5,-17,-19,-7,-4,-9,-8,19,-16,-20,]),'END_OBJECT':([1,6,8,9,11,13,14,15,16,18,19,20,21,22,23,30,31,],[-11,8,-10,-13,-21,-18,-6,-3,-5,-19,-7,-4,-9,-8,-12,-20,-14,]),}
+
+_lr_action = { }
+for _k, _v in _lr_action_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+      if not _x in _lr_action:  _lr_action[_x] = { }
+      _lr_action[_x][_k] = _y
+del _lr_action_items
+
+_lr_goto_items = {'char':([24,],[28,]),'string':([6,7,25,],[12,14,14,]),'text':([0,],[3,]),'chars':([10,],[24,]),'object':([0,7,25,],[4,15,15,]),'number':([7,25,],[16,16,]),'value':([7,25,],[17,31,]),'member':([6,],[9,]),'values':([2,],[7,]),'members':([1,],[6,]),'array':([0,7,25,],[5,20,20,]),}
+
+_lr_goto = { }
+for _k, _v in _lr_goto_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+       if not _x in _lr_goto: _lr_goto[_x] = { }
+       _lr_goto[_x][_k] = _y
+del _lr_goto_items
+_lr_productions = [
+  ("S' -> text","S'",1,None,None,None),
+  ('text -> object','text',1,'p_text','jsonply.py',477),
+  ('text -> array','text',1,'p_text','jsonply.py',478),
+  ('value -> object','value',1,'p_value','jsonply.py',482),
+  ('value -> array','value',1,'p_value','jsonply.py',483),
+  ('value -> number','value',1,'p_value','jsonply.py',484),
+  ('value -> string','value',1,'p_value','jsonply.py',485),
+  ('value -> FALSE','value',1,'p_value_false','jsonply.py',489),
+  ('value -> TRUE','value',1,'p_value_true','jsonply.py',493),
+  ('value -> NULL','value',1,'p_value_null','jsonply.py',497),
+  ('object -> BEGIN_OBJECT members END_OBJECT','object',3,'p_object','jsonply.py',501),
+  ('members -> <empty>','members',0,'p_members','jsonply.py',505),
+  ('members -> members member VALUE_SEPARATOR','members',3,'p_members','jsonply.py',506),
+  ('members -> members member','members',2,'p_members','jsonply.py',507),
+  ('member -> string NAME_SEPARATOR value','member',3,'p_member','jsonply.py',515),
+  ('values -> <empty>','values',0,'p_values','jsonply.py',520),
+  ('values -> values value VALUE_SEPARATOR','values',3,'p_values','jsonply.py',521),
+  ('values -> values value','values',2,'p_values','jsonply.py',522),
+  ('array -> BEGIN_ARRAY values END_ARRAY','array',3,'p_array','jsonply.py',530),
+  ('number -> NUMBER','number',1,'p_number','jsonply.py',534),
+  ('string -> QUOTATION_MARK chars QUOTATION_MARK','string',3,'p_string','jsonply.py',542),
+  ('string -> STRING','string',1,'p_string_token','jsonply.py',546),
+  ('chars -> <empty>','chars',0,'p_chars','jsonply.py',550),
+  ('chars -> chars char','chars',2,'p_chars','jsonply.py',551),
+  ('char -> UNESCAPED','char',1,'p_char','jsonply.py',558),
+  ('char -> ESCAPE QUOTATION_MARK','char',2,'p_char','jsonply.py',559),
+  ('char -> ESCAPE REVERSE_SOLIDUS','char',2,'p_char','jsonply.py',560),
+  ('char -> ESCAPE SOLIDUS','char',2,'p_char','jsonply.py',561),
+  ('char -> ESCAPE BACKSPACE_CHAR','char',2,'p_char','jsonply.py',562),
+  ('char -> ESCAPE FORM_FEED_CHAR','char',2,'p_char','jsonply.py',563),
+  ('char -> ESCAPE LINE_FEED_CHAR','char',2,'p_char','jsonply.py',564),
+  ('char -> ESCAPE CARRIAGE_RETURN_CHAR','char',2,'p_char','jsonply.py',565),
+  ('char -> ESCAPE TAB_CHAR','char',2,'p_char','jsonply.py',566),
+  ('char -> ESCAPE UNICODE_HEX','char',2,'p_char_unicode_hex','jsonply.py',572),
+]
@@ -19,8 +19,18 @@
 
 __author__ = 'dewitt@unto.net'
 
+import array
+import decimal
+import os
+import shutil
+import StringIO
+import sys
+import tempfile
+import threading
 import unittest
 import jsonply
+import jsonply_parsetab
+import ply.yacc
 
 class JsonPlyTest(unittest.TestCase):
   '''Tests the module-level jsonply methods.'''
@@ -30,6 +40,110 @@ class JsonPlyTest(unittest.TestCase):
     actual = jsonply.parse('{"foo": "bar", "arr": [1, {"a": -2.50e4}, true]}')
     self.assertEqual(True, actual['arr'][2])
 
+  def testParseFile(self):
+    '''Test the module-level parse_file method with small chunks.'''
+    f = StringIO.StringIO('{"foo": "bar", "arr": [1, {"a": -2.50e4}, true]}')
+    actual = jsonply.parse_file(f, chunksize=3)
+    self.assertEqual({'foo': 'bar', 'arr': [1, {'a': -2.50e4}, True]}, actual)
+
+  def testParseFilePath(self):
+    '''Test the module-level parse_file method with a path.'''
+    fd, path = tempfile.mkstemp()
+    try:
+      os.write(fd, '{"foo": "b\xc3\xa4r", "arr": [1, {"a": -2.50e4}, true]}')
+      os.close(fd)
+      actual = jsonply.parse_file(path)
+      self.assertEqual({'foo': u'b\xe4r', 'arr': [1, {'a': -2.50e4}, True]},
+                       actual)
+    finally:
+      os.remove(path)
+
+  def testParseFileEmptyPath(self):
+    '''Test the module-level parse_file method with an empty file.'''
+    fd, path = tempfile.mkstemp()
+    os.close(fd)
+    try:
+      self.assertEqual(None, jsonply.parse_file(path))
+    finally:
+      os.remove(path)
+
+
+class JsonLexerTest(unittest.TestCase):
+  '''Tests the JsonLexer methods.'''
+
+  def setUp(self):
+    self.lexer = jsonply.JsonLexer()
+
+  def tokenTypes(self, data):
+    return [token.type for token in self.lexer.tokenize(data)]
+
+  def testStringToken(self):
+    '''Tests that a well-formed string is a single STRING token.'''
+    tokens = self.lexer.tokenize('"a\\"b\\u30A4\\t"')
+    self.assertEquals(['STRING'], [token.type for token in tokens])
+    self.assertEquals(u'a"b\u30A4\t', tokens[0].value)
+
+  def testStringTokenUtf8(self):
+    '''Tests that UTF-8 encoded STRING tokens are decoded.'''
+    tokens = self.lexer.tokenize('"\xe3\x82\xa4"')
+    self.assertEquals(u'\u30A4', tokens[0].value)
+
+  def testMalformedStringFragments(self):
+    '''Tests that a malformed string falls back to fragment tokens.'''
+    self.lexer.verbose = False
+    self.assertEquals(['QUOTATION_MARK', 'UNESCAPED', 'ESCAPE'],
+                      self.tokenTypes('"a\\qb"')[:3])
+    self.assertEquals(1, len(self.lexer.errors))
+
+  def testTokenBatch(self):
+    '''Tests that tokenbatch() produces the same tokens as token().'''
+    self.lexer.verbose = False
+    data = '[{"a": "b\\qc", "d": [1, 2.5, true]}, "\xc3\xa9"]'
+    expected = [(token.type, token.value, token.lexpos)
+                for token in self.lexer.tokenize(data)]
+    self.lexer.reset()
+    lexer = self.lexer.lexer
+    lexer.input(data)
+    actual = list()
+    while True:
+      batch = lexer.tokenbatch(3)
+      if not batch:
+        break
+      self.assertTrue(len(batch) <= 3)
+      actual.extend((token.type, token.value, token.lexpos) for token in batch)
+    self.assertEquals(expected, actual)
+
+  def testScan(self):
+    '''Tests that scan() produces the same tokens and errors as token().'''
+    self.lexer.verbose = False
+    data = ' [{"a": "b\\qc", "d": [1, 2.5, true]},\n"\xc3\xa9", nul, -] \t'
+    expected = [(token.type, token.value, token.lexpos)
+                for token in self.lexer.tokenize(data)]
+    errors = list(self.lexer.errors)
+    self.lexer.reset()
+    lexer = self.lexer.lexer
+    lexer.input(data)
+    actual = [(token.type, token.value, token.lexpos) for token in lexer.scan()]
+    self.assertEquals(expected, actual)
+    self.assertEquals(errors, self.lexer.errors)
+    self.assertTrue(errors)
+
+  def testTokenFunc(self):
+    '''Tests that a parser can consume tokens from tokenfunc().'''
+    parser = jsonply.JsonParser(lexer=self.lexer)
+    parser.verbose = False
+    lexer = self.lexer.lexer
+    self.assertEquals([1, {u'a': [True]}],
+                      parser.parse('[1, {"a": [true]}]', tokenfunc=lexer.tokenfunc(2)))
+    self.assertEquals(None, parser.parse('', tokenfunc=lexer.tokenfunc()))
+
+  def testTokenSlots(self):
+    '''Tests that tokens are allocated without an instance dict.'''
+    token = self.lexer.tokenize('[1]')[0]
+    self.assertFalse(hasattr(token, '__dict__'))
+    self.assertEquals(('BEGIN_ARRAY', 0, 1),
+                      (token.type, token.lexpos, token.lineno))
+
 
 class JsonParserTest(unittest.TestCase):
   '''Tests the JsonParser methods.'''
@@ -275,6 +389,37 @@ class JsonParserTest(unittest.TestCase):
     actual = self.parser.parse('[-1.23e-4]')
     self.assertEquals(-1.23e-4, actual[0])
 
+  def testFloatExponentPrecision(self):
+    '''Tests that floats are converted without losing precision.'''
+    actual = self.parser.parse('[12.34e-5, 9.95e-2]')
+    self.assertEquals([12.34e-5, 9.95e-2], actual)
+
+  def testLeadingZero(self):
+    '''Tests that leading zeroes are reported as errors.'''
+    self.parser.verbose = False
+    self.assertEquals(None, self.parser.parse('[01]'))
+    self.assertEquals(['Leading zeroes are not allowed.'], self.parser.errors)
+
+  def testReuseAfterStringError(self):
+    '''Tests that an error inside a string does not affect the next parse.'''
+    self.parser.verbose = False
+    self.parser.json_lexer.verbose = False
+    self.assertEquals(None, self.parser.parse('[1, "x\\q"]'))
+    self.assertEquals({'a': [1]}, self.parser.parse('{"a": [1]}'))
+
+  def testDecimalNumbers(self):
+    '''Tests that parse_float can return exact decimal values.'''
+    parser = jsonply.JsonParser(parse_float=decimal.Decimal)
+    actual = parser.parse('[0.1, 2, -3e2]')
+    self.assertEquals([decimal.Decimal('0.1'), 2, decimal.Decimal('-3e2')],
+                      actual)
+    self.assertTrue(isinstance(actual[1], int))
+
+  def testRawNumbers(self):
+    '''Tests that parse_float and parse_int can keep the raw text.'''
+    parser = jsonply.JsonParser(parse_float=str, parse_int=str)
+    self.assertEquals(['19.990', '-7'], parser.parse('[19.990, -7]'))
+
   def testArrayOfStrings(self):
     '''Tests that arrays can contain strings.'''
     actual = self.parser.parse('["a", "b", "c"]')
@@ -326,10 +471,950 @@ class JsonParserTest(unittest.TestCase):
     self.assertEquals({'a': True, 'b': [1, 2.3], 'c': {'d': None}}, actual)
 
 
+class DenseJsonParserTest(JsonParserTest):
+  '''Tests the JsonParser methods with dense parse tables.'''
+
+  def setUp(self):
+    self.parser = jsonply.JsonParser(dense=1)
+
+  def testIntegerTokenTypes(self):
+    '''Tests that the lexer produces integer token types.'''
+    tokens = self.parser.json_lexer.tokenize('[true]')
+    self.assertEquals([self.parser.parser.tokenids['BEGIN_ARRAY'],
+                       self.parser.parser.tokenids['TRUE'],
+                       self.parser.parser.tokenids['END_ARRAY']],
+                      [token.type for token in tokens])
+
+  def testSharedLexer(self):
+    '''Tests that a lexer passed in keeps producing token names.'''
+    lexer = jsonply.JsonLexer()
+    parser = jsonply.JsonParser(lexer=lexer, dense=1)
+    self.assertEquals(['BEGIN_ARRAY', 'NUMBER', 'END_ARRAY'],
+                      [token.type for token in lexer.tokenize('[1]')])
+    self.assertEquals([1], parser.parse('[1]'))
+    self.assertEquals([1], jsonply.JsonParser(lexer=lexer).parse('[1]'))
+
+  def testSyntaxErrors(self):
+    '''Tests that syntax errors are reported as with the dict tables.'''
+    parser = jsonply.JsonParser()
+    for parser in (parser, self.parser):
+      parser.verbose = False
+      self.assertEquals(None, parser.parse('{"a" 1}'))
+      self.assertEquals(1, len(parser.errors))
+
+  def testSyntaxErrorMessages(self):
+    '''Tests that syntax errors name the token as with the dict tables.'''
+    parser = jsonply.JsonParser()
+    for data in ('{"a" 1}', '[1 :]', '{"\\u00e9": 1 : 2}', '[1, 2'):
+      messages = list()
+      for parser in (parser, self.parser):
+        parser.verbose = False
+        parser.parse(data)
+        messages.append(parser.errors)
+      self.assertEquals(messages[0], messages[1])
+
+
+class FastJsonParserTest(JsonParserTest):
+  '''Tests the JsonParser methods with the fast engine.'''
+
+  def setUp(self):
+    self.parser = jsonply.JsonParser(engine='fast')
+
+  def testFastPath(self):
+    '''Tests that strict JSON is parsed without the LALR parser.'''
+    self.parser.parser = None
+    actual = self.parser.parse(' {"a": [1, -2.5e1, "b\\u30A4", {}], "c": null} ')
+    self.assertEquals({'a': [1, -25.0, u'b\u30A4', {}], 'c': None}, actual)
+
+  def testFallback(self):
+    '''Tests that texts the grammar accepts leniently use the LALR parser.'''
+    self.assertEquals([1, 2], self.parser.parse('[1 2]'))
+    self.assertEquals({'a': 1}, self.parser.parse('{"a": 1,}'))
+
+  def testDeepNesting(self):
+    '''Tests that texts too deep for the fast engine use the LALR parser.'''
+    data = '[' * 2000 + ']' * 2000
+    actual = self.parser.parse(data)
+    for i in range(1999):
+      actual = actual[0]
+    self.assertEquals([], actual)
+
+  def testUnknownEngine(self):
+    '''Tests that an unknown engine is rejected.'''
+    self.assertRaises(ValueError, jsonply.JsonParser, engine='slow')
+
+
+class BytesJsonParserTest(unittest.TestCase):
+  '''Tests the JsonParser with strings left as UTF-8 encoded bytes.'''
+
+  def setUp(self):
+    self.parser = jsonply.JsonParser(decode_strings=False)
+    self.parser.verbose = 0
+    self.parser.json_lexer.verbose = 0
+
+  def testString(self):
+    '''Tests that strings are returned as UTF-8 encoded str values.'''
+    actual = self.parser.parse('{"k\xc3\xa9y": ["v\xe3\x82\xa4", "plain"]}')
+    self.assertEquals({'k\xc3\xa9y': ['v\xe3\x82\xa4', 'plain']}, actual)
+    self.assertEquals(str, type(actual['k\xc3\xa9y'][1]))
+
+  def testEscapes(self):
+    '''Tests that escapes are UTF-8 encoded along with the string.'''
+    actual = self.parser.parse('["\xc3\xa9\\u30A4\\n\\""]')
+    self.assertEquals(['\xc3\xa9\xe3\x82\xa4\n"'], actual)
+
+  def testMalformedString(self):
+    '''Tests the strings that are parsed one fragment at a time.'''
+    actual = self.parser.parse('["a\xc3\xa9\t\\u00e9\\n"]')
+    self.assertEquals(['a\xc3\xa9\xc3\xa9\n'], actual)
+    parser = jsonply.JsonParser()
+    parser.verbose = 0
+    parser.json_lexer.verbose = 0
+    actual = parser.parse('["a\xc3\xa9\t\\u00e9\\n"]')
+    self.assertEquals([u'a\xe9\xe9\n'], actual)
+
+  def testLexerSetting(self):
+    '''Tests that a lexer passed in keeps its decode_strings setting.'''
+    lexer = jsonply.JsonLexer(decode_strings=False)
+    parser = jsonply.JsonParser(lexer=lexer)
+    self.assertEquals(False, lexer.decode_strings)
+    self.assertEquals(False, parser.decode_strings)
+    self.assertEquals(['\xc3\xa9'], parser.parse('["\xc3\xa9"]'))
+    parser = jsonply.JsonParser(lexer=lexer, decode_strings=True)
+    self.assertEquals(True, lexer.decode_strings)
+    self.assertEquals([u'\xe9'], parser.parse('["\xc3\xa9"]'))
+
+  def testUnicodeInput(self):
+    '''Tests that unicode input still produces unicode strings.'''
+    self.assertEquals([u'\xe9\n'], self.parser.parse(u'["\xe9\\n"]'))
+
+  def testFastEngine(self):
+    '''Tests that the fast engine also leaves strings undecoded.'''
+    parser = jsonply.JsonParser(engine='fast', decode_strings=False)
+    parser.parser = None
+    actual = parser.parse('{"\xc3\xa9": "\\u00e9"}')
+    self.assertEquals({'\xc3\xa9': '\xc3\xa9'}, actual)
+
+
+class KeyCacheTest(unittest.TestCase):
+  '''Tests the sharing of object member names through a KeyCache.'''
+
+  data = '[{"name": 1, "value": 2}, {"name": 3, "value": 4}]'
+
+  def assertShared(self, records):
+    first, second = [sorted(record) for record in records]
+    self.assertEquals(first, second)
+    for a, b in zip(first, second):
+      self.assertTrue(a is b)
+
+  def testParser(self):
+    '''Tests that the LALR parser shares repeated member names.'''
+    parser = jsonply.JsonParser(key_cache=16)
+    self.assertShared(parser.parse(self.data))
+    self.assertShared([parser.parse(self.data)[0],
+                       parser.clone().parse(self.data)[0]])
+
+  def testFastEngine(self):
+    '''Tests that the fast engine shares repeated member names.'''
+    parser = jsonply.JsonParser(engine='fast', key_cache=16)
+    parser.parser = None
+    self.assertShared(parser.parse(self.data))
+
+  def testBounded(self):
+    '''Tests that a full KeyCache is emptied.'''
+    cache = jsonply.KeyCache(2)
+    for key in (u'a', u'b', u'c'):
+      cache.intern(key)
+    self.assertEquals([u'c'], cache.keys.keys())
+
+  def testTypes(self):
+    '''Tests that an equal str is not returned for a unicode name.'''
+    cache = jsonply.KeyCache()
+    self.assertEquals(str, type(cache.intern('a')))
+    self.assertEquals(unicode, type(cache.intern(u'a')))
+
+
+class NumericArraysTest(unittest.TestCase):
+  '''Tests the JsonParser numeric_arrays option with both engines.'''
+
+  def parse(self, data):
+    results = list()
+    for engine in ('lalr', 'fast'):
+      parser = jsonply.JsonParser(engine=engine, numeric_arrays=True)
+      parser.verbose = False
+      parser.json_lexer.verbose = False
+      results.append(parser.parse(data))
+    self.assertEquals(repr(results[0]), repr(results[1]))
+    return results[0]
+
+  def testInts(self):
+    '''Tests that arrays of ints are array.array('l').'''
+    self.assertEquals(array.array('l', [1, -2, 3]), self.parse('[1, -2 ,3 ]'))
+    self.assertEquals(array.array('l', range(10000)),
+                      self.parse('[%s]' % ','.join(map(str, range(10000)))))
+
+  def testFloats(self):
+    '''Tests that arrays of ints and floats are array.array('d').'''
+    self.assertEquals(array.array('d', [1.0, 25.0, -0.5]),
+                      self.parse('[1, 2.5e1, -0.5]'))
+    data = '[%s, 0.5]' % ','.join(map(str, range(10000)))
+    self.assertEquals(array.array('d', range(10000) + [0.5]), self.parse(data))
+
+  def testLongsAmongFloats(self):
+    '''Tests that a long keeps an array with floats a list.'''
+    self.assertEquals([99999999999999999999, 0.5],
+                      self.parse('[99999999999999999999, 0.5]'))
+    self.assertEquals([0.5, 1, 99999999999999999999],
+                      self.parse('[0.5, 1, 99999999999999999999]'))
+    self.assertEquals(array.array('d', [0.5, 0.12345678901234567890]),
+                      self.parse('[0.5, 0.12345678901234567890]'))
+
+  def testNegativeZero(self):
+    '''Tests that the int -0 is 0.0 in an array of floats.'''
+    for data in ('[2.5, -0]', '[-0, 2.5]', '[-0 , 2.5, -0,-0]'):
+      actual = self.parse(data)
+      self.assertEquals('d', actual.typecode)
+      self.assertEquals(['0.0'], list(set([repr(value) for value in actual
+                                           if value == 0])))
+    self.assertEquals('-0.0', repr(self.parse('[2.5, -0.0]')[1]))
+    self.assertEquals('-0.0', repr(self.parse('[2.5, -0e3]')[1]))
+
+  def testOtherArrays(self):
+    '''Tests that other arrays are still lists.'''
+    actual = self.parse('{"a": [], "b": [true, 1], "c": [1, null],'
+                        ' "d": [99999999999999999999], "e": [1, "x"],'
+                        ' "f": [[1], [2.0]]}')
+    self.assertEquals([], actual['a'])
+    self.assertEquals([True, 1], actual['b'])
+    self.assertEquals([1, None], actual['c'])
+    self.assertEquals([99999999999999999999], actual['d'])
+    self.assertEquals([1, u'x'], actual['e'])
+    self.assertEquals([array.array('l', [1]), array.array('d', [2.0])],
+                      actual['f'])
+
+  def testErrors(self):
+    '''Tests that malformed arrays of numbers are still reported.'''
+    self.assertEquals(None, self.parse('[1, 01]'))
+    self.assertEquals(None, self.parse('[-, 1]'))
+    self.assertEquals(array.array('l', [1, 2]), self.parse('[1 2]'))
+
+
+class JsonParserFeedTest(unittest.TestCase):
+  '''Tests the JsonParser push-mode feed() and close() methods.'''
+
+  def setUp(self):
+    self.parser = jsonply.JsonParser()
+
+  def feedChunks(self, data, size):
+    for i in range(0, len(data), size):
+      self.parser.feed(data[i:i + size])
+    return self.parser.close()
+
+  def testFeedWhole(self):
+    '''Tests that a document fed in one chunk is parsed.'''
+    self.parser.feed('{"a": [1, 2.5, true]}')
+    self.assertEquals({'a': [1, 2.5, True]}, self.parser.close())
+
+  def testFeedSingleCharacters(self):
+    '''Tests that a document fed one character at a time is parsed.'''
+    data = '{"a": [-1.23e-4, "b\\u30A4", null, false], "c": {}}'
+    self.assertEquals(self.parser.parse(data), self.feedChunks(data, 1))
+
+  def testFeedSplitDigits(self):
+    '''Tests that numbers spanning chunk boundaries are parsed.'''
+    self.assertEquals([12345], self.feedChunks('[12345]', 3))
+
+  def testFeedSplitFraction(self):
+    '''Tests that numbers split before a fraction or exponent are parsed.'''
+    self.assertEquals([-1.5e-3], self.feedChunks('[-1.5e-3]', 3))
+
+  def testFeedSplitLiteral(self):
+    '''Tests that literals spanning chunk boundaries are parsed.'''
+    self.assertEquals([False], self.feedChunks('[false]', 4))
+
+  def testFeedSplitUnicodeEscape(self):
+    '''Tests that 'uXXXX' escapes spanning chunk boundaries are parsed.'''
+    self.assertEquals([u'\u30A4'], self.feedChunks('["\\u30A4"]', 5))
+
+  def testFeedSplitString(self):
+    '''Tests that strings spanning chunk boundaries are parsed.'''
+    self.assertEquals([u'abc\ndef', u'g'],
+                      self.feedChunks('["abc\\ndef", "g"]', 4))
+
+  def testFeedIncomplete(self):
+    '''Tests that an unterminated document returns None.'''
+    self.parser.feed('[1, 2')
+    self.assertEquals(None, self.parser.close())
+
+  def testFeedReuse(self):
+    '''Tests that the parser can be fed another document after close().'''
+    self.feedChunks('[1]', 1)
+    self.assertEquals({'a': 'b'}, self.feedChunks('{"a": "b"}', 2))
+
+  def testFeedReuseAfterException(self):
+    '''Tests that the parser can be fed another document after a failure.'''
+    for size in (1, 3, 100):
+      self.assertRaises(UnicodeDecodeError, self.feedChunks, '["\xff"]', size)
+      self.assertFalse(self.parser.feeding)
+      self.assertEquals('', self.parser.json_lexer.buffer)
+      self.assertEquals([1], self.feedChunks('[1]', size))
+
+
+class ParseLazyTest(unittest.TestCase):
+  '''Tests the jsonply.parse_lazy function.'''
+
+  data = (' {"a": [1, 2.5, {"b": null}, []], "c": "x\\u00e9\\"",'
+          ' "d": {}, "e": [true, false]} ')
+
+  def testValues(self):
+    '''Tests that the lazy values are equal to the parsed ones.'''
+    actual = jsonply.parse_lazy(self.data)
+    self.assertTrue(isinstance(actual, jsonply.LazyObject))
+    self.assertTrue(isinstance(actual['a'], jsonply.LazyArray))
+    self.assertEquals(jsonply.parse(self.data), actual)
+    self.assertEquals(u'x\xe9"', actual['c'])
+    self.assertEquals([], actual['a'][-1])
+    self.assertEquals([1, 2.5], actual['a'][:2])
+    self.assertEquals(0, len(actual['d']))
+    self.assertEquals(None, actual.get('z'))
+
+  def testIndexRange(self):
+    '''Tests that indices outside an array raise an IndexError.'''
+    actual = jsonply.parse_lazy('[1, 2, 3]')
+    self.assertEquals(1, actual[-3])
+    self.assertRaises(IndexError, actual.__getitem__, -4)
+    self.assertRaises(IndexError, actual.__getitem__, 3)
+
+  def testOnDemand(self):
+    '''Tests that a nested container is only scanned when it is used.'''
+    actual = jsonply.parse_lazy(self.data)
+    a = actual['a']
+    self.assertEquals(None, a.index)
+    self.assertEquals(2.5, a[1])
+    self.assertEquals(4, len(a.index))
+    self.assertEquals(None, a[2].index)
+    self.assertTrue(a is actual['a'])
+
+  def testLenient(self):
+    '''Tests that a container that is not strict JSON is parsed eagerly.'''
+    actual = jsonply.parse_lazy('{"a": [1 2], "b": {"c": 3,}}')
+    self.assertEquals([1, 2], actual['a'])
+    self.assertEquals({'c': 3}, actual['b'])
+
+  def testMalformed(self):
+    '''Tests that malformed text is reported when it is reached.'''
+    self.assertRaises(SyntaxError, jsonply.parse_lazy, '[1')
+    self.assertRaises(SyntaxError, jsonply.parse_lazy, '[1] x')
+    self.assertRaises(SyntaxError, jsonply.parse_lazy, '1')
+    actual = jsonply.parse_lazy('[1, nul, 01]')
+    self.assertEquals(1, actual[0])
+    self.assertRaises(SyntaxError, actual.__getitem__, 1)
+    self.assertRaises(SyntaxError, actual.__getitem__, 2)
+
+
+class ParseColumnsTest(unittest.TestCase):
+  '''Tests the jsonply.parse_columns function.'''
+
+  data = (' [{"ts": 1, "v": 1.5, "x": [1, {}]}, {"v": 2, "ts": 2, "n": "a"},'
+          ' {"ts": 3, "v": -1e3, "v": 7, "b": true}] ')
+
+  def testAllFields(self):
+    '''Tests that every member name gets a column.'''
+    self.assertEquals({'ts': [1, 2, 3], 'v': [1.5, 2, 7],
+                       'x': [[1, {}], None, None], 'n': [None, u'a', None],
+                       'b': [None, None, True]},
+                      jsonply.parse_columns(self.data))
+
+  def testFields(self):
+    '''Tests that only the given member names are collected.'''
+    self.assertEquals({'ts': [1, 2, 3], 'n': [None, u'a', None]},
+                      jsonply.parse_columns(self.data, ['ts', 'n']))
+    self.assertEquals({'a': []}, jsonply.parse_columns('[]', ['a']))
+
+  def testArrays(self):
+    '''Tests the columns with array typecodes.'''
+    actual = jsonply.parse_columns(self.data, {'ts': 'l', 'v': 'd', 'x': None})
+    self.assertEquals(array.array('l', [1, 2, 3]), actual['ts'])
+    self.assertEquals(array.array('d', [1.5, 2.0, 7.0]), actual['v'])
+    self.assertEquals([[1, {}], None, None], actual['x'])
+    self.assertRaises(ValueError, jsonply.parse_columns,
+                      '[{"ts": 1}, {}]', {'ts': 'l'})
+
+  def testLenient(self):
+    '''Tests that text that is not strict JSON uses the JsonParser.'''
+    self.assertEquals({'a': [1, 2]},
+                      jsonply.parse_columns('[{"a": 1} {"a": 2,}]', ['a']))
+
+  def testErrors(self):
+    '''Tests the texts that are not arrays of objects.'''
+    self.assertRaises(ValueError, jsonply.parse_columns, '[1]')
+    self.assertRaises(ValueError, jsonply.parse_columns, '{}')
+    self.assertRaises(SyntaxError, jsonply.parse_columns, '[{"a": nul}]')
+
+  def testSkippedErrors(self):
+    '''Tests that members that are not collected are still checked.'''
+    for text in ['[{"a": 1, "b": nul}]', '[{"a": 1, "b": {"x" 1}}]',
+                 '[{"a": 1, "b": [01]}]', '[{"a": 1, "b": [1, "x\\q"]}]',
+                 '[{"a": 1, "b": [[[}]]}]']:
+      self.assertRaises(SyntaxError, jsonply.parse_columns, text, ['a'])
+    self.assertEquals({'a': [1]},
+                      jsonply.parse_columns('[{"a": 1, "b": [{"c": [true,'
+                                            ' null, -1.5e3, "\\n"]}, {}]}]',
+                                            ['a']))
+
+  def testArrayValueErrors(self):
+    '''Tests that a value that does not fit an array column is reported.'''
+    for text in ['[{"ts": 1}, {"ts": null}]', '[{"ts": 1}, {"ts": [1 2]}]']:
+      try:
+        jsonply.parse_columns(text, {'ts': 'd'})
+      except ValueError, e:
+        self.assertTrue('Record 1' in str(e))
+        self.assertTrue("'ts'" in str(e))
+      else:
+        self.fail('No ValueError for %r' % text)
+
+
+class QueryTest(unittest.TestCase):
+  '''Tests the jsonply.query and jsonply.query_many functions.'''
+
+  data = ('{"data": {"items": [{"id": 0}, {"id": 1, "x": [1, 2]}, {"id": 2},'
+          ' {"id": 3, "n": "\\u00e9"}], "a/b": 5, "m~n": 6}, "z": 1}')
+
+  def testQuery(self):
+    '''Tests the resolution of single pointers.'''
+    self.assertEquals(3, jsonply.query(self.data, '/data/items/3/id'))
+    self.assertEquals(u'\xe9', jsonply.query(self.data, '/data/items/3/n'))
+    self.assertEquals([1, 2], jsonply.query(self.data, '/data/items/1/x'))
+    self.assertEquals(5, jsonply.query(self.data, '/data/a~1b'))
+    self.assertEquals(6, jsonply.query(self.data, '/data/m~0n'))
+    self.assertEquals(jsonply.parse(self.data), jsonply.query(self.data, ''))
+
+  def testMissing(self):
+    '''Tests that pointers without a value give the default.'''
+    self.assertEquals(None, jsonply.query(self.data, '/nothing'))
+    self.assertEquals(-1, jsonply.query(self.data, '/data/items/4', -1))
+    self.assertEquals(-1, jsonply.query(self.data, '/data/items/03', -1))
+    self.assertEquals(-1, jsonply.query(self.data, '/z/0', -1))
+
+  def testQueryMany(self):
+    '''Tests that nested and overlapping pointers are all resolved.'''
+    actual = jsonply.query_many(self.data, ['/z', '/data/items/1',
+                                            '/data/items/1/x/1', '/none'])
+    self.assertEquals([1, {'id': 1, 'x': [1, 2]}, 2, None], actual)
+
+  def testDuplicateNames(self):
+    '''Tests that a repeated member name does not end the query early.'''
+    self.assertEquals([2, 3], jsonply.query_many('{"a": 1, "a": 2, "b": 3}',
+                                                 ['/a', '/b']))
+
+  def testSkipEscapedQuotationMark(self):
+    '''Tests that a skipped string may hold an escaped quotation mark.'''
+    data = '{"x": "a\\"b\\\\", "z": ["\\"\\\\\\""], "y": 2}'
+    self.assertEquals(2, jsonply.query(data, '/y'))
+    self.assertEquals(2, jsonply.query(StringIO.StringIO(data), '/y',
+                                       chunksize=1))
+    # A string with a control character is lexed one fragment at a time
+    self.assertEquals(2, jsonply.query('{"x": "a\tb\\"c", "y": 2}', '/y'))
+
+  def testLenientSeparators(self):
+    '''Tests that queries accept the same separators as parse().'''
+    data = '{"a": [1, 2,], "b": {"c": 3 "d": [4 5]}, "e": 6,}'
+    self.assertEquals([1, 2], jsonply.query(data, '/a'))
+    self.assertEquals(2, jsonply.query(data, '/a/1'))
+    self.assertEquals({'c': 3, 'd': [4, 5]}, jsonply.query(data, '/b'))
+    self.assertEquals(5, jsonply.query(data, '/b/d/1'))
+    self.assertEquals(6, jsonply.query(data, '/e'))
+    self.assertRaises(SyntaxError, jsonply.query, '[, 1]', '/0')
+    self.assertRaises(SyntaxError, jsonply.query, '[1,, 2]', '/1')
+    self.assertRaises(SyntaxError, jsonply.query, '{, "a": 1}', '/a')
+    self.assertRaises(SyntaxError, jsonply.query, '{"a": [1,, 2]}', '/a')
+
+  def testStopsEarly(self):
+    '''Tests that reading stops once every pointer is resolved.'''
+    f = StringIO.StringIO('{"a": 1, "b": [%s]}' % ', '.join(['1'] * 1000))
+    self.assertEquals(1, jsonply.query(f, '/a', chunksize=8))
+    self.assertTrue(f.tell() < 100)
+
+  def testErrors(self):
+    '''Tests the reporting of bad pointers and malformed text.'''
+    self.assertRaises(ValueError, jsonply.query, self.data, 'data')
+    self.assertRaises(SyntaxError, jsonply.query, '{"a": [1, 2', '/b')
+    self.assertRaises(SyntaxError, jsonply.query, '{"a" 1}', '/a')
+
+
+class DumpTest(unittest.TestCase):
+  '''Tests the jsonply.dump and jsonply.dumps functions.'''
+
+  value = {u'a\xe9': [1, -2.5, True, False, None, 10 ** 20],
+           'b': {'c': u'q"\\/\n\t\x01\u30a4\x7f', 'd': []},
+           'e': 'caf\xc3\xa9'}
+
+  def testRoundTrip(self):
+    '''Tests that the text of a value parses back to the value.'''
+    for iterative in (False, True):
+      text = jsonply.dumps(self.value, iterative=iterative)
+      self.assertEquals(str, type(text))
+      expected = dict(self.value)
+      expected['e'] = u'caf\xe9'
+      self.assertEquals(expected, jsonply.parse(text))
+
+  def testScalars(self):
+    '''Tests the text of each kind of scalar.'''
+    self.assertEquals('[1,2.5,true,false,null]',
+                      jsonply.dumps([1, 2.5, True, False, None]))
+    self.assertEquals('["\\"\\\\\\n\\u0001\\u00e9\\ud83d\\ude00"]',
+                      jsonply.dumps([u'"\\\n\x01\xe9\U0001F600']))
+    self.assertEquals('[1.10]', jsonply.dumps([decimal.Decimal('1.10')]))
+    self.assertEquals('[[1],{}]', jsonply.dumps(((1,), {})))
+
+  def testDump(self):
+    '''Tests that dump writes the same text in chunks.'''
+    writes = list()
+    class File(object):
+      def write(self, chunk):
+        writes.append(chunk)
+    value = [{'a': i} for i in range(100)]
+    jsonply.dump(value, File(), bufsize=16)
+    self.assertTrue(len(writes) > 1)
+    self.assertEquals(jsonply.dumps(value), ''.join(writes))
+
+  def testDeep(self):
+    '''Tests that the iterative mode has no limit on depth.'''
+    value = list()
+    for i in range(sys.getrecursionlimit() * 2):
+      value = [value]
+    text = jsonply.dumps(value, iterative=True)
+    self.assertEquals('[' * (len(text) / 2) + ']' * (len(text) / 2), text)
+    self.assertRaises(RuntimeError, jsonply.dumps, value)
+
+  def testLazy(self):
+    '''Tests that the proxies of parse_lazy can be written.'''
+    text = '{"a":[1,{"b":2}]}'
+    self.assertEquals(text, jsonply.dumps(jsonply.parse_lazy(text)))
+
+  def testNumericArrays(self):
+    '''Tests that array.array values from the parser can be written.'''
+    text = '{"a":[1,2,3],"b":[0.5,2.0],"c":[]}'
+    value = jsonply.JsonParser(numeric_arrays=True).parse(text)
+    self.assertEquals(array.array('l', [1, 2, 3]), value['a'])
+    columns = jsonply.parse_columns('[{"x": 1, "y": 0.5}, {"x": 2, "y": 1}]',
+                                    {'x': 'l', 'y': 'd'})
+    for iterative in (False, True):
+      self.assertEquals({'a': [1, 2, 3], 'b': [0.5, 2.0], 'c': []},
+                        jsonply.parse(jsonply.dumps(value, iterative)))
+      self.assertEquals({'x': [1, 2], 'y': [0.5, 1.0]},
+                        jsonply.parse(jsonply.dumps(columns, iterative)))
+
+  def testErrors(self):
+    '''Tests the values that have no JSON representation.'''
+    for iterative in (False, True):
+      cycle = list()
+      cycle.append(cycle)
+      self.assertRaises(ValueError, jsonply.dumps, cycle, iterative)
+      self.assertRaises(ValueError, jsonply.dumps, [float('nan')], iterative)
+      self.assertRaises(TypeError, jsonply.dumps, [object()], iterative)
+      self.assertRaises(TypeError, jsonply.dumps, {1: 2}, iterative)
+
+
+class IterParseTest(unittest.TestCase):
+  '''Tests the module-level iterparse method.'''
+
+  def testEvents(self):
+    '''Tests that each kind of value generates the right events.'''
+    actual = list(jsonply.iterparse(
+        '{"a": [1, -2.5e2, "b", true, false, null], "c": {}}'))
+    self.assertEquals([('start_map', None),
+                       ('map_key', 'a'),
+                       ('start_array', None),
+                       ('number', 1),
+                       ('number', -250.0),
+                       ('string', 'b'),
+                       ('boolean', True),
+                       ('boolean', False),
+                       ('null', None),
+                       ('end_array', None),
+                       ('map_key', 'c'),
+                       ('start_map', None),
+                       ('end_map', None),
+                       ('end_map', None)], actual)
+
+  def testEscapedKey(self):
+    '''Tests that escaped member names are decoded.'''
+    actual = list(jsonply.iterparse('{"\\u30A4\\n": 1}'))
+    self.assertEquals(('map_key', u'\u30A4\n'), actual[1])
+
+  def testFile(self):
+    '''Tests that file-like objects read in chunks generate events.'''
+    data = '[12345, "abcdef", {"g": null}]'
+    actual = list(jsonply.iterparse(StringIO.StringIO(data), chunksize=2))
+    self.assertEquals(list(jsonply.iterparse(data)), actual)
+
+  def testEscapedQuotationMark(self):
+    '''Tests that an escaped quotation mark does not end a string.'''
+    data = '{"x": "a\\"bcdefghijkl", "y\\"": ["\\\\", 2]}'
+    expected = [('start_map', None), ('map_key', u'x'),
+                ('string', u'a"bcdefghijkl'), ('map_key', u'y"'),
+                ('start_array', None), ('string', u'\\'), ('number', 2),
+                ('end_array', None), ('end_map', None)]
+    self.assertEquals(expected, list(jsonply.iterparse(
+        StringIO.StringIO(data), chunksize=1)))
+    # A string with a control character is lexed one fragment at a time
+    json_lexer = jsonply.JsonLexer()
+    json_lexer.verbose = False
+    actual = list(jsonply._iter_events(jsonply._iter_tokens(
+        '["a\tb\\"c"]', json_lexer)))
+    parser = jsonply.JsonParser(lexer=json_lexer)
+    self.assertEquals(('string', parser.parse('["a\tb\\"c"]')[0]),
+                      actual[1])
+
+  def testMismatchedBrackets(self):
+    '''Tests that mismatched brackets raise a SyntaxError.'''
+    self.assertRaises(SyntaxError, list, jsonply.iterparse('[1}'))
+
+  def testUnterminated(self):
+    '''Tests that an unterminated document raises a SyntaxError.'''
+    self.assertRaises(SyntaxError, list, jsonply.iterparse('[1, 2'))
+
+  def testLeadingZero(self):
+    '''Tests that leading zeroes raise a SyntaxError.'''
+    self.assertRaises(SyntaxError, list, jsonply.iterparse('[01]'))
+
+  def testMalformedMembers(self):
+    '''Tests that members out of the grammar's order raise a SyntaxError.'''
+    for text in ['{"a": }', '{"a":1 "b"}', '{"a" 1}', '{1: 2}', '[:]',
+                 '{"a": 1, 2}', '[,1]', '[1,,2]', '{,}', '{"a": 1,,}',
+                 '{"a": 1 2}', '[1, "a": 2]']:
+      self.assertRaises(SyntaxError, list, jsonply.iterparse(text))
+
+  def testLenientSeparators(self):
+    '''Tests that the separators the grammar allows to be left out are.'''
+    for text in ['[1 2]', '[1, 2,]', '[1 2,]']:
+      self.assertEquals([('start_array', None), ('number', 1), ('number', 2),
+                         ('end_array', None)], list(jsonply.iterparse(text)))
+    for text in ['{"a": 1 "b": []}', '{"a": 1, "b": [],}']:
+      self.assertEquals([('start_map', None), ('map_key', 'a'),
+                         ('number', 1), ('map_key', 'b'),
+                         ('start_array', None), ('end_array', None),
+                         ('end_map', None)], list(jsonply.iterparse(text)))
+    self.assertEquals([('start_array', None), ('start_array', None),
+                       ('end_array', None), ('start_map', None),
+                       ('end_map', None), ('string', 'd'), ('end_array', None)],
+                      list(jsonply.iterparse('[[] {} "d",]')))
+
+  def testTopLevel(self):
+    '''Tests that the text must be exactly one object or array.'''
+    for text in ['1', '"a"', 'null', '', '[1] [2]', '{} 1', '[1]]']:
+      self.assertRaises(SyntaxError, list, jsonply.iterparse(text))
+
+
+class ParseLinesTest(unittest.TestCase):
+  '''Tests the module-level parse_lines method.'''
+
+  def parseLines(self, data, **kwargs):
+    return list(jsonply.parse_lines(StringIO.StringIO(data), **kwargs))
+
+  def testRecords(self):
+    '''Tests that each line is parsed as a separate record.'''
+    actual = self.parseLines('{"a": 1}\n[1, 2]\n["b"]\n')
+    self.assertEquals([(1, {'a': 1}, None),
+                       (2, [1, 2], None),
+                       (3, ['b'], None)], actual)
+
+  def testMissingFinalNewline(self):
+    '''Tests that the last record does not need a trailing newline.'''
+    self.assertEquals([(1, [1], None), (2, [2], None)],
+                      self.parseLines('[1]\n[2]'))
+
+  def testBlankLines(self):
+    '''Tests that blank lines are skipped but counted.'''
+    self.assertEquals([(3, [1], None)], self.parseLines('\n \t\r\n[1]\n'))
+
+  def testSmallChunks(self):
+    '''Tests that records spanning chunks are parsed.'''
+    actual = self.parseLines('{"abc": [1, 2, 3]}\n[true]\n', chunksize=4)
+    self.assertEquals([(1, {'abc': [1, 2, 3]}, None), (2, [True], None)],
+                      actual)
+
+  def testErrorIsolation(self):
+    '''Tests that a malformed record does not affect the following ones.'''
+    actual = self.parseLines('[1]\n{"a": "b\n[01]\n[2]\n')
+    self.assertEquals((1, [1], None), actual[0])
+    self.assertEquals(2, actual[1][0])
+    self.assertEquals(None, actual[1][1])
+    self.assertNotEquals(None, actual[1][2])
+    self.assertEquals((3, None, 'Leading zeroes are not allowed.'), actual[2])
+    self.assertEquals((4, [2], None), actual[3])
+
+  def testDecodeErrorIsolation(self):
+    '''Tests that a record that is not valid UTF-8 is reported alone.'''
+    stats = jsonply.ParseStats()
+    actual = self.parseLines('[1]\n["\xff"]\n[2]\n', stats=stats)
+    self.assertEquals((1, [1], None), actual[0])
+    self.assertEquals(2, actual[1][0])
+    self.assertEquals(None, actual[1][1])
+    self.assertTrue('decode' in actual[1][2])
+    self.assertEquals((3, [2], None), actual[2])
+    self.assertEquals(3, stats.records)
+    self.assertEquals(1, stats.errors)
+
+  def testStats(self):
+    '''Tests that the throughput counters are updated.'''
+    data = '[1]\n\n[tru]\n[2]\n'
+    stats = jsonply.ParseStats()
+    self.parseLines(data, stats=stats)
+    self.assertEquals(3, stats.records)
+    self.assertEquals(1, stats.errors)
+    self.assertEquals(len(data), stats.bytes)
+
+
+class ParserPoolTest(unittest.TestCase):
+  '''Tests the ParserPool and JsonParser.clone() methods.'''
+
+  def testCloneIsIndependent(self):
+    '''Tests that a clone does not share parse state with its original.'''
+    parser = jsonply.JsonParser()
+    clone = parser.clone()
+    parser.feed('{"a": [1, ')
+    clone.feed('["b"]')
+    self.assertEquals(['b'], clone.close())
+    parser.feed('2]}')
+    self.assertEquals({'a': [1, 2]}, parser.close())
+
+  def testCloneErrors(self):
+    '''Tests that a clone collects its own errors.'''
+    parser = jsonply.JsonParser()
+    parser.verbose = False
+    clone = parser.clone()
+    clone.parse('[01]')
+    self.assertEquals([], parser.errors)
+    self.assertEquals(['Leading zeroes are not allowed.'], clone.errors)
+
+  def testReentrantParse(self):
+    '''Tests that a pool parser can be used from within a parse.'''
+    pool = jsonply.ParserPool(
+        parse_float=lambda text: pool.parse('[%s]' % text[:-2])[0])
+    self.assertEquals([1, {'a': 2}], pool.parse('[1.5, {"a": 2.5}]'))
+
+  def testParseFileAfterException(self):
+    '''Tests that a failed parse_file leaves its parser usable.'''
+    pool = jsonply.ParserPool()
+    self.assertRaises(UnicodeDecodeError, pool.parse_file,
+                      StringIO.StringIO('["\xff"]'), 2)
+    self.assertEquals([1], pool.parse_file(StringIO.StringIO('[1]'), 2))
+
+  def testThreads(self):
+    '''Tests that threads can parse concurrently.'''
+    failures = list()
+    def worker(n):
+      data = '[%s]' % ', '.join(['{"n": %d, "s": "%d"}' % (n, n)] * 100)
+      for i in range(20):
+        if jsonply.parse(data) != [{'n': n, 's': str(n)}] * 100:
+          failures.append(n)
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    self.assertEquals([], failures)
+
+
+class ParseCacheTest(unittest.TestCase):
+  '''Tests the jsonply.ParseCache class.'''
+
+  def testHits(self):
+    '''Tests that a repeated text is answered from the cache.'''
+    cache = jsonply.ParseCache()
+    self.assertEquals({'a': [1, 2]}, cache.parse('{"a": [1, 2]}'))
+    self.assertEquals({'a': [1, 2]}, cache.parse('{"a": [1, 2]}'))
+    self.assertEquals((1, 1), (cache.hits, cache.misses))
+    self.assertEquals(0.5, cache.hit_rate())
+
+  def testCopy(self):
+    '''Tests that callers can not change the cached values.'''
+    cache = jsonply.ParseCache()
+    cache.parse('{"a": [1, {"b": 2}]}')['a'].append(3)
+    value = cache.parse('{"a": [1, {"b": 2}]}')
+    value['a'][1]['b'] = 3
+    self.assertEquals({'a': [1, {'b': 2}]}, cache.parse('{"a": [1, {"b": 2}]}'))
+    shared = jsonply.ParseCache(copy=False)
+    self.assertTrue(shared.parse('[[1]]') is shared.parse('[[1]]'))
+
+  def testEviction(self):
+    '''Tests that the least recently used results are evicted.'''
+    cache = jsonply.ParseCache(max_entries=2)
+    for data in ('[1]', '[2]', '[1]', '[3]'):
+      cache.parse(data)
+    self.assertEquals(['[1]', '[3]'], cache.entries.keys())
+    self.assertEquals(1, cache.evictions)
+    cache = jsonply.ParseCache(max_bytes=8)
+    for data in ('[1]', '[22]', '[333]', '[4444444444]'):
+      cache.parse(data)
+    self.assertEquals(['[333]'], cache.entries.keys())
+    self.assertEquals(5, cache.bytes)
+
+  def testUnicodeBytes(self):
+    '''Tests that unicode texts are measured by their UTF-8 encoding.'''
+    cache = jsonply.ParseCache(max_bytes=8)
+    self.assertEquals([u'\u30A4'], cache.parse(u'["\u30A4"]'))
+    self.assertEquals(7, cache.bytes)
+    # Five characters, but ten bytes
+    cache.parse(u'["\u30A4\u30A4"]')
+    self.assertEquals([u'["\u30A4"]'], cache.entries.keys())
+    cache.parse(u'["\xe9"]')
+    self.assertEquals([u'["\xe9"]'], cache.entries.keys())
+    self.assertEquals(6, cache.bytes)
+
+  def testErrors(self):
+    '''Tests that malformed texts are not cached.'''
+    parser_pool = jsonply.ParserPool()
+    parser = parser_pool.acquire()
+    parser.verbose = False
+    parser_pool.release(parser)
+    cache = jsonply.ParseCache(parser_pool=parser_pool)
+    self.assertEquals(None, cache.parse('[1'))
+    self.assertEquals(0, len(cache.entries))
+
+
+class ParseManyTest(unittest.TestCase):
+  '''Tests the module-level parse_many method.'''
+
+  def testOrder(self):
+    '''Tests that results come back in the order of the input.'''
+    texts = ['[%d]' % i for i in range(200)]
+    actual = list(jsonply.parse_many(texts, workers=2, chunksize=7))
+    self.assertEquals([([i], None) for i in range(200)], actual)
+
+  def testErrors(self):
+    '''Tests that a malformed text only affects its own result.'''
+    actual = list(jsonply.parse_many(['[1]', '[01]', '{"a"', '[2]'],
+                                     workers=2, chunksize=1))
+    self.assertEquals(([1], None), actual[0])
+    self.assertEquals((None, 'Leading zeroes are not allowed.'), actual[1])
+    self.assertEquals(None, actual[2][0])
+    self.assertNotEquals(None, actual[2][1])
+    self.assertEquals(([2], None), actual[3])
+
+  def testDecodeErrors(self):
+    '''Tests that a text that is not valid UTF-8 only fails its own result.'''
+    actual = list(jsonply.parse_many(['[1]', '["\xff"]', '[2]'],
+                                     workers=2, chunksize=1))
+    self.assertEquals(([1], None), actual[0])
+    self.assertEquals(None, actual[1][0])
+    self.assertTrue('decode' in actual[1][1])
+    self.assertEquals(([2], None), actual[2])
+
+  def testParserArguments(self):
+    '''Tests that keyword arguments are passed to each worker's parser.'''
+    actual = list(jsonply.parse_many(['[1.5]'], workers=1, parse_float=str))
+    self.assertEquals([(['1.5'], None)], actual)
+
+
+class TablesTest(unittest.TestCase):
+  '''Tests that the prebuilt tables match the JsonLexer and JsonParser.'''
+
+  def lexRules(self, lexer):
+    # Rules of the same length may be in any order in the master regexes
+    rules = dict()
+    for state, texts in lexer.lexer.lexstateretext.items():
+      rules[state] = sorted('|'.join(texts).split('|(?P<'))
+    return rules
+
+  def testLexTable(self):
+    '''Tests that jsonply_lextab matches the JsonLexer rules.'''
+    built = jsonply.JsonLexer(optimize=0, lextab=None)
+    loaded = jsonply.JsonLexer()
+    self.assertEquals(self.lexRules(built), self.lexRules(loaded))
+
+  def testParseTable(self):
+    '''Tests that jsonply_parsetab matches the JsonParser grammar.'''
+    parser = jsonply.JsonParser()
+    pinfo = ply.yacc.ParserReflect(
+        dict([(name, getattr(parser, name)) for name in dir(parser)]))
+    pinfo.get_all()
+    self.assertEquals(jsonply_parsetab._lr_signature, pinfo.signature())
+
+  def testWriteModule(self):
+    '''Tests that a generated parser module parses like the LRParser.'''
+    tmpdir = tempfile.mkdtemp()
+    sys.path.insert(0, tmpdir)
+    try:
+      parser = jsonply.JsonParser()
+      parser.verbose = False
+      parser.parser.write_module('jsonply_testparser', tmpdir)
+      import jsonply_testparser
+      generated = jsonply_testparser.Parser(parser)
+      for data in ['{"a": [1, 2.5e1, "b\\n", true, false, null, {}, []]}',
+                   '[]', '{"a" 1}', '[01]', '[1, 2']:
+        expected = parser.parse(data)
+        errors = list(parser.errors)
+        del parser.errors[:]
+        self.assertEquals(expected,
+                          generated.parse(data, lexer=parser.lexer))
+        self.assertEquals(errors, parser.errors)
+    finally:
+      sys.path.remove(tmpdir)
+      sys.modules.pop('jsonply_testparser', None)
+      shutil.rmtree(tmpdir)
+
+  def testPickleTables(self):
+    '''Tests that binary table files are written and read back.'''
+    tmpdir = tempfile.mkdtemp()
+    try:
+      lexfile = os.path.join(tmpdir, 'lextab.pickle')
+      parsefile = os.path.join(tmpdir, 'parsetab.pickle')
+      for i in range(2):
+        lexer = jsonply.JsonLexer(optimize=0, picklefile=lexfile)
+        parser = jsonply.JsonParser(lexer=lexer, optimize=0,
+                                    picklefile=parsefile)
+        self.assertEquals({'a': [1, u'\u30A4']},
+                          parser.parse('{"a": [1, "\\u30A4"]}'))
+        self.assertEquals(['lextab.pickle', 'parsetab.pickle'],
+                          sorted(os.listdir(tmpdir)))
+      self.assertEquals(self.lexRules(jsonply.JsonLexer()),
+                        self.lexRules(lexer))
+    finally:
+      shutil.rmtree(tmpdir)
+
+  def testPickleTablesOutputdir(self):
+    '''Tests that relative binary table files are kept in outputdir.'''
+    tmpdir = tempfile.mkdtemp()
+    try:
+      for i in range(2):
+        lexer = jsonply.JsonLexer(optimize=0, outputdir=tmpdir,
+                                  picklefile='lextab.pickle')
+        parser = jsonply.JsonParser(lexer=lexer, optimize=0, outputdir=tmpdir,
+                                    picklefile='parsetab.pickle')
+        self.assertEquals({'a': [1, u'\u30A4']},
+                          parser.parse('{"a": [1, "\\u30A4"]}'))
+        self.assertEquals(['lextab.pickle', 'parsetab.pickle'],
+                          sorted(os.listdir(tmpdir)))
+        self.failIf(os.path.exists('lextab.pickle'))
+        self.failIf(os.path.exists('parsetab.pickle'))
+    finally:
+      shutil.rmtree(tmpdir)
+
+
 def suite():
   suite = unittest.TestSuite()
   suite.addTests(unittest.makeSuite(JsonPlyTest))
+  suite.addTests(unittest.makeSuite(JsonLexerTest))
   suite.addTests(unittest.makeSuite(JsonParserTest))
+  suite.addTests(unittest.makeSuite(DenseJsonParserTest))
+  suite.addTests(unittest.makeSuite(FastJsonParserTest))
+  suite.addTests(unittest.makeSuite(BytesJsonParserTest))
+  suite.addTests(unittest.makeSuite(KeyCacheTest))
+  suite.addTests(unittest.makeSuite(NumericArraysTest))
+  suite.addTests(unittest.makeSuite(JsonParserFeedTest))
+  suite.addTests(unittest.makeSuite(ParseLazyTest))
+  suite.addTests(unittest.makeSuite(ParseColumnsTest))
+  suite.addTests(unittest.makeSuite(QueryTest))
+  suite.addTests(unittest.makeSuite(DumpTest))
+  suite.addTests(unittest.makeSuite(IterParseTest))
+  suite.addTests(unittest.makeSuite(ParseLinesTest))
+  suite.addTests(unittest.makeSuite(ParserPoolTest))
+  suite.addTests(unittest.makeSuite(ParseCacheTest))
+  suite.addTests(unittest.makeSuite(ParseManyTest))
+  suite.addTests(unittest.makeSuite(TablesTest))
   return suite
 
 if __name__ == '__main__':
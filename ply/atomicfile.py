@@ -0,0 +1,57 @@
+# -----------------------------------------------------------------------------
+# ply: atomicfile.py
+#
+# Author: David M. Beazley (dave@dabeaz.com)
+#
+# Copyright (C) 2001-2009, David M. Beazley
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+# See the file COPYING for a complete copy of the LGPL.
+# -----------------------------------------------------------------------------
+#
+# Helpers shared by lex.py and yacc.py for writing binary table files.
+# -----------------------------------------------------------------------------
+
+import os, tempfile
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+# -----------------------------------------------------------------------------
+# atomic_dump()
+#
+# Pickle an object to a file by writing it to a temporary file in the same
+# directory and renaming that over the target, so that a concurrent reader
+# never sees a partial file.
+# -----------------------------------------------------------------------------
+
+def atomic_dump(filename,obj):
+    fd, tmpname = tempfile.mkstemp(dir=os.path.dirname(filename) or ".")
+    try:
+        f = os.fdopen(fd,"wb")
+        try:
+            pickle.dump(obj,f,pickle.HIGHEST_PROTOCOL)
+        finally:
+            f.close()
+        if os.name == "nt" and os.path.exists(filename):
+            # Windows cannot rename over an existing file
+            os.remove(filename)
+        os.rename(tmpname,filename)
+    except:
+        os.remove(tmpname)
+        raise
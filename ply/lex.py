@@ -25,7 +25,18 @@
 __version__    = "3.0"
 __tabversion__ = "3.0"       # Version of table file used
 
-import re, sys, types, copy, os
+import re, sys, types, copy, os, functools
+
+# Python 2.x/3.0 compatibility.
+if sys.version_info[0] < 3:
+    from atomicfile import atomic_dump
+else:
+    from ply.atomicfile import atomic_dump
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
 
 # This tuple contains known string types
 try:
@@ -57,7 +68,12 @@ class LexError(Exception):
          self.text = s
 
 # Token class.  This class is used to represent the tokens produced.
+# One is allocated for every token, so it has __slots__ rather than a
+# per-instance __dict__, and token rules may only set the attributes
+# listed there.
+
 class LexToken(object):
+    __slots__ = ('type','value','lineno','lexpos','lexer')
     def __str__(self):
         return "LexToken(%s,%r,%d,%d)" % (self.type,self.value,self.lineno,self.lexpos)
     def __repr__(self):
@@ -128,9 +144,12 @@ class Lexer:
         self.lexmodule = None         # Module
         self.lineno = 1               # Current line number
         self.lexoptimize = 0          # Optimized mode
+        self.lextypemap = None        # Optional mapping of token names to types
+        self.lexscanre = {}           # Scanning regexes built by scan(), shared by clones
 
     def clone(self,object=None):
         c = copy.copy(self)
+        c.lexstatestack = list(self.lexstatestack)
 
         # If the object parameter has been supplied, it means we are attaching the
         # lexer to a new object.  In this case, we have to rebind all methods in
@@ -154,8 +173,35 @@ class Lexer:
             for key, ef in self.lexstateerrorf.items():
                 c.lexstateerrorf[key] = getattr(object,ef.__name__)
             c.lexmodule = object
+            c.begin(c.lexstate)
         return c
 
+    # ------------------------------------------------------------
+    # settypes() - Make the lexer produce typemap[name] rather than
+    # name as the type of each token, e.g. the integer token ids of
+    # a dense yacc parser.  Table files should be written before
+    # the types are changed.
+    # ------------------------------------------------------------
+    def settypes(self,typemap):
+        newtab = { }
+        for key, ritem in self.lexstatere.items():
+            newre = []
+            for cre, findex in ritem:
+                newfindex = []
+                for f in findex:
+                    if f and f[1]:
+                        f = (f[0],typemap.get(f[1],f[1]))
+                    newfindex.append(f)
+                newre.append((cre,newfindex))
+            newtab[key] = newre
+        self.lexstatere = newtab
+        self.lextokens = dict(self.lextokens)
+        for name, value in typemap.items():
+            if name in self.lextokens:
+                self.lextokens[value] = 1
+        self.lextypemap = typemap
+        self.begin(self.lexstate)
+
     # ------------------------------------------------------------
     # writetab() - Write lexer information to a table file
     # ------------------------------------------------------------
@@ -236,6 +282,71 @@ class Lexer:
              self.lexstateerrorf[key] = fdict[ef]
         self.begin('INITIAL')
 
+    # ------------------------------------------------------------
+    # writepickle() - Write lexer information to a binary table file.
+    # The file is written under a temporary name and renamed into
+    # place, so a concurrent readpickle() never sees a partial file.
+    # ------------------------------------------------------------
+    def writepickle(self,filename,signature):
+        tabre = { }
+        for key, lre in self.lexstatere.items():
+             titem = []
+             for i in range(len(lre)):
+                  titem.append((self.lexstateretext[key][i],_funcs_to_names(lre[i][1],self.lexstaterenames[key][i])))
+             tabre[key] = titem
+
+        taberr = { }
+        for key, ef in self.lexstateerrorf.items():
+             if ef:
+                  taberr[key] = ef.__name__
+             else:
+                  taberr[key] = None
+
+        tab = (__tabversion__, signature, self.lextokens, self.lexreflags, self.lexliterals,
+               self.lexstateinfo, tabre, self.lexstateignore, taberr)
+        try:
+            atomic_dump(filename,tab)
+        except (IOError,OSError):
+            e = sys.exc_info()[1]
+            sys.stderr.write("Unable to create '%s'\n" % filename)
+            sys.stderr.write(str(e)+"\n")
+
+    # ------------------------------------------------------------
+    # readpickle() - Read lexer information from a binary table file
+    # and return the signature of the rules it was built from
+    # ------------------------------------------------------------
+    def readpickle(self,filename,fdict):
+        f = open(filename,"rb")
+        try:
+            tab = pickle.load(f)
+        finally:
+            f.close()
+
+        if tab[0] != __tabversion__:
+            raise ImportError("Inconsistent PLY version")
+
+        (signature, self.lextokens, self.lexreflags, self.lexliterals,
+         self.lexstateinfo, tabre, self.lexstateignore, taberr) = tab[1:]
+        self.lexstatere     = { }
+        self.lexstateretext = { }
+        self.lexstaterenames = { }
+        for key,lre in tabre.items():
+             titem = []
+             txtitem = []
+             nameitem = []
+             for i in range(len(lre)):
+                  titem.append((re.compile(lre[i][0],re.VERBOSE | self.lexreflags),_names_to_funcs(lre[i][1],fdict)))
+                  txtitem.append(lre[i][0])
+                  nameitem.append([n and n[0] for n in lre[i][1]])
+             self.lexstatere[key] = titem
+             self.lexstateretext[key] = txtitem
+             self.lexstaterenames[key] = nameitem
+        self.lexstateerrorf = { }
+        for key,ef in taberr.items():
+             self.lexstateerrorf[key] = ef and fdict[ef]
+        self.begin('INITIAL')
+        return signature
+
     # ------------------------------------------------------------
     # input() - Push a new string into the lexer
     # ------------------------------------------------------------
@@ -344,6 +455,10 @@ class Lexer:
                     lexignore = self.lexignore      # This is here in case there was a state change
                     break
 
+                # Map a token type name that the function assigned
+                if self.lextypemap:
+                    newtok.type = self.lextypemap.get(newtok.type,newtok.type)
+
                 # Verify type of the token.  If not in the token map, raise an error
                 if not self.lexoptimize:
                     if not newtok.type in self.lextokens:
@@ -359,6 +474,8 @@ class Lexer:
                     tok.value = lexdata[lexpos]
                     tok.lineno = self.lineno
                     tok.type = tok.value
+                    if self.lextypemap:
+                        tok.type = self.lextypemap.get(tok.type,tok.type)
                     tok.lexpos = lexpos
                     self.lexpos = lexpos + 1
                     return tok
@@ -388,6 +505,240 @@ class Lexer:
              raise RuntimeError("No input string given with input()")
         return None
 
+    # ------------------------------------------------------------
+    # tokenbatch() - Return a list of up to n tokens.  This does the
+    # same work as token(), but keeps the lexer state in locals
+    # across the whole batch.  An empty list means the input has
+    # been consumed.  If a rule raises an exception, the tokens
+    # already lexed in the batch are lost.
+    # ------------------------------------------------------------
+    def tokenbatch(self,n):
+        # Make local copies of frequently referenced attributes
+        tokens    = [ ]
+        append    = tokens.append
+        count     = 0
+        lexpos    = self.lexpos
+        lexlen    = self.lexlen
+        lexignore = self.lexignore
+        lexdata   = self.lexdata
+        lexre     = self.lexre
+        lexliterals = self.lexliterals
+        lextypemap  = self.lextypemap
+
+        if lexdata is None:
+             raise RuntimeError("No input string given with input()")
+
+        while lexpos < lexlen and count < n:
+            # This code provides some short-circuit code for whitespace, tabs, and other ignored characters
+            if lexdata[lexpos] in lexignore:
+                lexpos += 1
+                continue
+
+            # Look for a regular expression match
+            for cre,lexindexfunc in lexre:
+                m = cre.match(lexdata,lexpos)
+                if not m: continue
+
+                # Create a token
+                tok = LexToken()
+                tok.value = m.group()
+                tok.lineno = self.lineno
+                tok.lexpos = lexpos
+
+                func,tok.type = lexindexfunc[m.lastindex]
+                lexpos = m.end()
+
+                if not func:
+                   # If no token type was set, it's an ignored token
+                   if tok.type:
+                      append(tok)
+                      count += 1
+                   break
+
+                # If token is processed by a function, call it
+
+                tok.lexer = self      # Set additional attributes useful in token rules
+                self.lexmatch = m
+                self.lexpos = lexpos
+
+                newtok = func(tok)
+
+                # The function may have updated lexpos or changed the state
+                lexpos    = self.lexpos
+                lexignore = self.lexignore
+                lexre     = self.lexre
+
+                # Every function must return a token, if nothing, we just move to next token
+                if not newtok:
+                    break
+
+                # Map a token type name that the function assigned
+                if lextypemap:
+                    newtok.type = lextypemap.get(newtok.type,newtok.type)
+
+                # Verify type of the token.  If not in the token map, raise an error
+                if not self.lexoptimize:
+                    if not newtok.type in self.lextokens:
+                        raise LexError("%s:%d: Rule '%s' returned an unknown token type '%s'" % (
+                            func_code(func).co_filename, func_code(func).co_firstlineno,
+                            func.__name__, newtok.type),lexdata[lexpos:])
+
+                append(newtok)
+                count += 1
+                break
+            else:
+                # No match, see if in literals
+                if lexdata[lexpos] in lexliterals:
+                    tok = LexToken()
+                    tok.value = lexdata[lexpos]
+                    tok.lineno = self.lineno
+                    tok.type = tok.value
+                    if lextypemap:
+                        tok.type = lextypemap.get(tok.type,tok.type)
+                    tok.lexpos = lexpos
+                    lexpos += 1
+                    append(tok)
+                    count += 1
+                    continue
+
+                # No match. Call t_error() if defined.
+                if self.lexerrorf:
+                    tok = LexToken()
+                    tok.value = lexdata[lexpos:]
+                    tok.lineno = self.lineno
+                    tok.type = "error"
+                    tok.lexer = self
+                    tok.lexpos = lexpos
+                    self.lexpos = lexpos
+                    newtok = self.lexerrorf(tok)
+                    if lexpos == self.lexpos:
+                        # Error method didn't change text position at all. This is an error.
+                        raise LexError("Scanning error. Illegal character '%s'" % (lexdata[lexpos]), lexdata[lexpos:])
+                    lexpos    = self.lexpos
+                    lexignore = self.lexignore
+                    lexre     = self.lexre
+                    if newtok:
+                        append(newtok)
+                        count += 1
+                    continue
+
+                self.lexpos = lexpos
+                raise LexError("Illegal character '%s' at index %d" % (lexdata[lexpos],lexpos), lexdata[lexpos:])
+
+        self.lexpos = lexpos
+        return tokens
+
+    # ------------------------------------------------------------
+    # tokenfunc() - Return a function that returns the next token,
+    # like token(), for use as the tokenfunc of LRParser.parse().
+    # The tokens are lexed n at a time with tokenbatch(), so the
+    # lexer runs ahead of the parser by up to n tokens.  Lexing
+    # starts on the first call, after the parser has called input().
+    # ------------------------------------------------------------
+    def tokenfunc(self,n=256):
+        def tokens():
+            tokenbatch = self.tokenbatch
+            while 1:
+                batch = tokenbatch(n)
+                if not batch:
+                    return
+                for tok in batch:
+                    yield tok
+        return functools.partial(next,tokens(),None)
+
+    # ------------------------------------------------------------
+    # scan() - Generate the tokens of the input, like repeated calls
+    # to token(), by driving a single scanning regex with finditer().
+    # The scanning regex is the master regex of the state with the
+    # ignored characters folded into its front, so no token needs a
+    # separate match call or a character-by-character ignore loop.
+    # Positions that the scanning regex cannot handle (literals,
+    # errors, and states with more than one master regex) are passed
+    # to token().  A rule that moves lexpos or changes the state
+    # restarts the scan from the new position.  self.lexpos is only
+    # brought up to date when a rule function runs or the scan ends.
+    # ------------------------------------------------------------
+    def scan(self):
+        lexdata = self.lexdata
+        if lexdata is None:
+             raise RuntimeError("No input string given with input()")
+        scanres = self.lexscanre
+
+        while 1:
+            lexpos = self.lexpos
+            lexre = self.lexre
+            lexignore = self.lexignore
+            restart = 0
+
+            if len(lexre) == 1:
+                cre,lexindexfunc = lexre[0]
+                key = (cre.pattern,lexignore)
+                scanre = scanres.get(key)
+                if scanre is None:
+                    pattern = cre.pattern
+                    if lexignore:
+                        pattern = "[%s]*(?:%s)" % ("".join([re.escape(c) for c in lexignore]),pattern)
+                    scanre = re.compile(pattern,cre.flags)
+                    scanres[key] = scanre
+
+                for m in scanre.finditer(lexdata,lexpos):
+                    i = m.lastindex
+                    start = m.start(i)
+                    # The match must start here, and token() would have skipped
+                    # any ignored character that the rule itself matched
+                    if m.start() != lexpos or lexdata[start:start+1] in lexignore:
+                        break
+
+                    tok = LexToken()
+                    tok.value = m.group(i)
+                    tok.lineno = self.lineno
+                    tok.lexpos = start
+
+                    func,tok.type = lexindexfunc[i]
+                    lexpos = m.end()
+
+                    if not func:
+                        # If no token type was set, it's an ignored token
+                        if tok.type:
+                            yield tok
+                        continue
+
+                    # If token is processed by a function, call it
+
+                    tok.lexer = self      # Set additional attributes useful in token rules
+                    self.lexmatch = m
+                    self.lexpos = lexpos
+
+                    newtok = func(tok)
+
+                    if newtok:
+                        # Map a token type name that the function assigned
+                        if self.lextypemap:
+                            newtok.type = self.lextypemap.get(newtok.type,newtok.type)
+
+                        # Verify type of the token.  If not in the token map, raise an error
+                        if not self.lexoptimize:
+                            if not newtok.type in self.lextokens:
+                                raise LexError("%s:%d: Rule '%s' returned an unknown token type '%s'" % (
+                                    func_code(func).co_filename, func_code(func).co_firstlineno,
+                                    func.__name__, newtok.type),lexdata[lexpos:])
+                        yield newtok
+
+                    # The function may have updated lexpos or changed the state
+                    if self.lexpos != lexpos or self.lexre is not lexre:
+                        restart = 1
+                        break
+
+                if restart:
+                    continue
+                self.lexpos = lexpos
+
+            # Let token() deal with whatever is at lexpos
+            tok = self.token()
+            if tok is None:
+                return
+            yield tok
+
     # Iterator interface
     def __iter__(self):
         return self
@@ -561,6 +912,27 @@ class LexerReflect(object):
         self.validate_rules()
         return self.error
 
+    # Compute a signature over the lexer rules
+    def signature(self):
+        from binascii import crc32
+        parts = [" ".join(self.tokens), repr(self.literals), repr(self.reflags)]
+        for state in sorted(self.stateinfo):
+            parts.append("%s:%s" % (state, self.stateinfo[state]))
+            for fname, f in self.funcsym.get(state,[]):
+                parts.append("%s=%s" % (fname, f.__doc__))
+            for name, r in sorted(self.strsym.get(state,[])):
+                parts.append("%s=%s" % (name, r))
+            parts.append(repr(self.ignore.get(state)))
+            ef = self.errorf.get(state)
+            parts.append(ef and ef.__name__ or "")
+        sig = 0
+        try:
+            for part in parts:
+                sig = crc32(part.encode('latin-1'),sig)
+        except (TypeError,ValueError):
+            pass
+        return sig
+
     # Get the tokens map
     def get_tokens(self):
         tokens = self.ldict.get("tokens",None)
@@ -853,7 +1225,8 @@ class LexerReflect(object):
 #
 # Build all of the regular expression rules from definitions in the supplied module
 # -----------------------------------------------------------------------------
-def lex(module=None,object=None,debug=0,optimize=0,lextab="lextab",reflags=0,nowarn=0,outputdir="", debuglog=None, errorlog=None):
+def lex(module=None,object=None,debug=0,optimize=0,lextab="lextab",reflags=0,nowarn=0,outputdir="", debuglog=None, errorlog=None,
+        picklefile=None):
     global lexer
     ldict = None
     stateinfo  = { 'INITIAL' : 'inclusive'}
@@ -895,6 +1268,26 @@ def lex(module=None,object=None,debug=0,optimize=0,lextab="lextab",reflags=0,now
         except ImportError:
             pass
 
+    # Try the binary table file.  Unless in optimize mode, it is only used
+    # if it was built from the same rules.
+    signature = None
+    if picklefile:
+        # A relative binary table file name is taken relative to outputdir
+        picklefile = os.path.join(outputdir,picklefile)
+        try:
+            picklelex = Lexer()
+            read_signature = picklelex.readpickle(picklefile,ldict)
+            if not optimize:
+                signature = linfo.signature()
+            if optimize or read_signature == signature:
+                picklelex.lexoptimize = optimize
+                token = picklelex.token
+                input = picklelex.input
+                lexer = picklelex
+                return picklelex
+        except Exception:
+            pass
+
     # Dump some basic debugging information
     if debug:
         debuglog.info("lex: tokens   = %r", linfo.tokens)
@@ -993,6 +1386,12 @@ def lex(module=None,object=None,debug=0,optimize=0,lextab="lextab",reflags=0,now
     if lextab and optimize:
         lexobj.writetab(lextab,outputdir)
 
+    # Write the binary table file if requested
+    if picklefile:
+        if signature is None:
+            signature = linfo.signature()
+        lexobj.writepickle(picklefile,signature)
+
     return lexobj
 
 # -----------------------------------------------------------------------------
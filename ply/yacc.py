@@ -73,7 +73,18 @@ yaccdevel   = 0                # Set to True if developing yacc.  This turns off
 
 resultlimit = 40               # Size limit of results when running in debug mode.
 
-import re, types, sys, os.path
+import re, types, sys, os.path, copy, array
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+# Python 2.x/3.0 compatibility.
+if sys.version_info[0] < 3:
+    from atomicfile import atomic_dump
+else:
+    from ply.atomicfile import atomic_dump
 
 # Compatibility function for python 2.6/3.0
 if sys.version_info[0] < 3:
@@ -163,8 +174,11 @@ def format_stack_entry(r):
 #        .endlineno  = Ending line number (optional, set automatically)
 #        .lexpos     = Starting lex position
 #        .endlexpos  = Ending lex position (optional, set automatically)
+#
+# One is allocated for every reduction, so the attributes are __slots__.
 
-class YaccSymbol:
+class YaccSymbol(object):
+    __slots__ = ('type','value','lineno','lexpos','endlineno','endlexpos','lexer')
     def __str__(self):    return self.type
     def __repr__(self):   return str(self)
 
@@ -231,6 +245,252 @@ class LRParser:
         self.action      = lrtab.lr_action
         self.goto        = lrtab.lr_goto
         self.errorfunc   = errorf
+        self.dense       = 0
+        self.tokenids    = None
+
+    # ------------------------------------------------------------
+    # clone() - Return a parser that shares the parsing tables of
+    # this one but keeps its own parse state, so that the two can
+    # be used from different threads.  If object is supplied, the
+    # grammar rule and error functions are rebound to the methods
+    # of the same name on that object.
+    # ------------------------------------------------------------
+    def clone(self,object=None):
+        c = copy.copy(self)
+        c.statestack = [ ]
+        c.symstack = [ ]
+        if object:
+            c.productions = [ ]
+            for p in self.productions:
+                p = copy.copy(p)
+                if p.func:
+                    p.callable = getattr(object,p.func)
+                c.productions.append(p)
+            if self.errorfunc:
+                c.errorfunc = getattr(object,self.errorfunc.__name__)
+        return c
+
+    # ------------------------------------------------------------
+    # make_dense() - Replace the action and goto tables with lists of
+    # array rows indexed by integer symbol ids, and parse with
+    # parsedense().  Terminal ids are stored in self.tokenids: '$end'
+    # is 0, 'error' is 1, the names in tokens follow in order and any
+    # other terminals (literals) come last.  self.tokennames maps the
+    # ids back to their names.  Nonterminal ids follow
+    # the terminal ids.  The lexer must produce
+    # these ids as token types, e.g. by calling its settypes() method
+    # with self.tokenids.  Identical rows are shared.
+    # ------------------------------------------------------------
+    def make_dense(self,tokens=()):
+        termids = { '$end' : 0, 'error' : 1 }
+        for name in tokens:
+            if name not in termids:
+                termids[name] = len(termids)
+        others = { }
+        for row in self.action.values():
+            others.update(row)
+        for name in sorted(others):
+            if name not in termids:
+                termids[name] = len(termids)
+
+        # Number the nonterminals after the terminals, so that the two
+        # can be told apart on the symbol stack
+        nontermids = { }
+        names = { }
+        for row in self.goto.values():
+            names.update(row)
+        for p in self.productions:
+            names[p.name] = 1
+        for name in sorted(names):
+            nontermids[name] = len(termids) + len(nontermids)
+
+        nstates = max(list(self.action.keys()) + list(self.goto.keys())) + 1
+        noaction = -len(self.productions)
+        typecode = 'h'
+        if max(nstates,len(self.productions)) >= 32767:
+            typecode = 'l'
+
+        rows = { }
+        def dense_rows(table,ids,missing):
+            dense = [ ]
+            width = max(ids.values()) + 1
+            for state in range(nstates):
+                row = [ missing ] * width
+                for name, value in table.get(state,{}).items():
+                    row[ids[name]] = value
+                row = tuple(row)
+                if row not in rows:
+                    rows[row] = array.array(typecode,row)
+                dense.append(rows[row])
+            return dense
+
+        self.action = dense_rows(self.action,termids,noaction)
+        self.goto = dense_rows(self.goto,nontermids,-1)
+        productions = [ ]
+        for p in self.productions:
+            p = copy.copy(p)
+            p.name = nontermids[p.name]
+            productions.append(p)
+        self.productions = productions
+        self.noaction = noaction
+        self.tokenids = termids
+        self.tokennames = dict([(value,name) for name, value in termids.items()])
+        self.dense = 1
+
+    # ------------------------------------------------------------
+    # write_module() - Write a standalone Python module that parses
+    # with this parser's tables.  The module defines a class Parser
+    # whose constructor takes the object or module holding the p_
+    # functions, and whose parse() method takes the same arguments
+    # as LRParser.parse().  The generated parse loop keeps a stack of
+    # plain values rather than YaccSymbols, reduces each production
+    # with straight-line code selected by a binary search over the
+    # production number, and calls each p_ function with a plain
+    # list [None, value1, value2, ...] in place of a YaccProduction.
+    # p_ functions must therefore only use p[n] and len(p).  There
+    # is no error recovery: after the first syntax error, p_error()
+    # is called and parse() returns None.  A SyntaxError raised by a
+    # p_ function also ends the parse.
+    # ------------------------------------------------------------
+    def write_module(self,modulename,outputdir=''):
+        if self.dense:
+            raise YaccError("Cannot write a parser module from dense tables")
+        for row in self.action.values():
+            if 'error' in row:
+                raise YaccError("Cannot write a parser module for a grammar with error rules")
+
+        nstates = max(list(self.action.keys()) + list(self.goto.keys())) + 1
+        gotos = { }
+        for state, row in self.goto.items():
+            for name, target in row.items():
+                gotos.setdefault(name,{})[state] = target
+
+        lines = [ ]
+        emit = lines.append
+        emit("# %s.py" % modulename)
+        emit("# This file is automatically generated by PLY (version %s). Do not edit." % __version__)
+        emit("")
+        emit("import sys")
+        emit("")
+        emit("_tabversion = %r" % __tabversion__)
+        emit("")
+        emit("_lr_action = [")
+        for state in range(nstates):
+            emit("  %r," % (self.action.get(state,{}),))
+        emit("]")
+        emit("")
+        names = sorted(gotos)
+        for i in range(len(names)):
+            emit("# %s" % names[i])
+            emit("_lr_goto_%d = %r" % (i,[gotos[names[i]].get(state) for state in range(nstates)]))
+        emit("")
+        emit("_lr_funcs = %r" % ([p.func for p in self.productions],))
+        emit("")
+        emit("class Parser(object):")
+        emit("    def __init__(self,module):")
+        emit("        self.funcs = [ ]")
+        emit("        for name in _lr_funcs:")
+        emit("            self.funcs.append(name and getattr(module,name))")
+        emit("        self.errorfunc = getattr(module,'p_error',None)")
+        emit("")
+        emit("    def parse(self,input=None,lexer=None,debug=0,tracking=0,tokenfunc=None):")
+        emit("        if input is not None:")
+        emit("            lexer.input(input)")
+        emit("        if tokenfunc is None:")
+        emit("            get_token = lexer.token")
+        emit("        else:")
+        emit("            get_token = tokenfunc")
+        emit("        actions = _lr_action")
+        for i in range(len(names)):
+            emit("        goto_%d = _lr_goto_%d" % (i,i))
+        emit("        funcs = self.funcs")
+        numbered = list(zip(range(len(self.productions)),self.productions))[1:]
+        for n, p in numbered:
+            if p.func:
+                emit("        f%d = funcs[%d]" % (n,n))
+        emit("        statestack = [ 0 ]")
+        emit("        valuestack = [ None ]")
+        emit("        state = 0")
+        emit("        lookahead = get_token()")
+        emit("        if lookahead is None:")
+        emit("            ltype = '$end'")
+        emit("        else:")
+        emit("            ltype = lookahead.type")
+        emit("        while 1:")
+        emit("            t = actions[state].get(ltype)")
+        emit("            if t is None:")
+        emit("                if self.errorfunc:")
+        emit("                    if lookahead is not None and not hasattr(lookahead,'lexer'):")
+        emit("                        lookahead.lexer = lexer")
+        emit("                    self.errorfunc(lookahead)")
+        emit("                elif lookahead is None:")
+        emit("                    sys.stderr.write('yacc: Parse error in input. EOF\\n')")
+        emit("                else:")
+        emit("                    sys.stderr.write('yacc: Syntax error, token=%s\\n' % ltype)")
+        emit("                return None")
+        emit("            if t > 0:")
+        emit("                statestack.append(t)")
+        emit("                valuestack.append(lookahead.value)")
+        emit("                state = t")
+        emit("                lookahead = get_token()")
+        emit("                if lookahead is None:")
+        emit("                    ltype = '$end'")
+        emit("                else:")
+        emit("                    ltype = lookahead.type")
+        emit("                continue")
+        emit("            if t == 0:")
+        emit("                return valuestack[-1]")
+        emit("            t = -t")
+
+        gotonames = dict([(names[i],i) for i in range(len(names))])
+        def emit_reduce(prods,indent):
+            pad = " " * indent
+            if len(prods) > 1:
+                middle = len(prods) // 2
+                emit("%sif t < %d:" % (pad,prods[middle][0]))
+                emit_reduce(prods[:middle],indent+4)
+                emit("%selse:" % pad)
+                emit_reduce(prods[middle:],indent+4)
+                return
+            n, p = prods[0]
+            emit("%s# %s" % (pad,p.str))
+            if p.len == 1:
+                emit("%sstatestack.pop()" % pad)
+                if p.func:
+                    emit("%sp = [None,valuestack.pop()]" % pad)
+                else:
+                    emit("%svaluestack.pop()" % pad)
+            elif p.len:
+                if p.func:
+                    args = ["None"] + ["valuestack[%d]" % (i - p.len) for i in range(p.len)]
+                    emit("%sp = [%s]" % (pad,",".join(args)))
+                emit("%sdel valuestack[-%d:]" % (pad,p.len))
+                emit("%sdel statestack[-%d:]" % (pad,p.len))
+            elif p.func:
+                emit("%sp = [None]" % pad)
+            if p.func:
+                emit("%stry:" % pad)
+                emit("%s    f%d(p)" % (pad,n))
+                emit("%sexcept SyntaxError:" % pad)
+                emit("%s    return None" % pad)
+                emit("%svaluestack.append(p[0])" % pad)
+            else:
+                emit("%svaluestack.append(None)" % pad)
+            emit("%sstate = goto_%d[statestack[-1]]" % (pad,gotonames[p.name]))
+            emit("%sstatestack.append(state)" % pad)
+
+        emit_reduce(numbered,12)
+        emit("")
+
+        filename = os.path.join(outputdir,modulename.split(".")[-1]) + ".py"
+        try:
+            f = open(filename,"w")
+            f.write("\n".join(lines))
+            f.close()
+        except IOError:
+            e = sys.exc_info()[1]
+            sys.stderr.write("Unable to create '%s'\n" % filename)
+            sys.stderr.write(str(e)+"\n")
 
     def errok(self):
         self.errorok     = 1
@@ -244,7 +504,9 @@ class LRParser:
         self.statestack.append(0)
 
     def parse(self,input=None,lexer=None,debug=0,tracking=0,tokenfunc=None):
-        if debug or yaccdevel:
+        if self.dense:
+            return self.parsedense(input,lexer,debug,tracking,tokenfunc)
+        elif debug or yaccdevel:
             if isinstance(debug,int):
                 debug = PlyLogger(sys.stderr)
             return self.parsedebug(input,lexer,debug,tracking,tokenfunc)
@@ -506,7 +768,7 @@ class LRParser:
                         if errtoken and not hasattr(errtoken,'lexer'):
                             errtoken.lexer = lexer
                         tok = self.errorfunc(errtoken)
-                        del errok, token, restart   # Delete special functions
+                        errok = token = restart = None   # Clear special functions
 
                         if self.errorok:
                             # User must have done some kind of panic
@@ -779,7 +1041,7 @@ class LRParser:
                         if errtoken and not hasattr(errtoken,'lexer'):
                             errtoken.lexer = lexer
                         tok = self.errorfunc(errtoken)
-                        del errok, token, restart   # Delete special functions
+                        errok = token = restart = None   # Clear special functions
 
                         if self.errorok:
                             # User must have done some kind of panic
@@ -1034,7 +1296,7 @@ class LRParser:
                         if errtoken and not hasattr(errtoken,'lexer'):
                             errtoken.lexer = lexer
                         tok = self.errorfunc(errtoken)
-                        del errok, token, restart   # Delete special functions
+                        errok = token = restart = None   # Clear special functions
 
                         if self.errorok:
                             # User must have done some kind of panic
@@ -1102,6 +1364,502 @@ class LRParser:
             # Call an error function here
             raise RuntimeError("yacc: internal parser error!!!\n")
 
+    # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+    # parsedense().
+    #
+    # Version of parseopt_notrack() for the dense tables built by make_dense().
+    # Token types are integer ids: 0 is '$end' and 1 is 'error'.  Missing table
+    # entries hold self.noaction.
+    # DO NOT EDIT THIS CODE DIRECTLY. Copy parseopt_notrack() and change the
+    # table lookups and symbol names.
+    # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+    def parsedense(self,input=None,lexer=None,debug=0,tracking=0,tokenfunc=None):
+        lookahead = None                 # Current lookahead symbol
+        lookaheadstack = [ ]             # Stack of lookahead symbols
+        actions = self.action            # Local reference to action table (to avoid lookup on self.)
+        goto    = self.goto              # Local reference to goto table (to avoid lookup on self.)
+        prod    = self.productions       # Local reference to production list (to avoid lookup on self.)
+        noaction = self.noaction         # Table entry for a syntax error
+        pslice  = YaccProduction(None)   # Production object passed to grammar rules
+        errorcount = 0                   # Used during error recovery 
+
+        # If no lexer was given, we will try to use the lex module
+        if not lexer:
+            lex = load_ply_lex()
+            lexer = lex.lexer
+        
+        # Set up the lexer and parser objects on pslice
+        pslice.lexer = lexer
+        pslice.parser = self
+
+        # If input was supplied, pass to lexer
+        if input is not None:
+            lexer.input(input)
+
+        if tokenfunc is None:
+           # Tokenize function
+           get_token = lexer.token
+        else:
+           get_token = tokenfunc
+
+        # Set up the state and symbol stacks
+
+        statestack = [ ]                # Stack of parsing states
+        self.statestack = statestack
+        symstack   = [ ]                # Stack of grammar symbols
+        self.symstack = symstack
+
+        pslice.stack = symstack         # Put in the production
+        errtoken   = None               # Err token
+
+        # The start state is assumed to be (0,$end)
+
+        statestack.append(0)
+        sym = YaccSymbol()
+        sym.type = 0
+        symstack.append(sym)
+        state = 0
+        while 1:
+            # Get the next symbol on the input.  If a lookahead symbol
+            # is already set, we just use that. Otherwise, we'll pull
+            # the next token off of the lookaheadstack or from the lexer
+
+            if not lookahead:
+                if not lookaheadstack:
+                    lookahead = get_token()     # Get the next token
+                else:
+                    lookahead = lookaheadstack.pop()
+                if not lookahead:
+                    lookahead = YaccSymbol()
+                    lookahead.type = 0
+
+            # Check the action table
+            ltype = lookahead.type
+            t = actions[state][ltype]
+
+            if t != noaction:
+                if t > 0:
+                    # shift a symbol on the stack
+                    statestack.append(t)
+                    state = t
+
+                    symstack.append(lookahead)
+                    lookahead = None
+
+                    # Decrease error count on successful shift
+                    if errorcount: errorcount -=1
+                    continue
+
+                if t < 0:
+                    # reduce a symbol on the stack, emit a production
+                    p = prod[-t]
+                    pname = p.name
+                    plen  = p.len
+
+                    # Get production function
+                    sym = YaccSymbol()
+                    sym.type = pname       # Production name
+                    sym.value = None
+
+                    if plen:
+                        targ = symstack[-plen-1:]
+                        targ[0] = sym
+
+                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+                        # The code enclosed in this section is duplicated 
+                        # below as a performance optimization.  Make sure
+                        # changes get made in both locations.
+
+                        pslice.slice = targ
+                        
+                        try:
+                            # Call the grammar rule with our special slice object
+                            del symstack[-plen:]
+                            del statestack[-plen:]
+                            p.callable(pslice)
+                            symstack.append(sym)
+                            state = goto[statestack[-1]][pname]
+                            statestack.append(state)
+                        except SyntaxError:
+                            # If an error was set. Enter error recovery state
+                            lookaheadstack.append(lookahead)
+                            symstack.pop()
+                            statestack.pop()
+                            state = statestack[-1]
+                            sym.type = 1
+                            lookahead = sym
+                            errorcount = error_count
+                            self.errorok = 0
+                        continue
+                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+    
+                    else:
+
+                        targ = [ sym ]
+
+                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+                        # The code enclosed in this section is duplicated 
+                        # above as a performance optimization.  Make sure
+                        # changes get made in both locations.
+
+                        pslice.slice = targ
+
+                        try:
+                            # Call the grammar rule with our special slice object
+                            p.callable(pslice)
+                            symstack.append(sym)
+                            state = goto[statestack[-1]][pname]
+                            statestack.append(state)
+                        except SyntaxError:
+                            # If an error was set. Enter error recovery state
+                            lookaheadstack.append(lookahead)
+                            symstack.pop()
+                            statestack.pop()
+                            state = statestack[-1]
+                            sym.type = 1
+                            lookahead = sym
+                            errorcount = error_count
+                            self.errorok = 0
+                        continue
+                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+                if t == 0:
+                    n = symstack[-1]
+                    return getattr(n,"value",None)
+
+            if t == noaction:
+
+                # We have some kind of parsing error here.  To handle
+                # this, we are going to push the current token onto
+                # the tokenstack and replace it with an 1 token.
+                # If there are any synchronization rules, they may
+                # catch it.
+                #
+                # In addition to pushing the error token, we call call
+                # the user defined p_error() function if this is the
+                # first syntax error.  This function is only called if
+                # errorcount == 0.
+                if errorcount == 0 or self.errorok:
+                    errorcount = error_count
+                    self.errorok = 0
+                    errtoken = lookahead
+                    if errtoken.type == 0:
+                        errtoken = None               # End of file!
+                    if self.errorfunc:
+                        global errok,token,restart
+                        errok = self.errok        # Set some special functions available in error recovery
+                        token = get_token
+                        restart = self.restart
+                        if errtoken and not hasattr(errtoken,'lexer'):
+                            errtoken.lexer = lexer
+                        if errtoken:
+                            # Show the error function the token's name, as
+                            # the other parse methods do, rather than its id
+                            errtype = errtoken.type
+                            errtoken.type = self.tokennames.get(errtype,errtype)
+                            try:
+                                tok = self.errorfunc(errtoken)
+                            finally:
+                                errtoken.type = errtype
+                        else:
+                            tok = self.errorfunc(errtoken)
+                        errok = token = restart = None   # Clear special functions
+
+                        if self.errorok:
+                            # User must have done some kind of panic
+                            # mode recovery on their own.  The
+                            # returned token is the next lookahead
+                            lookahead = tok
+                            errtoken = None
+                            continue
+                    else:
+                        if errtoken:
+                            errtype = self.tokennames.get(errtoken.type,errtoken.type)
+                            if hasattr(errtoken,"lineno"): lineno = lookahead.lineno
+                            else: lineno = 0
+                            if lineno:
+                                sys.stderr.write("yacc: Syntax error at line %d, token=%s\n" % (lineno, errtype))
+                            else:
+                                sys.stderr.write("yacc: Syntax error, token=%s" % errtype)
+                        else:
+                            sys.stderr.write("yacc: Parse error in input. EOF\n")
+                            return
+
+                else:
+                    errorcount = error_count
+
+                # case 1:  the statestack only has 1 entry on it.  If we're in this state, the
+                # entire parse has been rolled back and we're completely hosed.   The token is
+                # discarded and we just keep going.
+
+                if len(statestack) <= 1 and lookahead.type != 0:
+                    lookahead = None
+                    errtoken = None
+                    state = 0
+                    # Nuke the pushback stack
+                    del lookaheadstack[:]
+                    continue
+
+                # case 2: the statestack has a couple of entries on it, but we're
+                # at the end of the file. nuke the top entry and generate an error token
+
+                # Start nuking entries on the stack
+                if lookahead.type == 0:
+                    # Whoa. We're really hosed here. Bail out
+                    return
+
+                if lookahead.type != 1:
+                    sym = symstack[-1]
+                    if sym.type == 1:
+                        # Hmmm. Error is on top of stack, we'll just nuke input
+                        # symbol and continue
+                        lookahead = None
+                        continue
+                    t = YaccSymbol()
+                    t.type = 1
+                    if hasattr(lookahead,"lineno"):
+                        t.lineno = lookahead.lineno
+                    t.value = lookahead
+                    lookaheadstack.append(lookahead)
+                    lookahead = t
+                else:
+                    symstack.pop()
+                    statestack.pop()
+                    state = statestack[-1]       # Potential bug fix
+
+                continue
+
+            # Call an error function here
+            raise RuntimeError("yacc: internal parser error!!!\n")
+
+    # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+    # push_begin(), push(), push_end()
+    #
+    # Push-mode interface to the parsing engine.  Instead of pulling tokens
+    # from a lexer, the caller hands tokens to the parser one at a time as
+    # they become available:
+    #
+    #      parser.push_begin(lexer)
+    #      for tok in tokens:
+    #          parser.push(tok)
+    #      result = parser.push_end()
+    #
+    # The parse state (state and symbol stacks, pending lookaheads, error
+    # count) lives on the parser between calls.  push() runs the same
+    # shift/reduce loop as parseopt_notrack() and returns as soon as it needs
+    # another token.  Because there is no token source to pull from, the
+    # token() function made available to p_error() always returns None.
+    # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+    def push_begin(self,lexer=None):
+        if self.dense:
+            raise YaccError("Push mode does not support dense tables")
+        pslice  = YaccProduction(None)   # Production object passed to grammar rules
+        pslice.lexer = lexer
+        pslice.parser = self
+
+        self.statestack = [ 0 ]          # Stack of parsing states
+        sym = YaccSymbol()
+        sym.type = '$end'
+        self.symstack = [ sym ]          # Stack of grammar symbols
+        pslice.stack = self.symstack
+
+        self.pushslice      = pslice
+        self.pushlookahead  = [ ]        # Stack of lookahead symbols
+        self.pusherrorcount = 0          # Used during error recovery
+        self.pushdone       = 0          # Set once the parse has finished
+        self.pushresult     = None       # Value of the start symbol
+
+    def push(self,tok):
+        if not self.pushdone:
+            self.pushrun(tok)
+
+    def push_end(self):
+        if not self.pushdone:
+            self.pushrun(None)
+        self.pushslice = None
+        return self.pushresult
+
+    def pushrun(self,lookahead):
+        lookaheadstack = self.pushlookahead
+        actions = self.action            # Local reference to action table (to avoid lookup on self.)
+        goto    = self.goto              # Local reference to goto table (to avoid lookup on self.)
+        prod    = self.productions       # Local reference to production list (to avoid lookup on self.)
+        pslice  = self.pushslice
+        lexer   = pslice.lexer
+        errorcount = self.pusherrorcount
+        statestack = self.statestack
+        symstack   = self.symstack
+        state = statestack[-1]
+        errtoken = None
+
+        # A None token marks the end of the input
+        if lookahead is None:
+            lookahead = YaccSymbol()
+            lookahead.type = '$end'
+
+        while 1:
+            if not lookahead:
+                if not lookaheadstack:
+                    # Wait for the caller to push the next token
+                    self.pusherrorcount = errorcount
+                    return
+                lookahead = lookaheadstack.pop()
+
+            # Check the action table
+            ltype = lookahead.type
+            t = actions[state].get(ltype)
+
+            if t is not None:
+                if t > 0:
+                    # shift a symbol on the stack
+                    statestack.append(t)
+                    state = t
+
+                    symstack.append(lookahead)
+                    lookahead = None
+
+                    # Decrease error count on successful shift
+                    if errorcount: errorcount -=1
+                    continue
+
+                if t < 0:
+                    # reduce a symbol on the stack, emit a production
+                    p = prod[-t]
+                    pname = p.name
+                    plen  = p.len
+
+                    # Get production function
+                    sym = YaccSymbol()
+                    sym.type = pname       # Production name
+                    sym.value = None
+
+                    if plen:
+                        targ = symstack[-plen-1:]
+                        targ[0] = sym
+                    else:
+                        targ = [ sym ]
+
+                    pslice.slice = targ
+
+                    try:
+                        # Call the grammar rule with our special slice object
+                        if plen:
+                            del symstack[-plen:]
+                            del statestack[-plen:]
+                        p.callable(pslice)
+                        symstack.append(sym)
+                        state = goto[statestack[-1]][pname]
+                        statestack.append(state)
+                    except SyntaxError:
+                        # If an error was set. Enter error recovery state
+                        lookaheadstack.append(lookahead)
+                        symstack.pop()
+                        statestack.pop()
+                        state = statestack[-1]
+                        sym.type = 'error'
+                        lookahead = sym
+                        errorcount = error_count
+                        self.errorok = 0
+                    continue
+
+                if t == 0:
+                    n = symstack[-1]
+                    self.pushresult = getattr(n,"value",None)
+                    self.pushdone = 1
+                    return
+
+            if t == None:
+
+                # We have some kind of parsing error here.  The recovery
+                # strategy is the same as in parseopt_notrack().
+                if errorcount == 0 or self.errorok:
+                    errorcount = error_count
+                    self.errorok = 0
+                    errtoken = lookahead
+                    if errtoken.type == '$end':
+                        errtoken = None               # End of file!
+                    if self.errorfunc:
+                        global errok,token,restart
+                        errok = self.errok        # Set some special functions available in error recovery
+                        token = _push_token
+                        restart = self.restart
+                        if errtoken and not hasattr(errtoken,'lexer'):
+                            errtoken.lexer = lexer
+                        tok = self.errorfunc(errtoken)
+                        errok = token = restart = None   # Clear special functions
+
+                        if self.errorok:
+                            # User must have done some kind of panic
+                            # mode recovery on their own.  The
+                            # returned token is the next lookahead
+                            lookahead = tok
+                            errtoken = None
+                            continue
+                    else:
+                        if errtoken:
+                            if hasattr(errtoken,"lineno"): lineno = lookahead.lineno
+                            else: lineno = 0
+                            if lineno:
+                                sys.stderr.write("yacc: Syntax error at line %d, token=%s\n" % (lineno, errtoken.type))
+                            else:
+                                sys.stderr.write("yacc: Syntax error, token=%s" % errtoken.type)
+                        else:
+                            sys.stderr.write("yacc: Parse error in input. EOF\n")
+                            self.pushdone = 1
+                            return
+
+                else:
+                    errorcount = error_count
+
+                # case 1:  the statestack only has 1 entry on it.  The token is
+                # discarded and we just keep going.
+
+                if len(statestack) <= 1 and lookahead.type != '$end':
+                    lookahead = None
+                    errtoken = None
+                    state = 0
+                    # Nuke the pushback stack
+                    del lookaheadstack[:]
+                    continue
+
+                # case 2: the statestack has a couple of entries on it, but we're
+                # at the end of the file. Bail out.
+
+                if lookahead.type == '$end':
+                    self.pushdone = 1
+                    return
+
+                if lookahead.type != 'error':
+                    sym = symstack[-1]
+                    if sym.type == 'error':
+                        # Hmmm. Error is on top of stack, we'll just nuke input
+                        # symbol and continue
+                        lookahead = None
+                        continue
+                    t = YaccSymbol()
+                    t.type = 'error'
+                    if hasattr(lookahead,"lineno"):
+                        t.lineno = lookahead.lineno
+                    t.value = lookahead
+                    lookaheadstack.append(lookahead)
+                    lookahead = t
+                else:
+                    symstack.pop()
+                    statestack.pop()
+                    state = statestack[-1]       # Potential bug fix
+
+                continue
+
+            # Call an error function here
+            raise RuntimeError("yacc: internal parser error!!!\n")
+
+# Token function made available to p_error() while in push mode.  There is
+# no input to pull from, so it never returns a token.
+def _push_token():
+    return None
+
 # -----------------------------------------------------------------------------
 #                          === Grammar Representation ===
 #
@@ -1836,6 +2594,24 @@ class LRTable(object):
         self.lr_method = parsetab._lr_method
         return parsetab._lr_signature
 
+    # Read the tables from a binary table file written by pickle_table()
+    def read_pickle(self,filename):
+        f = open(filename,"rb")
+        try:
+            tab = pickle.load(f)
+        finally:
+            f.close()
+
+        if tab[0] != __tabversion__:
+            raise VersionError("yacc table file version is out of date")
+
+        self.lr_method, signature, self.lr_action, self.lr_goto, productions = tab[1:]
+
+        self.lr_productions = []
+        for p in productions:
+            self.lr_productions.append(MiniProduction(*p))
+        return signature
+
     # Bind all production function names to callable objects in pdict
     def bind_callables(self,pdict):
         for p in self.lr_productions:
@@ -2619,6 +3395,30 @@ del _lr_goto_items
             sys.stderr.write(str(e)+"\n")
             return
 
+    # -----------------------------------------------------------------------------
+    # pickle_table()
+    #
+    # This function writes the LR parsing tables to a binary table file.  The
+    # file is written under a temporary name and renamed into place, so a
+    # concurrent read_pickle() never sees a partial file.
+    # -----------------------------------------------------------------------------
+
+    def pickle_table(self,filename,signature=""):
+        productions = []
+        for p in self.lr_productions:
+            if p.func:
+                productions.append((p.str,p.name,p.len,p.func,p.file,p.line))
+            else:
+                productions.append((str(p),p.name,p.len,None,None,None))
+
+        tab = (__tabversion__,self.lr_method,signature,self.lr_action,self.lr_goto,productions)
+        try:
+            atomic_dump(filename,tab)
+        except (IOError,OSError):
+            e = sys.exc_info()[1]
+            sys.stderr.write("Unable to create '%s'\n" % filename)
+            sys.stderr.write(str(e)+"\n")
+
 
 # -----------------------------------------------------------------------------
 #                            === INTROSPECTION ===
@@ -2968,7 +3768,7 @@ class ParserReflect(object):
 
 def yacc(method='LALR', debug=yaccdebug, module=None, tabmodule=tab_module, start=None, 
          check_recursion=1, optimize=0, write_tables=1, debugfile=debug_file,outputdir='',
-         debuglog=None, errorlog = None):
+         debuglog=None, errorlog = None, picklefile=None, dense=0):
 
     global parse                 # Reference to the parsing method of the last built parser
 
@@ -2989,17 +3789,26 @@ def yacc(method='LALR', debug=yaccdebug, module=None, tabmodule=tab_module, star
     if pinfo.error:
         raise YaccError("Unable to build parser")
 
-    # Check signature against table files (if any)
-    signature = pinfo.signature()
-
-    # Read the tables
+    # Read the tables.  In optimize mode they are used without checking
+    # their signature against the grammar.
+    signature = None
+    if picklefile:
+        # A relative binary table file name is taken relative to outputdir
+        picklefile = os.path.join(outputdir,picklefile)
     try:
         lr = LRTable()
-        read_signature = lr.read_table(tabmodule)
+        if picklefile:
+            read_signature = lr.read_pickle(picklefile)
+        else:
+            read_signature = lr.read_table(tabmodule)
+        if not optimize:
+            signature = pinfo.signature()
         if optimize or (read_signature == signature):
             try:
                 lr.bind_callables(pinfo.pdict)
                 parser = LRParser(lr,pinfo.error_func)
+                if dense:
+                    parser.make_dense(pinfo.tokens)
                 parse = parser.parse
                 return parser
             except Exception:
@@ -3019,6 +3828,9 @@ def yacc(method='LALR', debug=yaccdebug, module=None, tabmodule=tab_module, star
 
     debuglog.info("Created by PLY version %s (http://www.dabeaz.com/ply)", __version__)
 
+    if signature is None:
+        signature = pinfo.signature()
+
 
     errors = 0
 
@@ -3170,13 +3982,18 @@ def yacc(method='LALR', debug=yaccdebug, module=None, tabmodule=tab_module, star
             errorlog.warning("reduce/reduce conflict in state %d resolved using rule (%s)", state, rule)
             errorlog.warning("rejected rule (%s)", rejected)
 
-    # Write the table file if requested
-    if write_tables:
+    # Write the table file if requested.  A binary table file replaces
+    # the table module.
+    if picklefile:
+        lr.pickle_table(picklefile,signature)
+    elif write_tables:
         lr.write_table(tabmodule,outputdir,signature)
     
     # Build the parser
     lr.bind_callables(pinfo.pdict)
     parser = LRParser(lr,pinfo.error_func)
+    if dense:
+        parser.make_dense(pinfo.tokens)
 
     parse = parser.parse
     return parser